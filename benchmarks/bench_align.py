@@ -0,0 +1,64 @@
+"""
+双语字幕对齐基准：在合成的多小时字幕上测量 align_cues 的耗时，并检查是否随长度线性增长
+
+用法：
+    python benchmarks/bench_align.py [--hours 1 3 10] [--runs 3]
+
+两条字幕轨的切分粒度不同（英文约 3 秒一条，中文约 4.5 秒一条且带随机偏移），
+模拟人工翻译与原文分段不一致的情况。
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.subtitles import Cue, align_cues  # noqa: E402
+
+
+def synthetic_track(hours, mean_ms, jitter_ms, seed):
+    """生成按开始时间排序、互不重叠的 Cue 序列"""
+    rng = random.Random(seed)
+    total = int(hours * 3600 * 1000)
+    cues, t = [], rng.randint(0, jitter_ms)
+    while t < total:
+        length = max(500, int(rng.gauss(mean_ms, mean_ms / 4)))
+        cues.append(Cue(t, t + length, ''))
+        t += length + rng.randint(0, jitter_ms)
+    return cues
+
+
+def bench(hours, runs):
+    en = synthetic_track(hours, 3000, 300, seed=1)
+    zh = synthetic_track(hours, 4500, 800, seed=2)
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        assigned = align_cues(en, zh)
+        best = min(best, time.perf_counter() - start)
+    assert sum(len(a) for a in assigned) == len(zh)
+    return len(en), len(zh), best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='双语字幕对齐基准')
+    parser.add_argument('--hours', type=float, nargs='+', default=[1, 3, 10])
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'hours':>6} {'en':>8} {'zh':>8} {'ms':>9} {'ns/cue':>8}")
+    per_cue = []
+    for hours in args.hours:
+        n, m, elapsed = bench(hours, args.runs)
+        ns = elapsed * 1e9 / (n + m)
+        per_cue.append(ns)
+        print(f"{hours:>6g} {n:>8} {m:>8} {elapsed * 1000:>9.2f} {ns:>8.0f}")
+    # 线性算法的单条耗时应大致恒定
+    if len(per_cue) > 1:
+        print(f"单条耗时最大/最小比: {max(per_cue) / min(per_cue):.2f}")
+
+
+if __name__ == '__main__':
+    main()
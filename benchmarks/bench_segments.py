@@ -0,0 +1,115 @@
+"""
+断句基准：在合成的 3 小时字幕上比较旧版和新版 MdCommand.merge_segments
+
+用法：
+    python benchmarks/bench_segments.py [--hours 3] [--runs 3]
+
+两种字幕：带标点的人工字幕，以及无标点、逐词滚动的自动字幕（只有停顿可以断句）。
+输出耗时、片段数和最长片段字符数；旧版在无标点字幕上会把整段文字累积成一个片段。
+"""
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.commands.md import MdCommand  # noqa: E402
+
+WORDS = ('the', 'quick', 'brown', 'fox', 'jumps', 'over', 'lazy', 'dog', 'and', 'then',
+         'we', 'talk', 'about', 'something', 'completely', 'different', 'today')
+
+
+def synthetic_transcript(hours, punctuated, seed=1):
+    """生成 parse_vtt_file 格式的字幕数据；自动字幕每条更短，偶尔有停顿"""
+    rng = random.Random(seed)
+    data, t, total = [], 0.0, hours * 3600
+    while t < total:
+        if punctuated:
+            duration = rng.uniform(1.5, 4.5)
+            text = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(4, 12)))
+            text = text.capitalize() + rng.choice(('.', '?', '!', ',', ''))
+        else:
+            duration = rng.uniform(0.6, 1.6)
+            text = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 5)))
+            if rng.random() < 0.02:
+                text = '[Music] ' + text
+        data.append({'start': t, 'end': t + duration, 'text': text})
+        t += duration + (rng.uniform(1.5, 3.0) if rng.random() < 0.05 else 0.0)
+    return data
+
+
+def legacy_clean_text(text):
+    text = re.sub(r'\[[^\]]*\]', '', text)
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+
+def legacy_merge_segments(transcript_data, min_len=8, min_words=2):
+    """旧版实现：字符串累加 + 第二遍合并超短句"""
+    if not transcript_data:
+        return []
+    result = []
+    buffer = ''
+    start_time = None
+    for item in transcript_data:
+        text = legacy_clean_text(item['text'])
+        if not text:
+            continue
+        sentences = re.split(r'(?<=[.!?])\s+', text)
+        for sentence in sentences:
+            s = sentence.strip()
+            if not s:
+                continue
+            if buffer == '':
+                buffer = s
+                start_time = item['start']
+            else:
+                buffer += ' ' + s
+            if buffer.endswith(('.', '?', '!')):
+                result.append({'start': start_time, 'text': buffer})
+                buffer = ''
+                start_time = None
+    if buffer:
+        result.append({'start': start_time, 'text': buffer})
+    final = []
+    for seg in result:
+        if final and (len(seg['text']) < min_len or len(seg['text'].split()) < min_words):
+            final[-1]['text'] += ' ' + seg['text']
+        else:
+            final.append(seg)
+    return final
+
+
+def measure(func, data, runs):
+    best, segments = float('inf'), []
+    for _ in range(runs):
+        copied = [dict(item) for item in data]
+        start = time.perf_counter()
+        segments = func(copied)
+        best = min(best, time.perf_counter() - start)
+    return best, segments
+
+
+def main():
+    parser = argparse.ArgumentParser(description='断句基准')
+    parser.add_argument('--hours', type=float, default=3)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'case':<10} {'impl':<7} {'cues':>7} {'ms':>9} {'segments':>9} {'max chars':>10}")
+    for case, punctuated in (('manual', True), ('auto', False)):
+        data = synthetic_transcript(args.hours, punctuated)
+        timings = {}
+        for impl, func in (('legacy', legacy_merge_segments), ('new', MdCommand.merge_segments)):
+            elapsed, segments = measure(func, data, args.runs)
+            timings[impl] = elapsed
+            longest = max(len(seg['text']) for seg in segments)
+            print(f"{case:<10} {impl:<7} {len(data):>7} {elapsed * 1000:>9.1f} {len(segments):>9} {longest:>10}")
+        print(f"{case:<10} speedup {timings['legacy'] / timings['new']:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
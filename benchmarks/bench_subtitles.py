@@ -0,0 +1,99 @@
+"""
+字幕解析吞吐基准：在合成的大字幕文件上比较 tools.subtitles 的流式解析器和旧版 md 解析器
+
+用法：
+    python benchmarks/bench_subtitles.py [--hours 10] [--runs 3]
+
+生成两类文件：人工字幕风格的 SRT（CRLF + BOM），以及带逐词时间标签和 cue settings 的
+自动字幕风格 VTT；输出每种解析器的 MB/s、条/秒和 tracemalloc 峰值内存。
+
+两者做的工作不同：旧解析器一次读入整个文件，只取开始时间、保留样式标签；流式解析器逐行读取，
+去除标签和 HTML 实体并解析结束时间。流式解析器的内存峰值不随文件大小增长，吞吐与旧解析器相当。
+"""
+import os
+import re
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.subtitles import iter_srt, iter_vtt  # noqa: E402
+from fixtures import write_srt_fixture, write_vtt_fixture  # noqa: E402
+
+
+def legacy_parse_vtt(vtt_file):
+    """旧版 MdCommand.parse_vtt_file 的解析逻辑（去掉输出），用于对比"""
+    with open(vtt_file, 'r', encoding='utf-8') as f:
+        content = f.read()
+    content = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]', '', content)
+    lines = content.strip().split('\n')
+    transcript_data = []
+    i = 0
+    while i < len(lines):
+        line = lines[i].strip()
+        if not line or line == 'WEBVTT' or line.startswith('NOTE'):
+            i += 1
+            continue
+        if line.isdigit():
+            i += 1
+            continue
+        if '-->' in line:
+            time_parts = line.split(' --> ')
+            if len(time_parts) == 2:
+                h, m, s = time_parts[0].split(':')
+                start_time = int(h) * 3600 + int(m) * 60 + float(s)
+                text_lines = []
+                i += 1
+                while i < len(lines) and lines[i].strip():
+                    clean_line = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]', '', lines[i].strip())
+                    if clean_line:
+                        text_lines.append(clean_line)
+                    i += 1
+                if text_lines:
+                    transcript_data.append({'start': start_time, 'text': ' '.join(text_lines)})
+            else:
+                i += 1
+        else:
+            i += 1
+    return transcript_data
+
+
+def measure(label, path, parse, runs):
+    size_mb = os.path.getsize(path) / 1024 / 1024
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        count = sum(1 for _ in parse(path))
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    for _ in parse(path):
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label:<22} {size_mb:>7.1f} {count:>8} {best * 1000:>9.1f} {size_mb / best:>8.1f} "
+          f"{count / best:>10.0f} {peak / 1024 / 1024:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='字幕解析吞吐基准')
+    parser.add_argument('--hours', type=float, default=10)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        srt_file = os.path.join(tmp, 'manual.en.srt')
+        vtt_file = os.path.join(tmp, 'auto.en.vtt')
+        write_srt_fixture(srt_file, args.hours)
+        write_vtt_fixture(vtt_file, args.hours)
+
+        print(f"{'parser':<22} {'MB':>7} {'cues':>8} {'ms':>9} {'MB/s':>8} {'cues/s':>10} {'peakMB':>8}")
+        measure('iter_srt (manual)', srt_file, iter_srt, args.runs)
+        measure('iter_vtt (auto)', vtt_file, iter_vtt, args.runs)
+        measure('legacy md (auto)', vtt_file, legacy_parse_vtt, args.runs)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,266 @@
+"""
+本地假媒体服务，用于离线测试 download_mp4 的分片并发、分块请求、重试和断点续传，
+以及不联网运行完整的 ytkit download（字幕和封面也由本服务提供）
+
+用法：
+    python benchmarks/fake_media.py --fragments 40 --fragment-kb 512 --latency 0.05 --error-rate 0.1
+
+提供两种格式：
+    /hls/index.m3u8 + /hls/seg{N}.ts   HLS 分片（m3u8_native，并发下载分片）
+    /video.mp4                          支持 Range 的直链（http_chunk_size 分块）
+    /subs/{lang}.json3|srt|vtt          add_captions 添加的字幕
+    /thumb/maxres.jpg                   封面
+脚本模式下分别用不同的分片并发数下载，并测试中断后从 .part 文件续传，输出 MB/s。
+"""
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.subtitles import format_timestamp  # noqa: E402
+
+VIDEO_ID = 'fakevideo01'
+SUBTITLE_FORMATS = ('json3', 'srt', 'vtt')
+
+
+class FakeMediaServer:
+    """可在进程内启动的假媒体服务；error_rate 比例的分片/直链请求返回 503"""
+
+    def __init__(self, host='127.0.0.1', port=0, fragments=20, fragment_size=256 * 1024, latency=0.0,
+                 error_rate=0.0, seed=0):
+        rng = random.Random(seed)
+        self.fragments = [rng.randbytes(fragment_size) for _ in range(fragments)]
+        self.video = b''.join(self.fragments)
+        self.fragment_duration = 4
+        self.thumbnail = rng.randbytes(64 * 1024)
+        # 语言 -> {'cues', 'automatic', 'json3', 'srt', 'vtt'}
+        self.captions = {}
+        self.caption_requests = 0
+        self.latency = latency
+        self.error_rate = error_rate
+        self.bytes_served = 0
+        self.requests = 0
+        self.errors = 0
+        # 直链在传输到该字节数后断开一次，用于测试断点续传
+        self.cut_after = None
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def playlist(self):
+        lines = ['#EXTM3U', '#EXT-X-VERSION:3', f'#EXT-X-TARGETDURATION:{self.fragment_duration}',
+                 '#EXT-X-MEDIA-SEQUENCE:0']
+        for i in range(len(self.fragments)):
+            lines += [f'#EXTINF:{self.fragment_duration}.0,', f'seg{i}.ts']
+        lines.append('#EXT-X-ENDLIST')
+        return '\n'.join(lines).encode()
+
+    def add_captions(self, lang, cues, automatic=False):
+        """添加一种语言的字幕，info() 中按 subtitles 或 automatic_captions 列出 json3、srt 和 vtt 三种格式"""
+        srt = ''.join(f'{i}\n{format_timestamp(c.start)} --> {format_timestamp(c.end)}\n{c.text}\n\n'
+                      for i, c in enumerate(cues, 1))
+        vtt = 'WEBVTT\n\n' + ''.join(
+            f"{format_timestamp(c.start, '.')} --> {format_timestamp(c.end, '.')}\n{c.text}\n\n" for c in cues)
+        json3 = json.dumps({'events': [
+            {'tStartMs': c.start, 'dDurationMs': c.end - c.start, 'segs': [{'utf8': c.text}]} for c in cues]})
+        self.captions[lang] = {'cues': cues, 'automatic': automatic, 'srt': srt.encode('utf-8'),
+                               'vtt': vtt.encode('utf-8'), 'json3': json3.encode('utf-8')}
+
+    def info(self, kind='hls'):
+        """yt-dlp 格式的视频元数据（只有一个符合 download_mp4 格式选择的 mp4 格式）"""
+        fmt = {
+            'format_id': kind, 'ext': 'mp4', 'vcodec': 'avc1.4d401f', 'acodec': 'mp4a.40.2',
+            'width': 1280, 'height': 720,
+        }
+        if kind == 'hls':
+            fmt.update(url=f'{self.base_url}/hls/index.m3u8', protocol='m3u8_native')
+        else:
+            fmt.update(url=f'{self.base_url}/video.mp4', protocol='https', filesize=len(self.video))
+        subtitles, automatic = {}, {}
+        for lang, track in self.captions.items():
+            target = automatic if track['automatic'] else subtitles
+            target[lang] = [{'ext': ext, 'url': f'{self.base_url}/subs/{lang}.{ext}'} for ext in SUBTITLE_FORMATS]
+        thumbnail = f'{self.base_url}/thumb/maxres.jpg'
+        return {
+            'id': VIDEO_ID, 'title': 'fake video', 'extractor': 'generic', 'extractor_key': 'Generic',
+            'webpage_url': f'https://www.youtube.com/watch?v={VIDEO_ID}', '_type': 'video',
+            'duration': len(self.fragments) * self.fragment_duration, 'formats': [fmt],
+            'subtitles': subtitles, 'automatic_captions': automatic,
+            'thumbnail': thumbnail, 'thumbnails': [{'id': 'maxres', 'url': thumbnail, 'width': 1280, 'height': 720}],
+        }
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, body, headers=None):
+                self.send_response(status)
+                self.send_header('Content-Length', str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                cut = len(body)
+                with server._lock:
+                    if server.cut_after is not None and status in (200, 206) and headers.get('Accept-Ranges'):
+                        cut = min(cut, server.cut_after)
+                        server.cut_after = None
+                try:
+                    self.wfile.write(body[:cut])
+                    with server._lock:
+                        server.bytes_served += cut
+                except OSError:
+                    pass
+                if cut < len(body):
+                    self.close_connection = True
+                    self.connection.close()
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                # 只对媒体数据注入错误，yt-dlp 不会重试清单请求
+                if not self.path.endswith('.m3u8') and random.random() < server.error_rate:
+                    with server._lock:
+                        server.errors += 1
+                    self._send(503, b'unavailable', {'Retry-After': '0'})
+                    return
+                if self.path == '/hls/index.m3u8':
+                    self._send(200, server.playlist(), {'Content-Type': 'application/vnd.apple.mpegurl'})
+                elif self.path.startswith('/hls/seg'):
+                    index = int(self.path[len('/hls/seg'):-len('.ts')])
+                    self._send(200, server.fragments[index], {'Content-Type': 'video/mp2t'})
+                elif self.path.startswith('/video.mp4'):
+                    self._send_range(server.video)
+                elif self.path.startswith('/subs/'):
+                    lang, _, ext = self.path[len('/subs/'):].rpartition('.')
+                    track = server.captions.get(lang)
+                    with server._lock:
+                        server.caption_requests += 1
+                    if track and ext in SUBTITLE_FORMATS:
+                        self._send(200, track[ext], {'Content-Type': 'text/plain; charset=utf-8'})
+                    else:
+                        self._send(404, b'not found', {})
+                elif self.path == '/thumb/maxres.jpg':
+                    self._send(200, server.thumbnail, {'Content-Type': 'image/jpeg', 'ETag': '"thumb"'})
+                else:
+                    self._send(404, b'not found', {})
+
+            def _send_range(self, data):
+                headers = {'Content-Type': 'video/mp4', 'Accept-Ranges': 'bytes'}
+                header = self.headers.get('Range')
+                if not header:
+                    self._send(200, data, headers)
+                    return
+                start, _, end = header.replace('bytes=', '').partition('-')
+                start = int(start)
+                end = min(int(end) if end else len(data) - 1, len(data) - 1)
+                headers['Content-Range'] = f'bytes {start}-{end}/{len(data)}'
+                self._send(206, data[start:end + 1], headers)
+
+        return Handler
+
+
+def prepare_project(root, server, kind, name):
+    """创建带 .youtube 和元数据缓存的项目目录"""
+    from tools.commands.download import info_file_path
+
+    project_dir = os.path.join(root, name)
+    os.makedirs(project_dir, exist_ok=True)
+    with open(os.path.join(project_dir, '.youtube'), 'w', encoding='utf-8') as f:
+        f.write(f'https://www.youtube.com/watch?v={VIDEO_ID}')
+    info = server.info(kind)
+    with open(info_file_path(project_dir), 'w', encoding='utf-8') as f:
+        json.dump(info, f)
+    return project_dir, info
+
+
+def run_download(server, root, kind, fragments):
+    from config import Config
+    from tools.commands.download import download_mp4
+
+    Config.DOWNLOAD_FRAGMENTS = fragments
+    project_dir, info = prepare_project(root, server, kind, f'{kind}-{fragments}')
+    mp4_file = os.path.join(project_dir, f'{VIDEO_ID}.mp4')
+    start = time.perf_counter()
+    status = download_mp4(info['webpage_url'], project_dir, info)
+    elapsed = time.perf_counter() - start
+    ok = os.path.exists(mp4_file) and hashlib.sha256(open(mp4_file, 'rb').read()).digest() == \
+        hashlib.sha256(server.video).digest()
+    return status, ok, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='假媒体服务下载测试')
+    parser.add_argument('--fragments', type=int, default=40)
+    parser.add_argument('--fragment-kb', type=int, default=512)
+    parser.add_argument('--latency', type=float, default=0.05, help='每个请求的响应延迟（秒）')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='返回 503 的请求比例')
+    parser.add_argument('--serve', action='store_true', help='只启动服务，不运行测试')
+    args = parser.parse_args()
+
+    server = FakeMediaServer(fragments=args.fragments, fragment_size=args.fragment_kb * 1024,
+                             latency=args.latency, error_rate=args.error_rate).start()
+    if args.serve:
+        print(f'fake media server listening on {server.base_url}')
+        print(json.dumps(server.info('hls'), indent=2))
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            return
+    size_mb = len(server.video) / 1024 / 1024
+    results = []
+    with tempfile.TemporaryDirectory() as root:
+        for fragments in (1, 4, 8):
+            status, ok, elapsed = run_download(server, root, 'hls', fragments)
+            results.append((f'hls x{fragments}', status, ok, elapsed))
+
+        # 直链：第一次传输到一半时断开，yt-dlp 重试时应从 .part 文件的末尾继续请求
+        server.cut_after = len(server.video) // 2
+        served_before = server.bytes_served
+        status, ok, elapsed = run_download(server, root, 'http', 1)
+        results.append(('http resume', status, ok, elapsed))
+        resumed_mb = (server.bytes_served - served_before) / 1024 / 1024
+
+    print(f"\n{'case':<12} {'status':<8} {'verified':<9} {'s':>7} {'MB/s':>8}")
+    for name, status, ok, elapsed in results:
+        print(f"{name:<12} {status or 'ok':<8} {str(ok):<9} {elapsed:>7.2f} {size_mb / elapsed:>8.2f}")
+    print(f"直链共传输 {resumed_mb:.1f}MB（文件 {size_mb:.1f}MB，续传时不应重复下载已完成的部分）")
+    print(f"请求 {server.requests} 次，注入错误 {server.errors} 次")
+    server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+"""
+本地假 OpenAI 兼容服务，用于离线测试 LLMAnalyzer 的并发、重试和结果重组
+
+用法：
+    python benchmarks/fake_openai.py --port 8765 --latency 0.5 --error-rate 0.1
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=fake ytkit x
+
+对 /v1/chat/completions 的每个请求，从 prompt 的“句子列表”中解析出句子，
+返回结构完整的 JSON 数组（支持 stream=True 的 SSE 分块输出）；
+可配置响应延迟、429/500 错误比例和格式错误元素比例。
+"""
+import re
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SENTENCE_RE = re.compile(r'^(\d+) (.+)$')
+
+
+def parse_prompt_sentences(prompt):
+    """从分析 prompt 中解析出 (id, sentence) 列表"""
+    _, _, tail = prompt.rpartition('句子列表：')
+    sentences = []
+    for line in tail.splitlines():
+        match = SENTENCE_RE.match(line.strip())
+        if match:
+            sentences.append(match.groups())
+    return sentences
+
+
+def fake_analysis(sentence_id, sentence):
+    """生成一条结构完整的假分析结果"""
+    words = [w.strip('.,!?"\'').lower() for w in sentence.split()]
+    long_words = [w for w in words if len(w) >= 8][:3]
+    return {
+        'id': sentence_id,
+        'sentence': sentence,
+        'explanation': f'（假数据）第 {sentence_id} 句的中文解释',
+        'syntax': '（假数据）主谓宾结构',
+        'vocabulary': {w: f'/{w}/, n., B2, （假数据）' for w in long_words},
+        'phrases': {},
+    }
+
+
+def fake_usage(prompt, content):
+    """按字符数粗略估算的 usage"""
+    return {
+        'prompt_tokens': len(prompt) // 4,
+        'completion_tokens': len(content) // 4,
+        'total_tokens': (len(prompt) + len(content)) // 4,
+    }
+
+
+class FakeOpenAIServer:
+    """可在进程内启动的假服务，便于基准脚本直接使用"""
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, error_rate=0.0, malformed_rate=0.0, chunk_size=16):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.chunk_size = chunk_size
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}/v1'
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status, payload, headers=None):
+                body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                request = json.loads(self.rfile.read(length) or b'{}')
+                with server._lock:
+                    server.requests += 1
+                if not self.path.endswith('/chat/completions'):
+                    self._send_json(404, {'error': {'message': 'not found'}})
+                    return
+                if server.latency:
+                    time.sleep(server.latency)
+                if random.random() < server.error_rate:
+                    with server._lock:
+                        server.errors += 1
+                    if random.random() < 0.5:
+                        self._send_json(429, {'error': {'message': 'rate limited', 'type': 'rate_limit'}},
+                                        headers={'Retry-After': '0.1'})
+                    else:
+                        self._send_json(500, {'error': {'message': 'internal error', 'type': 'server_error'}})
+                    return
+                prompt = request['messages'][-1]['content']
+                items = [fake_analysis(sid, text) for sid, text in parse_prompt_sentences(prompt)]
+                content = '[' + ', '.join(self._render(item) for item in items) + ']'
+                if request.get('stream'):
+                    self._send_stream(request, content)
+                    return
+                self._send_json(200, {
+                    'id': f'chatcmpl-fake-{server.requests}',
+                    'object': 'chat.completion',
+                    'created': int(time.time()),
+                    'model': request.get('model', 'fake'),
+                    'choices': [{
+                        'index': 0,
+                        'message': {'role': 'assistant', 'content': content},
+                        'finish_reason': 'stop',
+                    }],
+                    'usage': fake_usage(prompt, content),
+                })
+
+            @staticmethod
+            def _render(item):
+                text = json.dumps(item, ensure_ascii=False)
+                if random.random() < server.malformed_rate:
+                    # 破坏单个元素，但保持括号结构完整
+                    text = text.replace('"syntax": ', '"syntax": ???', 1)
+                return text
+
+            def _send_stream(self, request, content):
+                """以 SSE 分块返回，模拟逐 token 输出"""
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.end_headers()
+                base = {
+                    'id': f'chatcmpl-fake-{server.requests}',
+                    'object': 'chat.completion.chunk',
+                    'created': int(time.time()),
+                    'model': request.get('model', 'fake'),
+                }
+                for i in range(0, len(content), server.chunk_size):
+                    chunk = dict(base, choices=[{
+                        'index': 0, 'delta': {'content': content[i:i + server.chunk_size]}, 'finish_reason': None,
+                    }])
+                    self.wfile.write(f'data: {json.dumps(chunk, ensure_ascii=False)}\n\n'.encode('utf-8'))
+                done = dict(base, choices=[{'index': 0, 'delta': {}, 'finish_reason': 'stop'}])
+                self.wfile.write(f'data: {json.dumps(done)}\n\n'.encode('utf-8'))
+                if (request.get('stream_options') or {}).get('include_usage'):
+                    prompt = request['messages'][-1]['content']
+                    usage = dict(base, choices=[], usage=fake_usage(prompt, content))
+                    self.wfile.write(f'data: {json.dumps(usage)}\n\n'.encode('utf-8'))
+                self.wfile.write(b'data: [DONE]\n\n')
+                self.wfile.flush()
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本地假 OpenAI 兼容服务')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help='每个请求的响应延迟（秒）')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='返回 429/500 错误的比例')
+    parser.add_argument('--malformed-rate', type=float, default=0.0, help='单个结果元素格式错误的比例')
+    args = parser.parse_args()
+    server = FakeOpenAIServer(args.host, args.port, args.latency, args.error_rate, args.malformed_rate)
+    print(f'fake OpenAI server listening on {server.base_url}')
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
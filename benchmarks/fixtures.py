@@ -0,0 +1,146 @@
+"""
+基准测试用的合成字幕：人工字幕（带标点、SRT 为 CRLF + BOM）、自动字幕（无标点、滚动两行、逐词时间标签）
+和中文翻译字幕（切分粒度与英文不同）。
+
+用法：
+    python benchmarks/fixtures.py DIR [--sizes 10m 1h 10h]
+
+生成的文件按 (类型, 时长) 缓存在目录中，重复运行基准时不再重新生成。
+"""
+import os
+import sys
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.subtitles import Cue, format_timestamp, write_vtt  # noqa: E402
+
+WORDS = ('the', 'quick', 'brown', 'fox', 'jumps', 'over', 'lazy', 'dog', 'and', 'then',
+         'we', 'talk', 'about', 'something', 'completely', 'different', 'today')
+ZH_WORDS = ('我们', '今天', '讨论', '一个', '完全', '不同', '的', '问题', '然后', '看看', '这个', '例子')
+
+# 时长名 -> 小时数
+SIZES = {'10m': 1 / 6, '1h': 1.0, '3h': 3.0, '10h': 10.0}
+
+
+def manual_cues(hours, seed=3):
+    """人工字幕：句子带标点且跨越多条字幕，偶尔换行"""
+    rng = random.Random(seed)
+    cues, t, total = [], 0, int(hours * 3600 * 1000)
+    remaining = rng.randint(6, 25)
+    while t < total:
+        length = rng.randint(1500, 4500)
+        words = []
+        for _ in range(rng.randint(4, 12)):
+            word = rng.choice(WORDS)
+            remaining -= 1
+            if remaining <= 0:
+                word += rng.choice('..?!,')
+                remaining = rng.randint(6, 25)
+            words.append(word)
+        words[0] = words[0].capitalize()
+        if len(words) > 6 and rng.random() < 0.3:
+            words[len(words) // 2] = '\n' + words[len(words) // 2]
+        cues.append(Cue(t, t + length, ' '.join(words).replace(' \n', '\n')))
+        t += length + rng.randint(0, 300)
+    return cues
+
+
+def zh_cues(hours, seed=4):
+    """中文翻译字幕：约 4.5 秒一条，与英文字幕的边界不对齐"""
+    rng = random.Random(seed)
+    cues, t, total = [], rng.randint(0, 800), int(hours * 3600 * 1000)
+    while t < total:
+        length = max(500, int(rng.gauss(4500, 1100)))
+        cues.append(Cue(t, t + length, ''.join(rng.choice(ZH_WORDS) for _ in range(rng.randint(6, 16))) + '。'))
+        t += length + rng.randint(0, 800)
+    return cues
+
+
+def write_srt_fixture(path, hours, seed=1):
+    """人工字幕风格：CRLF、BOM、偶尔带 <i> 标签"""
+    rng = random.Random(seed)
+    t, index, total = 0, 1, int(hours * 3600 * 1000)
+    with open(path, 'w', encoding='utf-8-sig', newline='\r\n') as f:
+        while t < total:
+            length = rng.randint(1500, 4500)
+            text = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(4, 12)))
+            if rng.random() < 0.1:
+                text = f'<i>{text}</i>'
+            f.write(f'{index}\n{format_timestamp(t)} --> {format_timestamp(t + length)}\n{text}\n\n')
+            t += length + rng.randint(0, 300)
+            index += 1
+
+
+def write_vtt_fixture(path, hours, seed=2):
+    """自动字幕风格：cue settings、逐词时间标签、滚动的两行文本"""
+    rng = random.Random(seed)
+    t, total, previous = 0, int(hours * 3600 * 1000), ''
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('WEBVTT\nKind: captions\nLanguage: en\n\n')
+        while t < total:
+            length = rng.randint(1500, 3500)
+            words = [rng.choice(WORDS) for _ in range(rng.randint(3, 8))]
+            step = length // (len(words) + 1)
+            tagged = words[0] + ''.join(
+                f'<{format_timestamp(t + step * (i + 1), ".")}><c> {w}</c>' for i, w in enumerate(words[1:])
+            )
+            f.write(f"{format_timestamp(t, '.')} --> {format_timestamp(t + length, '.')} align:start position:0%\n"
+                    f"{previous}\n{tagged}\n\n")
+            previous = ' '.join(words)
+            t += length
+            # 偶尔插入音乐提示和较长停顿
+            if rng.random() < 0.02:
+                f.write(f"{format_timestamp(t, '.')} --> {format_timestamp(t + 2000, '.')}\n[Music]\n\n")
+                t += 2000 + rng.randint(1500, 4000)
+
+
+def write_cues_srt(path, cues):
+    """按 SRT 写出 Cue 序列（CRLF + BOM，模拟从网页下载的人工字幕）"""
+    with open(path, 'w', encoding='utf-8-sig', newline='\r\n') as f:
+        for index, cue in enumerate(cues, 1):
+            f.write(f'{index}\n{format_timestamp(cue.start)} --> {format_timestamp(cue.end)}\n{cue.text}\n\n')
+
+
+# 类型 -> 生成函数 (path, hours)
+KINDS = {
+    'manual.vtt': lambda path, hours: write_vtt(manual_cues(hours), path),
+    'manual.srt': lambda path, hours: write_cues_srt(path, manual_cues(hours)),
+    'auto.vtt': write_vtt_fixture,
+    'plain.srt': write_srt_fixture,
+    'zh.srt': lambda path, hours: write_cues_srt(path, zh_cues(hours)),
+}
+
+
+class FixtureCache:
+    """在目录中按需生成并复用字幕文件"""
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, kind, size):
+        name, ext = kind.rsplit('.', 1)
+        path = os.path.join(self.root, f'{name}-{size}.{ext}')
+        if not os.path.exists(path):
+            tmp_path = f'{path}.tmp'
+            KINDS[kind](tmp_path, SIZES[size])
+            os.replace(tmp_path, path)
+        return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成基准测试字幕')
+    parser.add_argument('root')
+    parser.add_argument('--sizes', nargs='+', default=['10m', '1h', '10h'], choices=sorted(SIZES))
+    args = parser.parse_args()
+    cache = FixtureCache(args.root)
+    for size in args.sizes:
+        for kind in KINDS:
+            path = cache.path(kind, size)
+            print(f'{path}  {os.path.getsize(path) / 1024 / 1024:.1f} MB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+LLM提供商基准：用同一组句子对比不同提供商的吞吐量和延迟
+
+用法：
+    python benchmarks/llm_providers.py --providers openai,local --sentences 100 --concurrency 8
+    python benchmarks/llm_providers.py --fake --providers local     # 使用本地假服务
+
+不使用缓存和分析日志，每个提供商都完整请求一遍。
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+SAMPLE = [
+    "So today I want to talk about something that I've been thinking about for a really long time.",
+    "It turns out that most of the things we worry about never actually happen.",
+    "If you'd asked me five years ago, I would have said there's no way I'd end up here.",
+    "Honestly, I had no idea what I was getting myself into.",
+    "The thing is, you can't really plan for every single outcome.",
+]
+
+
+def make_sentences(count):
+    return [
+        {'id': f'{i + 1:03d}', 'timestamp': '00:00', 'sentence': SAMPLE[i % len(SAMPLE)] + f' ({i + 1})'}
+        for i in range(count)
+    ]
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+
+def bench_provider(name, sentences, args):
+    from tools.llm_analyzer import LLMAnalyzer
+
+    analyzer = LLMAnalyzer(batch_size=args.batch_size, max_in_flight=args.concurrency,
+                           use_cache=False, stream=not args.no_stream, provider=name)
+    latencies = []
+    request = analyzer._request
+
+    def timed_request(*a, **kw):
+        start = time.perf_counter()
+        try:
+            return request(*a, **kw)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    analyzer._request = timed_request
+    start = time.perf_counter()
+    results = analyzer.analyze_sentences(sentences) or []
+    elapsed = time.perf_counter() - start
+    return {
+        'provider': name,
+        'model': analyzer.model,
+        'ok': len(results),
+        'requests': len(latencies),
+        'elapsed': elapsed,
+        'throughput': len(results) / elapsed if elapsed else 0.0,
+        'p50': statistics.median(latencies) if latencies else 0.0,
+        'p95': percentile(latencies, 0.95) if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='LLM 提供商吞吐量/延迟对比')
+    parser.add_argument('--providers', default='openai', help='逗号分隔的提供商列表')
+    parser.add_argument('--sentences', type=int, default=50)
+    parser.add_argument('--batch-size', type=int, default=10)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--no-stream', action='store_true')
+    parser.add_argument('--fake', action='store_true', help='把 local 提供商指向进程内假服务')
+    parser.add_argument('--fake-latency', type=float, default=0.2)
+    args = parser.parse_args()
+
+    from config import Config
+
+    fake = None
+    if args.fake:
+        from fake_openai import FakeOpenAIServer
+        fake = FakeOpenAIServer(latency=args.fake_latency).start()
+        Config.LOCAL_BASE_URL = fake.base_url
+
+    sentences = make_sentences(args.sentences)
+    rows = []
+    try:
+        for name in args.providers.split(','):
+            rows.append(bench_provider(name.strip(), sentences, args))
+    finally:
+        if fake:
+            fake.stop()
+
+    print(f"\n{'provider':10s} {'model':20s} {'ok':>5s} {'req':>5s} {'total(s)':>9s} {'sent/s':>8s} {'p50(s)':>7s} {'p95(s)':>7s}")
+    for row in rows:
+        print(f"{row['provider']:10s} {row['model'][:20]:20s} {row['ok']:5d} {row['requests']:5d} "
+              f"{row['elapsed']:9.2f} {row['throughput']:8.2f} {row['p50']:7.2f} {row['p95']:7.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+启动耗时基准：基于 python -X importtime 检查 `ytkit --help` 和 `ytkit init` 的导入开销
+
+用法：
+    python benchmarks/startup.py [--budget-ms 200] [--runs 5]
+
+超出预算或导入了重量级依赖时以非零状态退出。
+"""
+import os
+import re
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(ROOT, 'main.py')
+
+# 这些命令不应加载的重量级依赖
+HEAVY_MODULES = ('yt_dlp', 'openai', 'httpx', 'requests')
+
+# 解释器自身启动阶段的导入，不计入预算
+INTERPRETER_MODULES = {'site', 'encodings', 'zipimport', '_frozen_importlib_external', 'codecs', 'io', 'abc'}
+
+IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)')
+
+
+def parse_importtime(stderr):
+    """解析 importtime 输出，返回 (顶层导入累计耗时ms, 已导入模块集合)"""
+    total_us = 0
+    modules = set()
+    for line in stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        _, cumulative, indent, name = match.groups()
+        modules.add(name)
+        # 缩进为1个空格的是顶层导入
+        if len(indent) == 1 and name.split('.')[0] not in INTERPRETER_MODULES:
+            total_us += int(cumulative)
+    return total_us / 1000, modules
+
+
+def measure(args, runs):
+    """多次运行命令，返回 (导入耗时中位数ms, 墙钟耗时中位数ms, 已导入模块)"""
+    import_ms, wall_ms = [], []
+    modules = set()
+    for _ in range(runs):
+        start = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', MAIN] + args,
+            cwd=ROOT, capture_output=True, text=True,
+        )
+        wall_ms.append((time.perf_counter() - start) * 1000)
+        if proc.returncode != 0:
+            raise RuntimeError(f"命令执行失败: {' '.join(args)}\n{proc.stderr[-2000:]}")
+        ms, modules = parse_importtime(proc.stderr)
+        import_ms.append(ms)
+    return statistics.median(import_ms), statistics.median(wall_ms), modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ytkit 启动耗时基准')
+    parser.add_argument('--budget-ms', type=float, default=200.0, help='顶层导入耗时预算（毫秒）')
+    parser.add_argument('--runs', type=int, default=5, help='每个命令的运行次数（取中位数）')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cases = {
+            '--help': ['--help'],
+            'init': ['--original-dir', tmp, 'init', 'https://www.youtube.com/watch?v=dQw4w9WgXcQ'],
+        }
+        failed = False
+        for name, cmd in cases.items():
+            import_ms, wall_ms, modules = measure(cmd, args.runs)
+            heavy = sorted(m for m in HEAVY_MODULES if m in modules)
+            ok = import_ms <= args.budget_ms and not heavy
+            failed = failed or not ok
+            status = 'OK  ' if ok else 'FAIL'
+            print(f"{status} {name:8s} import {import_ms:7.1f}ms  wall {wall_ms:7.1f}ms  budget {args.budget_ms:.0f}ms")
+            if heavy:
+                print(f"     不应导入的模块: {', '.join(heavy)}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
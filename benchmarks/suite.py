@@ -0,0 +1,334 @@
+"""
+离线基准套件：在合成字幕、假媒体服务和假 OpenAI 服务上测量各热点路径的耗时、吞吐量和峰值内存，
+与保存的基线比较并标出退化。
+
+用法：
+    python benchmarks/suite.py                       # 运行并与 benchmarks/baseline.json 比较
+    python benchmarks/suite.py --update-baseline     # 运行并把结果保存为新基线（同 --save）
+    python benchmarks/suite.py --sizes 10m 1h 10h --only parse_vtt --runs 5
+    python benchmarks/suite.py --llm-latency 0.5     # 端到端 ytkit x 使用的假 LLM 响应延迟
+
+用例：
+    parse_vtt/{manual,auto}/SIZE   MdCommand.parse_vtt_file
+    merge_segments/{manual,auto}/SIZE   MdCommand.merge_segments
+    preprocess/{manual,auto}/SIZE  MdCommand.generate_preprocessed_md（含超过 200 段时的均衡合并）
+    bilingual/SIZE                 merge_subtitles（中英文字幕对齐合并）
+    preprocessed_parse/SIZE        PreprocessedFileParser.parse_preprocessed_file
+    e2e/download                   DownloadCommand.run（视频、字幕、VTT、封面全部由假服务提供）
+    e2e/x                          ytkit x（预处理 + 假 LLM 分析，不使用缓存）
+
+每个用例先预热运行一次（导入模块、生成字幕），再用 tracemalloc 单独运行一次测量峰值内存，
+耗时取之后多次运行的最小值。这样单独运行某个用例（--only）和运行整个套件时的结果可以互相比较。
+耗时或峰值内存超过基线的比例大于阈值时标记为退化，并以非零状态退出；
+任何用例运行出错时（无论是否有基线）同样以非零状态退出。
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import platform
+import argparse
+import tempfile
+import contextlib
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+# 绝对差值低于该值（秒）的耗时变化视为噪声
+MIN_TIME_DELTA = 0.01
+# 端到端用例经过本地 socket 和多个线程，同一台机器上多次运行的耗时相差可达 25%，使用更宽的耗时阈值
+E2E_TIME_THRESHOLD = 0.3
+# 绝对差值低于该值（MB）的峰值内存变化视为噪声（并发下载时缓冲区的峰值随线程调度波动约半 MB）
+MIN_MEM_DELTA = 0.5
+
+
+class Context:
+    """套件运行期间共享的字幕缓存、临时目录和假服务"""
+
+    def __init__(self, root, fixtures_dir=None):
+        from fixtures import FixtureCache
+
+        self.root = root
+        self.fixtures = FixtureCache(fixtures_dir or os.path.join(root, 'fixtures'))
+        self._counter = 0
+
+    def new_dir(self, name):
+        self._counter += 1
+        path = os.path.join(self.root, 'work', f'{name}-{self._counter}')
+        os.makedirs(path)
+        return path
+
+
+@contextlib.contextmanager
+def quiet():
+    """屏蔽命令输出（click.echo 和 yt-dlp 都写 stdout）"""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+        yield
+
+
+# ---- 用例：每个工厂返回 (func, 单位)，func 执行一次并返回处理的单位数 ----
+
+def case_parse_vtt(ctx, style, size):
+    from tools.commands.md import MdCommand
+
+    path = ctx.fixtures.path(f'{style}.vtt', size)
+    return lambda: len(MdCommand.parse_vtt_file(path)), 'cues'
+
+
+def case_merge_segments(ctx, style, size):
+    from tools.commands.md import MdCommand
+
+    with quiet():
+        data = MdCommand.parse_vtt_file(ctx.fixtures.path(f'{style}.vtt', size))
+
+    def run():
+        MdCommand.merge_segments([dict(item) for item in data])
+        return len(data)
+    return run, 'cues'
+
+
+def case_preprocess(ctx, style, size):
+    from tools.commands.md import MdCommand
+
+    with quiet():
+        data = MdCommand.parse_vtt_file(ctx.fixtures.path(f'{style}.vtt', size))
+    output = os.path.join(ctx.new_dir('preprocess'), 'out.preprocessed.md')
+
+    def run():
+        MdCommand.generate_preprocessed_md([dict(item) for item in data], output)
+        return len(data)
+    return run, 'cues'
+
+
+def case_bilingual(ctx, size):
+    from tools.artifacts import BUILD_FILE
+    from tools.commands.download import merge_subtitles
+    from tools.subtitles import iter_srt
+
+    project_dir = ctx.new_dir('bilingual')
+    en_file = os.path.join(project_dir, 'bench.en.srt')
+    shutil.copy(ctx.fixtures.path('manual.srt', size), en_file)
+    shutil.copy(ctx.fixtures.path('zh.srt', size), os.path.join(project_dir, 'bench.zh-Hans.srt'))
+    count = sum(1 for _ in iter_srt(en_file))
+
+    def run():
+        # 合并结果带指纹，每次运行前删除以强制重新生成
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(os.path.join(project_dir, BUILD_FILE))
+        merge_subtitles(project_dir, 'bench')
+        return count
+    return run, 'cues'
+
+
+def case_preprocessed_parse(ctx, size):
+    from tools.commands.md import MdCommand
+    from tools.llm_analyzer import PreprocessedFileParser
+
+    path = os.path.join(ctx.new_dir('preprocessed'), 'bench.preprocessed.md')
+    with quiet():
+        data = MdCommand.parse_vtt_file(ctx.fixtures.path('manual.vtt', size))
+        # 不限制段数，得到与字幕时长成正比的句子数
+        MdCommand.generate_preprocessed_md(data, path, max_segments=len(data))
+    return lambda: len(PreprocessedFileParser.parse_preprocessed_file(path)), 'sentences'
+
+
+def case_e2e_download(ctx):
+    from fake_media import FakeMediaServer, prepare_project
+    from fixtures import manual_cues, zh_cues
+    from tools.commands.download import DownloadCommand
+
+    server = FakeMediaServer(fragments=40, fragment_size=256 * 1024).start()
+    server.add_captions('en', manual_cues(0.5))
+    server.add_captions('zh-Hans', zh_cues(0.5), automatic=True)
+
+    def run():
+        project_dir, _ = prepare_project(ctx.new_dir('download'), server, 'hls', 'project')
+        result = DownloadCommand.run(project_dir)
+        if result['status'] != 'ok':
+            raise RuntimeError(f"下载失败: {result}")
+        return len(server.video)
+    return run, 'bytes'
+
+
+def case_e2e_x(ctx):
+    from fake_media import VIDEO_ID
+    from tools.commands.x import XCommand
+
+    vtt_file = ctx.fixtures.path('manual.vtt', '1h')
+
+    def run():
+        project_dir = ctx.new_dir('x')
+        with open(os.path.join(project_dir, '.youtube'), 'w', encoding='utf-8') as f:
+            f.write(f'https://www.youtube.com/watch?v={VIDEO_ID}')
+        shutil.copy(vtt_file, os.path.join(project_dir, f'{VIDEO_ID}.en.vtt'))
+        XCommand.x.main(['--no-cache', '--no-vocab-filter'], obj={'original_dir': project_dir},
+                        standalone_mode=False)
+        with open(os.path.join(project_dir, f'{VIDEO_ID}.analyzed.json'), encoding='utf-8') as f:
+            return len(json.load(f))
+    return run, 'sentences'
+
+
+def build_cases(sizes):
+    """用例名 -> 工厂函数 (ctx) -> (func, 单位)"""
+    cases = {}
+    for size in sizes:
+        for style in ('manual', 'auto'):
+            cases[f'parse_vtt/{style}/{size}'] = lambda ctx, s=style, z=size: case_parse_vtt(ctx, s, z)
+            cases[f'merge_segments/{style}/{size}'] = lambda ctx, s=style, z=size: case_merge_segments(ctx, s, z)
+            cases[f'preprocess/{style}/{size}'] = lambda ctx, s=style, z=size: case_preprocess(ctx, s, z)
+        cases[f'bilingual/{size}'] = lambda ctx, z=size: case_bilingual(ctx, z)
+        cases[f'preprocessed_parse/{size}'] = lambda ctx, z=size: case_preprocessed_parse(ctx, z)
+    cases['e2e/download'] = case_e2e_download
+    cases['e2e/x'] = case_e2e_x
+    return cases
+
+
+def measure(func, runs):
+    """返回 (最短耗时, 单位数, tracemalloc 峰值字节数)"""
+    best = float('inf')
+    with quiet():
+        # 预热：首次运行的模块导入不计入峰值内存
+        func()
+        tracemalloc.start()
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        for _ in range(runs):
+            start = time.perf_counter()
+            units = func()
+            best = min(best, time.perf_counter() - start)
+    return best, units, peak
+
+
+def compare(name, current, baseline, time_threshold, mem_threshold):
+    """返回 (耗时变化, 内存变化, 是否退化)；变化为相对基线的比例，没有基线时为 None"""
+    base = (baseline or {}).get(name)
+    if not base:
+        return None, None, False
+    time_delta = current['seconds'] / base['seconds'] - 1 if base['seconds'] else 0.0
+    mem_delta = current['peak_mb'] / base['peak_mb'] - 1 if base['peak_mb'] else 0.0
+    if name.startswith('e2e/'):
+        time_threshold = max(time_threshold, E2E_TIME_THRESHOLD)
+    slower = time_delta > time_threshold and current['seconds'] - base['seconds'] > MIN_TIME_DELTA
+    heavier = mem_delta > mem_threshold and current['peak_mb'] - base['peak_mb'] > MIN_MEM_DELTA
+    return time_delta, mem_delta, slower or heavier
+
+
+def format_rate(units, seconds, unit):
+    if unit == 'bytes':
+        return f'{units / seconds / 1024 / 1024:.1f} MB/s'
+    return f'{units / seconds:,.0f} {unit}/s'
+
+
+def format_delta(delta):
+    return '' if delta is None else f'{delta * 100:+.1f}%'
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return None, None
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return data.get('meta', {}), data.get('results', {})
+
+
+def host_meta():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+
+
+def main():
+    from fixtures import SIZES
+
+    parser = argparse.ArgumentParser(description='离线基准套件')
+    parser.add_argument('--sizes', nargs='+', default=['10m', '1h'], choices=sorted(SIZES), help='字幕时长')
+    parser.add_argument('--only', nargs='+', default=None, help='只运行名称包含这些字符串的用例')
+    parser.add_argument('--runs', type=int, default=3, help='每个用例的计时次数（取最小值）')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='基线文件')
+    parser.add_argument('--save', '--update-baseline', action='store_true', help='把本次结果保存为基线')
+    parser.add_argument('--output', default=None, help='本次结果另存为 JSON')
+    parser.add_argument('--threshold', type=float, default=0.15, help='耗时退化阈值（比例）')
+    parser.add_argument('--mem-threshold', type=float, default=0.10, help='峰值内存退化阈值（比例）')
+    parser.add_argument('--llm-latency', type=float, default=0.2, help='假 LLM 服务每个请求的延迟（秒）')
+    parser.add_argument('--fixtures', default=None, help='字幕缓存目录（默认使用临时目录）')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # 配置在导入时读取环境变量，先启动假 LLM 服务并指向临时缓存目录
+        from fake_openai import FakeOpenAIServer
+        llm = FakeOpenAIServer(latency=args.llm_latency).start()
+        os.environ.update({
+            'YTKIT_CACHE_DIR': os.path.join(tmp, 'cache'),
+            'YTKIT_LLM_PROVIDER': 'openai',
+            'OPENAI_API_KEY': 'fake',
+            'OPENAI_BASE_URL': llm.base_url,
+        })
+        logging.disable(logging.INFO)
+
+        ctx = Context(tmp, args.fixtures)
+        cases = build_cases(args.sizes)
+        if args.only:
+            cases = {name: factory for name, factory in cases.items() if any(s in name for s in args.only)}
+
+        meta, baseline = load_baseline(args.baseline)
+        if baseline and meta.get('platform') != platform.platform():
+            print(f"⚠️ 基线来自不同的环境（{meta.get('platform')}），比较结果仅供参考")
+
+        results, regressions, errors = {}, [], []
+        print(f"{'case':<30} {'s':>8} {'rate':>18} {'peakMB':>8} {'Δtime':>8} {'Δmem':>8}")
+        for name, factory in cases.items():
+            try:
+                func, unit = factory(ctx)
+                seconds, units, peak = measure(func, args.runs)
+            except Exception as e:
+                print(f"{name:<30} ❌ {e.__class__.__name__}: {e}")
+                errors.append(name)
+                continue
+            results[name] = {'seconds': round(seconds, 6), 'units': units, 'unit': unit,
+                             'peak_mb': round(peak / 1024 / 1024, 3)}
+            time_delta, mem_delta, regressed = compare(name, results[name], baseline, args.threshold,
+                                                       args.mem_threshold)
+            if regressed:
+                regressions.append(name)
+            print(f"{name:<30} {seconds:>8.3f} {format_rate(units, seconds, unit):>18} "
+                  f"{results[name]['peak_mb']:>8.2f} {format_delta(time_delta):>8} {format_delta(mem_delta):>8}"
+                  f"{'  ⚠️ 退化' if regressed else ''}")
+        llm.stop()
+
+    payload = {'meta': host_meta(), 'results': results}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, indent=2, ensure_ascii=False)
+    if args.save:
+        if baseline:
+            # 只更新本次运行的用例，保留其余用例的基线
+            payload['results'] = {**baseline, **results}
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, indent=2, ensure_ascii=False)
+        print(f"💾 基线已保存: {args.baseline}")
+    elif baseline is None:
+        print(f"💡 没有基线文件 {args.baseline}，使用 --update-baseline 保存本次结果")
+    elif regressions:
+        print(f"❌ {len(regressions)} 个用例退化: {', '.join(regressions)}")
+    elif not errors:
+        print("✅ 没有发现退化")
+    if errors:
+        # 出错的用例没有结果可比较，也不会写入基线
+        print(f"❌ {len(errors)} 个用例运行出错: {', '.join(errors)}")
+    if errors or (regressions and not args.save):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -9,38 +9,107 @@ class Config:
     """配置管理类"""
     
     # LLM 提供商配置
-    LLM_PROVIDER = os.getenv('YTKIT_LLM_PROVIDER', 'openai')  # 'openai' 或 'deepseek'
+    LLM_PROVIDER = os.getenv('YTKIT_LLM_PROVIDER', 'openai')  # 'openai'、'deepseek' 或 'local'
     
     # OpenAI 配置
     OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
     OPENAI_MODEL = os.getenv('YTKIT_OPENAI_MODEL', 'gpt-4o-mini')
+    OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL')  # 可指向本地 OpenAI 兼容服务
     
     # DeepSeek 配置
     DEEPSEEK_API_KEY = os.getenv('DEEPSEEK_API_KEY')
     DEEPSEEK_MODEL = os.getenv('YTKIT_DEEPSEEK_MODEL', 'deepseek-chat')
+    DEEPSEEK_BASE_URL = os.getenv('YTKIT_DEEPSEEK_BASE_URL', 'https://api.deepseek.com')
+    
+    # 本地 OpenAI 兼容服务配置（如 vLLM、Ollama、llama.cpp server）
+    LOCAL_API_KEY = os.getenv('YTKIT_LOCAL_API_KEY', 'local')
+    LOCAL_MODEL = os.getenv('YTKIT_LOCAL_MODEL', 'local-model')
+    LOCAL_BASE_URL = os.getenv('YTKIT_LOCAL_BASE_URL', 'http://127.0.0.1:8000/v1')
+    
+    # LLM HTTP 连接配置
+    LLM_TIMEOUT = float(os.getenv('YTKIT_LLM_TIMEOUT', '120'))  # 单次请求超时（秒）
+    LLM_CONNECT_TIMEOUT = float(os.getenv('YTKIT_LLM_CONNECT_TIMEOUT', '10'))  # 建立连接超时（秒）
+    LLM_MAX_CONNECTIONS = int(os.getenv('YTKIT_LLM_MAX_CONNECTIONS', '16'))  # 每个提供商的连接池上限
+    
+    # LLM 分析配置
+    LLM_BATCH_SIZE = int(os.getenv('YTKIT_LLM_BATCH_SIZE', '20'))  # 每次请求的最大句子数
+    LLM_INPUT_BUDGET = int(os.getenv('YTKIT_LLM_INPUT_BUDGET', '6000'))  # 每次请求的输入 token 预算（含固定 prompt）
+    LLM_OUTPUT_BUDGET = int(os.getenv('YTKIT_LLM_OUTPUT_BUDGET', '8000'))  # 每次请求的输出 token 预算（max_tokens）
+    LLM_CONCURRENCY = int(os.getenv('YTKIT_LLM_CONCURRENCY', '4'))  # 同时进行的请求数
+    LLM_MAX_RETRIES = int(os.getenv('YTKIT_LLM_MAX_RETRIES', '5'))  # 限流/5xx 错误的最大重试次数
+    LLM_STREAM = os.getenv('YTKIT_LLM_STREAM', '1') != '0'  # 流式接收并逐个解析分析结果
+    LLM_REPAIR_ROUNDS = int(os.getenv('YTKIT_LLM_REPAIR_ROUNDS', '2'))  # 缺失或格式错误的句子重新请求的轮数
+    LLM_CACHE_MAX_BYTES = int(os.getenv('YTKIT_LLM_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))  # 分析缓存容量上限
+    VOCAB_FILTER = os.getenv('YTKIT_VOCAB_FILTER', '1') != '0'  # 不再讲解词汇库中已学过的词汇和短语
+    
+    # 常驻进程：ytkit serve 运行时 init/download/md/x 转发给它执行，设为 0 时总在本进程执行
+    DAEMON_FORWARD = os.getenv('YTKIT_DAEMON', '1') != '0'
+    
+    # 持久化任务队列（ytkit queue / ytkit worker）
+    QUEUE_DB = os.getenv('YTKIT_QUEUE_DB')  # 队列文件，默认 CACHE_DIR/queue.sqlite3；多台机器共用时指向共享目录
+    QUEUE_WAL = os.getenv('YTKIT_QUEUE_WAL', '1') != '0'  # 队列文件放在网络文件系统上时设为 0（WAL 只支持单机）
+    QUEUE_LEASE = float(os.getenv('YTKIT_QUEUE_LEASE', '300'))  # 租约时长（秒），worker 每 1/3 租约续租一次
+    QUEUE_MAX_ATTEMPTS = int(os.getenv('YTKIT_QUEUE_MAX_ATTEMPTS', '5'))  # 每个阶段的最大尝试次数，超过后转入死信
+    QUEUE_RETRY_DELAY = float(os.getenv('YTKIT_QUEUE_RETRY_DELAY', '30'))  # 首次重试间隔（秒），之后每次翻倍
+    
+    # 本地缓存目录
+    CACHE_DIR = os.path.expanduser(os.getenv('YTKIT_CACHE_DIR', '~/.cache/ytkit'))
+    
+    # 下载配置
+    INFO_TTL = int(os.getenv('YTKIT_INFO_TTL', '21600'))  # 元数据缓存有效期（秒），播放地址约6小时过期
+    DOWNLOAD_CONCURRENCY = int(os.getenv('YTKIT_DOWNLOAD_CONCURRENCY', '4'))  # 单个视频的并发下载任务数
+    DOWNLOAD_FRAGMENTS = int(os.getenv('YTKIT_DOWNLOAD_FRAGMENTS', '4'))  # HLS/DASH 分片的并发下载数
+    DOWNLOAD_CHUNK_SIZE = int(os.getenv('YTKIT_DOWNLOAD_CHUNK_SIZE', str(10 * 1024 * 1024)))  # 直链分块请求大小，0 为不分块
+    DOWNLOAD_RETRIES = int(os.getenv('YTKIT_DOWNLOAD_RETRIES', '10'))  # 整体和单个分片的重试次数
+    COVER_RESOLUTION = os.getenv('YTKIT_COVER_RESOLUTION', '1280x720')  # 封面最小分辨率，选满足该分辨率的最小缩略图
+    
+    # HTTP 连接池（封面、字幕等小文件请求共享）
+    HTTP_POOL_SIZE = int(os.getenv('YTKIT_HTTP_POOL_SIZE', '16'))  # 每个主机的最大连接数
+    HTTP_TIMEOUT = float(os.getenv('YTKIT_HTTP_TIMEOUT', '30'))  # 单次请求超时（秒）
     
     @classmethod
-    def get_llm_config(cls) -> dict:
-        """获取当前 LLM 配置"""
-        if cls.LLM_PROVIDER == 'openai':
+    def get_llm_config(cls, provider: Optional[str] = None) -> dict:
+        """获取 LLM 配置，默认使用 LLM_PROVIDER 指定的提供商"""
+        provider = provider or cls.LLM_PROVIDER
+        connection = {
+            'timeout': cls.LLM_TIMEOUT,
+            'connect_timeout': cls.LLM_CONNECT_TIMEOUT,
+            'max_connections': cls.LLM_MAX_CONNECTIONS,
+        }
+        if provider == 'openai':
             return {
                 'provider': 'openai',
                 'api_key': cls.OPENAI_API_KEY,
-                'model': cls.OPENAI_MODEL
+                'api_key_env': 'OPENAI_API_KEY',
+                'model': cls.OPENAI_MODEL,
+                'base_url': cls.OPENAI_BASE_URL,
+                **connection
             }
-        elif cls.LLM_PROVIDER == 'deepseek':
+        elif provider == 'deepseek':
             return {
                 'provider': 'deepseek',
                 'api_key': cls.DEEPSEEK_API_KEY,
-                'model': cls.DEEPSEEK_MODEL
+                'api_key_env': 'DEEPSEEK_API_KEY',
+                'model': cls.DEEPSEEK_MODEL,
+                'base_url': cls.DEEPSEEK_BASE_URL,
+                **connection
+            }
+        elif provider == 'local':
+            return {
+                'provider': 'local',
+                'api_key': cls.LOCAL_API_KEY,
+                'api_key_env': 'YTKIT_LOCAL_API_KEY',
+                'model': cls.LOCAL_MODEL,
+                'base_url': cls.LOCAL_BASE_URL,
+                **connection
             }
         else:
-            raise ValueError(f"不支持的 LLM 提供商: {cls.LLM_PROVIDER}")
+            raise ValueError(f"不支持的 LLM 提供商: {provider}")
     
     @classmethod
-    def validate_config(cls) -> bool:
+    def validate_config(cls, provider: Optional[str] = None) -> bool:
         """验证配置是否完整"""
-        config = cls.get_llm_config()
+        config = cls.get_llm_config(provider)
         if not config['api_key']:
             return False
         return True 
\ No newline at end of file
@@ -1,9 +1,11 @@
 """
 YouTube工具集 - 主入口
 """
+import os
+import sys
 import click
+import importlib
 import logging
-from tools.commands import InitCommand, DownloadCommand, XCommand
 
 # 配置logging
 logging.basicConfig(
@@ -12,19 +14,91 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@click.group()
+
+class LazyGroup(click.Group):
+    """按需加载子命令的命令组，只有被调用（或列出帮助）时才导入对应模块"""
+
+    def __init__(self, *args, lazy_commands=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # 命令名 -> "模块路径:类名.属性"
+        self.lazy_commands = lazy_commands or {}
+
+    def list_commands(self, ctx):
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_commands))
+
+    def get_command(self, ctx, cmd_name):
+        if cmd_name in self.lazy_commands and cmd_name not in self.commands:
+            self.add_command(self._load(cmd_name), cmd_name)
+        return super().get_command(ctx, cmd_name)
+
+    def _load(self, cmd_name):
+        module_path, attr_path = self.lazy_commands[cmd_name].split(':')
+        obj = importlib.import_module(module_path)
+        for attr in attr_path.split('.'):
+            obj = getattr(obj, attr)
+        return obj
+
+
+# 注册命令
+COMMANDS = {
+    'init': 'tools.commands.init:InitCommand.init',
+    'download': 'tools.commands.download:DownloadCommand.download',
+    'md': 'tools.commands.md:MdCommand.md',
+    'x': 'tools.commands.x:XCommand.x',
+    'cache': 'tools.commands.cache:CacheCommand.cache',
+    'index': 'tools.commands.index:IndexCommand.index',
+    'search': 'tools.commands.index:IndexCommand.search',
+    'vocab': 'tools.commands.vocab:VocabCommand.vocab',
+    'serve': 'tools.commands.serve:ServeCommand.serve',
+    'queue': 'tools.commands.queue:QueueCommand.queue',
+    'worker': 'tools.commands.worker:WorkerCommand.worker',
+}
+
+
+@click.group(cls=LazyGroup, lazy_commands=COMMANDS)
 @click.version_option(version="0.1.0", prog_name="ytkit")
 @click.option('--original-dir', hidden=True, help='原始工作目录')
+@click.option('--profile', 'profile_path', default=None, metavar='PATH',
+              help='记录各阶段耗时，输出 Chrome trace JSON（chrome://tracing 或 Perfetto 打开）')
+@click.option('--metrics', 'metrics_path', default=None, metavar='PATH', envvar='YTKIT_METRICS_FILE',
+              help='输出 Prometheus textfile 指标（node_exporter textfile collector）')
 @click.pass_context
-def main(ctx, original_dir):
+def main(ctx, original_dir, profile_path, metrics_path):
     """YouTube工具集"""
     ctx.ensure_object(dict)
     ctx.obj['original_dir'] = original_dir
+    if profile_path or metrics_path:
+        enable_tracing(ctx, original_dir or os.getcwd(), profile_path, metrics_path)
+
+
+def enable_tracing(ctx, base_dir, profile_path, metrics_path):
+    """启用阶段计时，命令结束（包括失败退出）时写出 trace 和指标文件"""
+    from tools import tracing
+    tracer = tracing.enable()
+    command = ctx.invoked_subcommand or ''
+
+    def export():
+        if profile_path:
+            path = os.path.join(base_dir, profile_path)
+            tracer.write_chrome_trace(path)
+            click.echo(f"📊 性能记录已保存: {path}")
+        if metrics_path:
+            tracer.write_prometheus(os.path.join(base_dir, metrics_path), {'command': command})
+
+    # 先注册导出再进入根 span，关闭时根 span 先结束
+    ctx.call_on_close(export)
+    ctx.with_resource(tracing.span(f'ytkit {command}'.strip()))
+
+
+def cli():
+    """命令行入口：ytkit serve 运行时把命令转发给守护进程，否则在本进程执行"""
+    from tools.daemon import forward
+    exit_code = forward(sys.argv[1:])
+    if exit_code is None:
+        main()
+    else:
+        sys.exit(exit_code)
 
-# 注册命令
-main.add_command(InitCommand.init)
-main.add_command(DownloadCommand.download)
-main.add_command(XCommand.x)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    cli()
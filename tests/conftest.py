@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config  # noqa: E402
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    """缓存、词汇库等 SQLite 文件写入临时目录"""
+    path = tmp_path / 'cache'
+    monkeypatch.setattr(Config, 'CACHE_DIR', str(path))
+    return path
@@ -0,0 +1,35 @@
+import os
+
+from main import main
+from tools.daemon import JobManager, split_args
+
+
+def run_job(manager, argv, cwd):
+    job = manager.submit(argv, cwd)
+    offset = 0
+    while job.exit_code is None:
+        _, offset = job.read(offset, wait=5)
+    return job
+
+
+def test_relative_prefix_resolves_against_client_cwd(tmp_path, monkeypatch):
+    """守护进程的工作目录与客户端不同，相对路径选项仍应相对于客户端目录"""
+    client_dir = tmp_path / 'client'
+    daemon_dir = tmp_path / 'daemon'
+    client_dir.mkdir()
+    daemon_dir.mkdir()
+    monkeypatch.chdir(daemon_dir)
+
+    original_dir, command, command_args = split_args(
+        ['init', '--prefix', 'videos', 'https://www.youtube.com/watch?v=dQw4w9WgXcQ'])
+    assert original_dir is None
+
+    manager = JobManager(main, workers=1)
+    try:
+        job = run_job(manager, [command, *command_args], str(client_dir))
+    finally:
+        manager.shutdown()
+
+    assert job.exit_code == 0
+    assert (client_dir / 'videos' / 'dQw4w9WgXcQ' / '.youtube').is_file()
+    assert not os.path.exists(daemon_dir / 'videos')
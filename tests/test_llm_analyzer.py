@@ -0,0 +1,89 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from config import Config
+from tools.llm_analyzer import LLMAnalyzer
+from tools.vocab import VocabStore
+
+PHRASES = ('kind of', 'in advance', 'to be honest', 'no idea')
+
+
+class FakeClient:
+    """按 prompt 中的句子列表返回分析结果，不输出提示中已学过的词条"""
+
+    def __init__(self):
+        self.prompts = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, messages, **kwargs):
+        prompt = messages[-1]['content']
+        self.prompts.append(prompt)
+        known = set()
+        if '我已经学过' in prompt:
+            known = set(prompt.split('列出：', 1)[1].split('\n', 1)[0].split('; '))
+        items = []
+        for line in prompt.split('句子列表：\n', 1)[1].split('\n\n', 1)[0].splitlines():
+            sentence_id, sentence = line.split(' ', 1)
+            phrases = {p: '释义' for p in PHRASES if p in sentence.lower() and p not in known}
+            items.append({'id': sentence_id, 'sentence': sentence, 'explanation': '解释', 'syntax': '结构',
+                          'vocabulary': {}, 'phrases': phrases})
+        message = SimpleNamespace(content=json.dumps(items, ensure_ascii=False))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+@pytest.fixture
+def make_analyzer(cache_dir, monkeypatch):
+    monkeypatch.setattr(Config, 'OPENAI_API_KEY', None)
+    client = FakeClient()
+
+    def make(vocab_filter=True):
+        analyzer = LLMAnalyzer(provider='openai', stream=False, vocab_filter=vocab_filter)
+        analyzer.client = client
+        return analyzer
+    make.client = client
+    return make
+
+
+def analyze(make_analyzer, sentences, video_id, vocab_filter=True):
+    with make_analyzer(vocab_filter) as analyzer:
+        results = analyzer.analyze_sentences(sentences, video_id=video_id)
+    if vocab_filter:
+        # 与 ytkit x 一样，分析完成后把本视频的词条加入词汇库
+        vocab = VocabStore()
+        vocab.add_results(results, video_id)
+        vocab.close()
+    return {item['sentence']: item for item in results}
+
+
+def test_shared_sentences_hit_cache_across_videos_with_vocab_filter(make_analyzer, capsys):
+    shared = ['I kind of planned it in advance.', 'To be honest I have no idea.']
+    analyze(make_analyzer, [{'id': f'00{i}', 'sentence': s} for i, s in enumerate(shared, 1)], 'video-a')
+    assert len(make_analyzer.client.prompts) == 1
+    capsys.readouterr()
+
+    sentences = [{'id': f'01{i}', 'sentence': s} for i, s in enumerate(shared, 1)]
+    sentences.append({'id': '013', 'sentence': 'We booked it in advance, kind of.'})
+    results = analyze(make_analyzer, sentences, 'video-b')
+
+    assert '📦 缓存命中 2/3' in capsys.readouterr().out
+    # 只有未命中的句子发出请求，并带上已学词条提示
+    assert len(make_analyzer.client.prompts) == 2
+    prompt = make_analyzer.client.prompts[-1]
+    assert 'We booked it in advance' in prompt and 'To be honest' not in prompt
+    assert 'in advance; kind of' in prompt
+    # 命中缓存的结果去掉了视频 A 已引入的词条
+    assert all(not item['phrases'] for item in results.values())
+
+
+def test_hinted_results_are_not_cached(make_analyzer, capsys):
+    analyze(make_analyzer, [{'id': '001', 'sentence': 'I kind of planned it.'}], 'video-a')
+    analyze(make_analyzer, [{'id': '001', 'sentence': 'It was kind of fun.'}], 'video-b')
+    capsys.readouterr()
+
+    # 关闭过滤后不能从缓存拿到缺少 "kind of" 的结果
+    results = analyze(make_analyzer, [{'id': '001', 'sentence': 'It was kind of fun.'}], 'video-c',
+                      vocab_filter=False)
+    assert '📦 缓存命中 0/1' in capsys.readouterr().out
+    assert results['It was kind of fun.']['phrases'] == {'kind of': '释义'}
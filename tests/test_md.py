@@ -0,0 +1,26 @@
+from tools.commands.md import MdCommand
+
+
+def segments(data):
+    return [seg['text'] for seg in MdCommand.iter_segments(data)]
+
+
+def test_long_pause_inside_punctuated_sentence_does_not_split():
+    data = [
+        {'start': 0.0, 'end': 2.0, 'text': 'This is the first sentence.'},
+        {'start': 2.0, 'end': 4.0, 'text': 'And then, after'},
+        {'start': 8.0, 'end': 10.0, 'text': 'a long pause, it ends here.'},
+    ]
+    assert segments(data) == ['This is the first sentence.', 'And then, after a long pause, it ends here.']
+
+
+def test_unpunctuated_captions_split_on_pause_and_duration():
+    data = [
+        {'start': 0.0, 'end': 1.0, 'text': 'so we went'},
+        {'start': 1.0, 'end': 2.0, 'text': 'to the store'},
+        {'start': 4.0, 'end': 5.0, 'text': 'and then'},
+    ] + [{'start': 5.0 + i, 'end': 6.0 + i, 'text': 'more words'} for i in range(40)]
+    result = list(MdCommand.iter_segments(data))
+    assert result[0]['text'] == 'so we went to the store'
+    assert result[1]['start'] == 4.0 and result[1]['end'] - result[1]['start'] <= 31.0
+    assert len(result) == 3
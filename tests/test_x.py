@@ -0,0 +1,52 @@
+import pytest
+
+from config import Config
+from tools.commands import x as x_module
+from tools.commands.x import XCommand
+from tools.llm_analyzer import LLMAnalyzer
+from tools.pipeline import OK, SKIPPED
+from tools.vocab import VocabStore
+
+from test_llm_analyzer import FakeClient
+
+
+@pytest.fixture
+def project(tmp_path, cache_dir, monkeypatch):
+    monkeypatch.setattr(Config, 'OPENAI_API_KEY', None)
+    client = FakeClient()
+
+    class FakeAnalyzer(LLMAnalyzer):
+        def __init__(self, **kwargs):
+            super().__init__(**kwargs)
+            self.client = client
+
+    monkeypatch.setattr(x_module, 'LLMAnalyzer', FakeAnalyzer)
+    (tmp_path / 'vid.preprocessed.md').write_text('00:00 [001] We booked it in advance.\n'
+                                                 '00:05 [002] It was fun.', encoding='utf-8')
+    return tmp_path
+
+
+def step2(project, vocab_filter):
+    return XCommand.step2_analyze('vid', str(project), provider='openai', stream=False, vocab_filter=vocab_filter)
+
+
+def test_analysis_rebuilds_when_vocab_filter_or_known_terms_change(project):
+    assert step2(project, True) == OK
+    assert step2(project, True) == SKIPPED
+
+    # 其他视频学到与本视频无关的词条，不影响已有结果
+    vocab = VocabStore()
+    vocab.add_results([{'vocabulary': {'granted': '理所当然'}, 'phrases': {}}], 'other')
+    vocab.close()
+    assert step2(project, True) == SKIPPED
+
+    # 词汇库新增本视频中出现的词条后重新分析
+    vocab = VocabStore()
+    vocab.add_results([{'vocabulary': {'booked': '预订'}, 'phrases': {}}], 'other')
+    vocab.close()
+    assert step2(project, True) == OK
+    assert step2(project, True) == SKIPPED
+
+    # 切换过滤开关也会重新分析
+    assert step2(project, False) == OK
+    assert step2(project, False) == SKIPPED
@@ -0,0 +1,104 @@
+"""
+YouTube工具集 - 产物指纹（增量构建）
+
+每个生成的产物（如 .preprocessed.md、.analyzed.json、.bilingual.srt）在项目目录的
+.ytkit.build.json 中记录其输入文件的摘要和生成参数；输入和参数都未变化且产物本身未被
+改动时，对应步骤可以直接跳过。
+"""
+import os
+import json
+import hashlib
+import threading
+
+BUILD_FILE = '.ytkit.build.json'
+
+# 同一进程内的多个任务线程可能同时记录产物
+_lock = threading.Lock()
+
+
+def file_digest(path):
+    """文件内容的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ArtifactStore:
+    """项目目录下的产物指纹记录"""
+
+    def __init__(self, project_dir):
+        self.project_dir = project_dir
+        self.path = os.path.join(project_dir, BUILD_FILE)
+        self._data = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {'files': {}, 'artifacts': {}}
+        data.setdefault('files', {})
+        data.setdefault('artifacts', {})
+        return data
+
+    def _digest(self, name):
+        """按 (大小, 修改时间) 复用已计算的摘要，未变化的文件不必重新读取"""
+        path = os.path.join(self.project_dir, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        cached = self._data['files'].get(name)
+        if cached and cached['size'] == st.st_size and cached['mtime_ns'] == st.st_mtime_ns:
+            return cached['sha256']
+        sha = file_digest(path)
+        self._data['files'][name] = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha256': sha}
+        return sha
+
+    def _fingerprint(self, inputs, params):
+        digests = {}
+        for name in inputs:
+            digest = self._digest(name)
+            if digest is None:
+                return None
+            digests[name] = digest
+        return {'inputs': digests, 'params': params or {}}
+
+    def is_fresh(self, output, inputs, params=None):
+        """产物存在、未被改动，且输入和参数与上次生成时一致"""
+        record = self._data['artifacts'].get(output)
+        if not record:
+            return False
+        if self._digest(output) != record.get('output'):
+            return False
+        fingerprint = self._fingerprint(inputs, params)
+        return fingerprint is not None and fingerprint == record.get('fingerprint')
+
+    def record(self, output, inputs, params=None):
+        """记录产物的输入摘要和参数"""
+        fingerprint = self._fingerprint(inputs, params)
+        output_digest = self._digest(output)
+        if fingerprint is None or output_digest is None:
+            return
+        self._update('artifacts', output, {'fingerprint': fingerprint, 'output': output_digest})
+
+    def http_validators(self, output):
+        """产物对应的下载地址和 ETag/Last-Modified，用于条件请求"""
+        return self._data.setdefault('http', {}).get(output)
+
+    def record_http(self, output, validators):
+        self._update('http', output, validators)
+
+    def _update(self, section, key, value):
+        with _lock:
+            # 先合并磁盘上的记录，避免覆盖其他步骤刚写入的内容
+            data = self._load()
+            data['files'].update(self._data['files'])
+            data.setdefault(section, {})[key] = value
+            self._data = data
+            tmp_path = f'{self.path}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
@@ -0,0 +1,119 @@
+"""
+YouTube工具集 - 批量处理（多项目目录 + 有界工作线程池）
+"""
+import os
+import json
+import time
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import click
+
+from .pipeline import OK, SKIPPED, FAILED, STATUS_ICONS
+from .utils import YouTubeURLParser, ProjectManager
+
+
+class RateLimiter:
+    """全局限速：保证相邻两次任务启动之间至少间隔 min_interval 秒"""
+
+    def __init__(self, min_interval=0.0):
+        self.min_interval = max(0.0, float(min_interval or 0))
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if self.min_interval <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.min_interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def discover_projects(root):
+    """递归查找 root 下所有包含 .youtube 文件的项目目录"""
+    root = os.path.expanduser(root)
+    for dirpath, dirnames, filenames in os.walk(root):
+        # 跳过隐藏目录，并保证遍历顺序稳定
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith('.'))
+        if '.youtube' in filenames:
+            yield dirpath
+
+
+def projects_from_url_file(url_file, prefix):
+    """读取URL列表文件（每行一个，# 开头为注释），在 prefix 下创建项目目录"""
+    project_manager = ProjectManager(prefix)
+    with open(url_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            url = line.strip()
+            if not url or url.startswith('#'):
+                continue
+            video_id = YouTubeURLParser.extract_video_id(url)
+            if not video_id:
+                click.echo(f"⚠️ 跳过无效URL: {url}")
+                continue
+            if not project_manager.exists(video_id):
+                project_manager.create_project(video_id, url)
+            yield project_manager.project_dir(video_id)
+
+
+def overall_status(task_statuses):
+    """根据各任务状态汇总单个视频的状态"""
+    statuses = list(task_statuses)
+    if not statuses or FAILED in statuses:
+        return FAILED
+    if all(status == SKIPPED for status in statuses):
+        return SKIPPED
+    return OK
+
+
+def run_batch(project_dirs, process, workers=4, min_interval=0.0, report=None):
+    """用有界线程池处理多个项目目录，process(dir) 返回结果字典（至少包含 status）"""
+    project_dirs = list(dict.fromkeys(project_dirs))
+    total = len(project_dirs)
+    if total == 0:
+        click.echo("⚠️ 没有找到需要处理的项目")
+        return []
+    click.echo(f"📦 批量处理 {total} 个项目，工作线程数: {workers}")
+    limiter = RateLimiter(min_interval)
+    report_file = open(report, 'a', encoding='utf-8') if report else None
+    counts = {OK: 0, SKIPPED: 0, FAILED: 0}
+    results = []
+
+    def worker(project_dir):
+        limiter.wait()
+        start = time.perf_counter()
+        try:
+            result = process(project_dir)
+        except Exception as e:
+            result = {'status': FAILED, 'error': str(e)}
+        result.setdefault('dir', project_dir)
+        result['elapsed'] = round(time.perf_counter() - start, 3)
+        return result
+
+    batch_start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = [executor.submit(contextvars.copy_context().run, worker, d) for d in project_dirs]
+            for done, future in enumerate(as_completed(futures), 1):
+                result = future.result()
+                results.append(result)
+                counts[result['status']] = counts.get(result['status'], 0) + 1
+                icon = STATUS_ICONS.get(result['status'], '❔')
+                click.echo(f"[{done}/{total}] {icon} {result['dir']} ({result['elapsed']:.1f}s)")
+                if report_file:
+                    report_file.write(json.dumps(result, ensure_ascii=False) + '\n')
+                    report_file.flush()
+    finally:
+        if report_file:
+            report_file.close()
+
+    elapsed = time.perf_counter() - batch_start
+    click.echo(f"📊 批量处理完成，用时 {elapsed:.1f}s: "
+               f"✅ 成功 {counts[OK]}  ⏭️ 跳过 {counts[SKIPPED]}  ❌ 失败 {counts[FAILED]}")
+    if report:
+        click.echo(f"📄 结果报告: {report}")
+    return results
@@ -1,12 +1,28 @@
 """
 YouTube工具集 - 命令模块
+
+命令类按需加载（PEP 562），导入本包时不会加载各命令及其依赖。
 """
-from .init import InitCommand
-from .download import DownloadCommand
-from .x import XCommand
-
-__all__ = [
-    'InitCommand',
-    'DownloadCommand',
-    'XCommand',
-] 
\ No newline at end of file
+import importlib
+
+_COMMANDS = {
+    'InitCommand': '.init',
+    'DownloadCommand': '.download',
+    'MdCommand': '.md',
+    'XCommand': '.x',
+    'CacheCommand': '.cache',
+    'IndexCommand': '.index',
+    'VocabCommand': '.vocab',
+    'ServeCommand': '.serve',
+    'QueueCommand': '.queue',
+    'WorkerCommand': '.worker',
+}
+
+__all__ = list(_COMMANDS)
+
+
+def __getattr__(name):
+    if name in _COMMANDS:
+        module = importlib.import_module(_COMMANDS[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
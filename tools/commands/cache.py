@@ -0,0 +1,47 @@
+"""
+YouTube工具集 - cache命令（LLM分析缓存管理）
+"""
+import click
+from ..llm_cache import LLMCache, parse_size
+from ..utils import format_size
+
+
+class CacheCommand:
+    """缓存管理命令处理器"""
+
+    @staticmethod
+    @click.group()
+    def cache():
+        """管理LLM分析缓存"""
+
+    @staticmethod
+    @click.command()
+    def stats():
+        """查看缓存统计"""
+        llm_cache = LLMCache()
+        info = llm_cache.stats()
+        llm_cache.close()
+        click.echo(f"📦 缓存文件: {info['path']}")
+        click.echo(f"📊 条目数: {info['entries']}")
+        click.echo(f"📊 占用: {format_size(info['bytes'])} / {format_size(info['max_bytes'])}")
+        click.echo(f"📊 累计命中: {info['hits']}")
+
+    @staticmethod
+    @click.command()
+    @click.option('--max-size', default=None, help='淘汰到不超过该大小，如 100M [默认: YTKIT_LLM_CACHE_MAX_BYTES]')
+    @click.option('--all', 'clear_all', is_flag=True, default=False, help='清空全部缓存')
+    def prune(max_size, clear_all):
+        """按最近访问时间淘汰缓存条目"""
+        try:
+            max_bytes = 0 if clear_all else (parse_size(max_size) if max_size else None)
+        except ValueError as e:
+            click.echo(f"❌ 错误：{e}")
+            return
+        llm_cache = LLMCache()
+        removed, freed = llm_cache.prune(max_bytes)
+        llm_cache.close()
+        click.echo(f"🧹 淘汰 {removed} 条，释放 {format_size(freed)}")
+
+
+CacheCommand.cache.add_command(CacheCommand.stats)
+CacheCommand.cache.add_command(CacheCommand.prune)
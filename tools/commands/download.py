@@ -3,15 +3,126 @@ YouTube工具集 - download命令
 """
 import click
 import os
-import yt_dlp
-import requests
+import json
+import time
 import re
 import glob
-from youtube_transcript_api import YouTubeTranscriptApi
-from youtube_transcript_api.formatters import WebVTTFormatter
+import shutil
+import threading
+import subprocess
+import contextvars
+from config import Config
+from ..utils import format_size
+from ..pipeline import TaskGraph, SKIPPED, FAILED
+from ..artifacts import ArtifactStore
+from .. import tracing
+from ..subtitles import CAPTION_FORMATS, parse_captions, write_srt, write_vtt
+from ..batch import discover_projects, projects_from_url_file, overall_status, run_batch
 
+# 元数据缓存文件，所有下载步骤共享
+INFO_FILE = '.youtube.info.json'
+# 双语字幕合并方式的版本，合并逻辑变化时递增以重新生成
+BILINGUAL_VERSION = 2
 
-def download_mp4(url, original_dir):
+
+def info_file_path(original_dir):
+    """元数据缓存文件路径"""
+    return os.path.join(original_dir, INFO_FILE)
+
+def load_info(url, original_dir, ttl=None):
+    """获取视频元数据，只调用一次 extract_info 并缓存到项目目录"""
+    if ttl is None:
+        ttl = Config.INFO_TTL
+    info_file = info_file_path(original_dir)
+    m = re.search(r"[?&]v=([a-zA-Z0-9_-]{11})", url)
+    video_id = m.group(1) if m else None
+    # 缓存未过期且属于同一视频时直接使用
+    if os.path.exists(info_file) and time.time() - os.path.getmtime(info_file) < ttl:
+        try:
+            with open(info_file, 'r', encoding='utf-8') as f:
+                info = json.load(f)
+            if video_id is None or info.get('id') == video_id:
+                click.echo(f"📦 使用缓存的元数据: {info_file}")
+                return info
+        except (OSError, ValueError) as e:
+            click.echo(f"⚠️ 元数据缓存无效，重新获取: {e}")
+    click.echo(f"🔍 获取视频元数据: {url}")
+    try:
+        import yt_dlp
+        ydl_opts = {'quiet': True, 'skip_download': True, 'noplaylist': True}
+        with tracing.span('download.extract_info'), yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            info = ydl.sanitize_info(ydl.extract_info(url, download=False))
+        # 先写临时文件再替换，避免中断时留下损坏的缓存
+        tmp_file = info_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(info, f, ensure_ascii=False)
+        os.replace(tmp_file, info_file)
+        click.echo(f"✅ 元数据已缓存: {info_file}")
+        return info
+    except Exception as e:
+        click.echo(f"❌ 获取视频元数据时出错: {e}")
+        return None
+
+class DownloadProgress:
+    """yt-dlp 进度回调：输出每个文件的吞吐量，并核对下载字节数与元数据中的文件大小"""
+
+    def __init__(self, report_interval=10.0):
+        self.report_interval = report_interval
+        self.problems = []
+        self._reported = {}
+        self._lock = threading.Lock()
+        # 回调可能来自 yt-dlp 的分片下载线程，在创建时的上下文中执行以便守护进程归属输出
+        self._context = contextvars.copy_context()
+
+    def hook(self, d):
+        self._context.copy().run(self._hook, d)
+
+    def _hook(self, d):
+        # 分片并发下载时回调可能来自多个线程
+        with self._lock:
+            filename = os.path.basename(d.get('filename') or '')
+            if d['status'] == 'downloading':
+                now = time.monotonic()
+                if now - self._reported.setdefault(filename, now) >= self.report_interval:
+                    self._reported[filename] = now
+                    speed = (d.get('speed') or 0) / 1024 / 1024
+                    total = d.get('total_bytes') or d.get('total_bytes_estimate')
+                    done = d.get('downloaded_bytes') or 0
+                    percent = f"{done / total * 100:.0f}%" if total else format_size(done)
+                    click.echo(f"⬇️ {filename}: {percent}，{speed:.2f} MB/s")
+            elif d['status'] == 'finished':
+                size = d.get('total_bytes') or d.get('downloaded_bytes') or 0
+                tracing.count('download.bytes', size)
+                elapsed = d.get('elapsed')
+                if elapsed:
+                    click.echo(f"📦 {filename}: {format_size(size)}，用时 {elapsed:.1f}s，"
+                               f"平均 {size / elapsed / 1024 / 1024:.2f} MB/s")
+                expected = (d.get('info_dict') or {}).get('filesize')
+                if expected and size and abs(size - expected) > expected * 0.01:
+                    self.problems.append(f"{filename} 大小 {size} 与元数据 {expected} 不符")
+
+
+def verify_media(path, info):
+    """检查下载结果：文件非空，安装了 ffprobe 时核对时长"""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return [f"文件不存在或为空: {path}"]
+    expected = info.get('duration')
+    if not expected or not shutil.which('ffprobe'):
+        return []
+    try:
+        output = subprocess.run(
+            ['ffprobe', '-v', 'error', '-show_entries', 'format=duration', '-of', 'csv=p=0', path],
+            capture_output=True, text=True, timeout=60, check=True,
+        ).stdout.strip()
+        duration = float(output)
+    except (subprocess.SubprocessError, ValueError) as e:
+        return [f"无法读取视频时长: {e}"]
+    if abs(duration - expected) > max(2.0, expected * 0.01):
+        return [f"时长 {duration:.1f}s 与元数据 {expected}s 不符"]
+    return []
+
+
+def download_mp4(url, original_dir, info, rate_limit=None):
     click.echo(f"🎬 下载音视频 mp4: {url}")
     # 获取视频ID
     import re as _re
@@ -20,10 +131,12 @@ def download_mp4(url, original_dir):
     mp4_file = os.path.join(original_dir, f'{video_id}.mp4')
     if os.path.exists(mp4_file):
         click.echo(f"⚠️ 视频文件已存在，跳过下载: {mp4_file}")
-        return
+        return SKIPPED
+    progress = DownloadProgress()
     try:
         ydl_opts = {
             'quiet': False,
+            'noprogress': True,  # 多个任务并发时由 progress_hooks 汇总输出
             'outtmpl': mp4_file,
             'merge_output_format': 'mp4',
             'format': (
@@ -32,74 +145,150 @@ def download_mp4(url, original_dir):
                 '/best[ext=mp4][vcodec^=avc1]'
             ),
             'noplaylist': True,
+            # 分片并发、分块请求和重试；中断后从 .part 文件继续
+            'concurrent_fragment_downloads': Config.DOWNLOAD_FRAGMENTS,
+            'http_chunk_size': Config.DOWNLOAD_CHUNK_SIZE or None,
+            'retries': Config.DOWNLOAD_RETRIES,
+            'fragment_retries': Config.DOWNLOAD_RETRIES,
+            'continuedl': True,
+            'progress_hooks': [progress.hook],
         }
+        if rate_limit:
+            ydl_opts['ratelimit'] = rate_limit
+        import yt_dlp
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([url])
-        click.echo(f"✅ 视频已保存为 {mp4_file}")
+            ydl.download_with_info_file(info_file_path(original_dir))
     except Exception as e:
         click.echo(f"❌ 下载视频时出错: {e}")
+        parts = glob.glob(os.path.join(glob.escape(original_dir), f'{video_id}*.part'))
+        if parts:
+            click.echo(f"💾 已保留未完成的文件，重新运行 ytkit download 将断点续传: "
+                       f"{', '.join(os.path.basename(p) for p in parts)}")
+        return FAILED
+    problems = progress.problems + verify_media(mp4_file, info)
+    if problems:
+        for problem in problems:
+            click.echo(f"❌ 视频校验失败: {problem}")
+        # 改名保留以便检查，下次运行会重新下载
+        if os.path.exists(mp4_file):
+            os.replace(mp4_file, mp4_file + '.unverified')
+        return FAILED
+    click.echo(f"✅ 视频已保存为 {mp4_file}")
+
+def captions_cache_file(original_dir, lang, ext, automatic):
+    """原始字幕缓存：.youtube.{语言}.{格式}，自动字幕为 .youtube.{语言}.auto.{格式}"""
+    return os.path.join(original_dir, f".youtube.{lang}.{'auto.' if automatic else ''}{ext}")
+
+
+def choose_caption_track(info, lang):
+    """选择字幕轨：人工字幕优先于自动字幕，完全匹配优先于地区变体（en-US 等）
+
+    返回 (语言代码, 是否自动字幕, 格式条目)，没有可解析格式的该语言字幕时返回 None。
+    """
+    for key, automatic in (('subtitles', False), ('automatic_captions', True)):
+        tracks = info.get(key) or {}
+        codes = [lang] if lang in tracks else []
+        codes += sorted(code for code in tracks if code.startswith(f'{lang}-'))
+        for code in codes:
+            formats = {f.get('ext'): f for f in tracks[code] or [] if f.get('url')}
+            for ext in CAPTION_FORMATS:
+                if ext in formats:
+                    return code, automatic, formats[ext]
+    return None
+
+
+def load_captions(lang, original_dir, info):
+    """获取一种语言的字幕条：优先读取项目中缓存的原始字幕，否则请求一次字幕接口并缓存
+
+    没有该语言字幕时返回 None，请求或解析失败时抛出异常。
+    """
+    for automatic in (False, True):
+        for ext in CAPTION_FORMATS:
+            cache_file = captions_cache_file(original_dir, lang, ext, automatic)
+            if os.path.exists(cache_file):
+                with open(cache_file, 'r', encoding='utf-8') as f:
+                    return parse_captions(f.read(), ext, automatic)
+    track = choose_caption_track(info, lang)
+    if track is None:
+        return None
+    code, automatic, fmt = track
+    ext = fmt['ext']
+    click.echo(f"🌐 请求{'自动' if automatic else ''}字幕 ({code}, {ext})")
+    from ..net import get_session
+    resp = get_session().get(fmt['url'], timeout=Config.HTTP_TIMEOUT)
+    resp.raise_for_status()
+    tracing.count('http.bytes', len(resp.content))
+    text = resp.content.decode('utf-8-sig')
+    cues = parse_captions(text, ext, automatic)
+    # 先写临时文件再替换，避免中断时留下不完整的缓存
+    cache_file = captions_cache_file(original_dir, lang, ext, automatic)
+    tmp_file = cache_file + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_file, cache_file)
+    return cues
+
 
-def download_subtitle(url, lang, original_dir):
+def download_captions(url, lang, original_dir, info, outputs=('srt',)):
+    """获取一种语言的字幕（每种语言只请求一次），在本地生成 outputs 中的 SRT/VTT 文件"""
     click.echo(f"📝 检查字幕 ({lang}): {url}")
-    
-    # 获取视频ID
-    import re as _re
-    m = _re.search(r"[?&]v=([a-zA-Z0-9_-]{11})", url)
+    m = re.search(r"[?&]v=([a-zA-Z0-9_-]{11})", url)
     video_id = m.group(1) if m else 'video'
-    subtitle_file = os.path.join(original_dir, f'{video_id}.{lang}.srt')
-    if os.path.exists(subtitle_file):
-        click.echo(f"⚠️ 字幕文件已存在，跳过下载: {subtitle_file}")
-        return
-    
+    targets = {ext: os.path.join(original_dir, f'{video_id}.{lang}.{ext}') for ext in outputs}
+    missing = {ext: path for ext, path in targets.items() if not os.path.exists(path)}
+    if not missing:
+        click.echo(f"⚠️ 字幕文件已存在，跳过下载: {', '.join(targets.values())}")
+        return SKIPPED
     try:
-        ydl_opts = {
-            'quiet': True,
-            'skip_download': True,
-            'writesubtitles': True,
-            'writeautomaticsub': True,  # 支持自动字幕
-            'subtitleslangs': [lang],
-            'subtitlesformat': 'srt',
-            'outtmpl': os.path.join(original_dir, '%(title)s.%(ext)s'),  # 使用默认命名
-        }
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=False)
-            # 调试输出可用字幕信息
-            click.echo(f"  - info['subtitles'] keys: {list(info.get('subtitles', {}).keys())}")
-            click.echo(f"  - info['automatic_captions'] keys: {list(info.get('automatic_captions', {}).keys())}")
-            has_sub = lang in info.get('subtitles', {})
-            has_auto = lang in info.get('automatic_captions', {})
-            if not (has_sub or has_auto):
-                if lang == 'en':
-                    click.echo(f"❌ 没有找到英文字幕 (en)，无法下载！")
-                else:
-                    click.echo(f"⚠️ 没有找到 {lang} 字幕，跳过。")
-                return
-            
-            # 下载字幕
-            ydl.download([url])
-            
-            # 搜索所有相关的字幕文件
-            patterns = [
-                os.path.join(original_dir, f'*.{lang}.srt'),
-                os.path.join(original_dir, f'*auto*{lang}*.srt'),
-                os.path.join(original_dir, f'*orig*{lang}*.srt'),
-            ]
-            found = False
-            for pattern in patterns:
-                for f in glob.glob(pattern):
-                    os.rename(f, subtitle_file)
-                    click.echo(f"✅ 字幕 ({lang}) 已保存为 {subtitle_file}")
-                    found = True
-                    break
-                if found:
-                    break
-            if not found:
-                click.echo(f"❌ 字幕文件下载失败，未找到匹配的srt文件")
-                
+        cues = load_captions(lang, original_dir, info)
     except Exception as e:
-        click.echo(f"❌ 下载字幕 ({lang}) 时出错: {e}")
+        click.echo(f"❌ 获取字幕 ({lang}) 时出错: {e}")
+        return FAILED
+    if not cues:
+        if lang == 'en':
+            click.echo(f"❌ 没有找到英文字幕 (en)，无法下载！")
+            return FAILED
+        click.echo(f"⚠️ 没有找到 {lang} 字幕，跳过。")
+        return SKIPPED
+    writers = {'srt': write_srt, 'vtt': write_vtt}
+    for ext, path in missing.items():
+        tmp_file = path + '.tmp'
+        writers[ext](cues, tmp_file)
+        os.replace(tmp_file, path)
+        click.echo(f"✅ 字幕 ({lang}) 已保存为 {path}")
 
-def download_cover(url, original_dir):
+def parse_resolution(text):
+    """解析 '1280x720' 为 (宽, 高)，无法解析时返回 (0, 0)"""
+    width, _, height = str(text).lower().partition('x')
+    try:
+        return int(width), int(height or 0)
+    except ValueError:
+        return 0, 0
+
+
+def is_jpg_url(url):
+    return bool(url) and url.split('?')[0].lower().endswith(('.jpg', '.jpeg'))
+
+
+def choose_thumbnail(info, min_width=0, min_height=0):
+    """从 jpg 缩略图中选满足最小分辨率的最小一张，都不满足时选最大的一张
+
+    封面固定保存为 {video_id}.jpg，webp 等其他格式不作为候选；没有 jpg 缩略图时返回 None。
+    """
+    jpgs = [t for t in info.get('thumbnails') or [] if is_jpg_url(t.get('url'))]
+    candidates = [t for t in jpgs if t.get('width') and t.get('height')]
+    if not candidates:
+        # 没有尺寸信息时按 yt-dlp 的排序取最后（最优）一张
+        if jpgs:
+            return jpgs[-1]['url']
+        return info.get('thumbnail') if is_jpg_url(info.get('thumbnail')) else None
+    fits = [t for t in candidates if t['width'] >= min_width and t['height'] >= min_height]
+    if fits:
+        return min(fits, key=lambda t: t['width'] * t['height'])['url']
+    return max(candidates, key=lambda t: t['width'] * t['height'])['url']
+
+
+def download_cover(url, original_dir, info, refresh=False):
     click.echo(f"🖼️ 获取封面信息: {url}")
     
     # 获取视频ID
@@ -108,30 +297,34 @@ def download_cover(url, original_dir):
     video_id = m.group(1) if m else 'video'
     
     # 检查文件是否已存在
-    cover_file = os.path.join(original_dir, f'{video_id}.jpg')
-    if os.path.exists(cover_file):
+    cover_name = f'{video_id}.jpg'
+    cover_file = os.path.join(original_dir, cover_name)
+    exists = os.path.exists(cover_file)
+    if exists and not refresh:
         click.echo(f"⚠️ 封面文件已存在，跳过下载: {cover_file}")
-        return
+        return SKIPPED
     
     try:
-        ydl_opts = {'quiet': True, 'skip_download': True}
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=False)
-            thumbnail_url = info.get('thumbnail')
-            if not thumbnail_url:
-                click.echo("❌ 未找到封面图片URL")
-                return
-            click.echo(f"🌐 封面图片URL: {thumbnail_url}")
-            # 下载图片
-            resp = requests.get(thumbnail_url, timeout=10)
-            if resp.status_code == 200:
-                with open(cover_file, 'wb') as f:
-                    f.write(resp.content)
-                click.echo(f"✅ 封面已保存为 {cover_file}")
-            else:
-                click.echo(f"❌ 下载封面失败，HTTP状态码: {resp.status_code}")
+        thumbnail_url = choose_thumbnail(info, *parse_resolution(Config.COVER_RESOLUTION))
+        if not thumbnail_url:
+            click.echo("❌ 未找到 jpg 格式的封面图片URL")
+            return FAILED
+        click.echo(f"🌐 封面图片URL: {thumbnail_url}")
+        # 已有封面且地址未变时发送条件请求，未修改的封面不重新下载
+        from ..net import fetch_to_file, NOT_MODIFIED
+        store = ArtifactStore(original_dir)
+        validators = store.http_validators(cover_name) if exists else None
+        if validators and validators.get('url') != thumbnail_url:
+            validators = None
+        status, validators = fetch_to_file(thumbnail_url, cover_file, validators)
+        if status == NOT_MODIFIED:
+            click.echo(f"✅ 封面未变化: {cover_file}")
+            return SKIPPED
+        store.record_http(cover_name, validators)
+        click.echo(f"✅ 封面已保存为 {cover_file}")
     except Exception as e:
         click.echo(f"❌ 获取或下载封面时出错: {e}")
+        return FAILED
 
 def merge_subtitles(original_dir, video_id):
     """合并中英文字幕，英文在上，中文在下"""
@@ -141,120 +334,44 @@ def merge_subtitles(original_dir, video_id):
     
     # 检查文件是否存在
     if not os.path.exists(en_file):
-        click.echo(f"❌ 英文字幕文件不存在: {en_file}")
-        return
+        click.echo(f"⚠️ 英文字幕文件不存在，跳过双语合并: {en_file}")
+        return SKIPPED
     if not os.path.exists(zh_file):
-        click.echo(f"❌ 中文字幕文件不存在: {zh_file}")
-        return
-    if os.path.exists(merged_file):
-        click.echo(f"⚠️ 双语字幕文件已存在，跳过: {merged_file}")
-        return
+        click.echo(f"⚠️ 中文字幕文件不存在，跳过双语合并: {zh_file}")
+        return SKIPPED
+    inputs = [f'{video_id}.en.srt', f'{video_id}.zh-Hans.srt']
+    params = {'version': BILINGUAL_VERSION}
+    store = ArtifactStore(original_dir)
+    if store.is_fresh(f'{video_id}.bilingual.srt', inputs, params):
+        click.echo(f"⚠️ 双语字幕文件已是最新，跳过: {merged_file}")
+        return SKIPPED
     
     try:
+        from ..subtitles import Cue, iter_srt, align_cues
+
         # 读取字幕文件
-        def parse_srt(file_path):
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read().strip()
-            
-            subtitles = []
-            blocks = content.split('\n\n')
-            for block in blocks:
-                if not block.strip():
-                    continue
-                lines = block.strip().split('\n')
-                if len(lines) >= 3:
-                    index = lines[0]
-                    timestamp = lines[1]
-                    text = '\n'.join(lines[2:])
-                    subtitles.append((index, timestamp, text))
-            return subtitles
+        en_subs = sorted(iter_srt(en_file), key=lambda cue: cue.start)
+        zh_subs = sorted(iter_srt(zh_file), key=lambda cue: cue.start)
         
-        en_subs = parse_srt(en_file)
-        zh_subs = parse_srt(zh_file)
+        # 按时间轴对齐：每条中文字幕归入重叠最多的英文字幕（无重叠时取最近的一条）
+        assigned = align_cues(en_subs, zh_subs)
         
-        # 合并字幕
-        with open(merged_file, 'w', encoding='utf-8') as f:
-            for i, (en_index, en_timestamp, en_text) in enumerate(en_subs):
-                # 写入序号
-                f.write(f"{i+1}\n")
-                # 写入时间戳
-                f.write(f"{en_timestamp}\n")
-                # 写入英文（在上）
-                f.write(f"{en_text}\n")
-                # 写入中文（在下）
-                if i < len(zh_subs):
-                    zh_text = zh_subs[i][2]
-                    f.write(f"{zh_text}\n")
-                f.write("\n")
+        # 合并字幕：英文在上，中文在下
+        merged = []
+        for en_cue, zh_indices in zip(en_subs, assigned):
+            text = en_cue.text
+            if zh_indices:
+                text += '\n' + ' '.join(zh_subs[j].text.replace('\n', ' ') for j in zh_indices)
+            merged.append(Cue(en_cue.start, en_cue.end, text))
+        write_srt(merged, merged_file)
+        tracing.count('bilingual.cues', len(merged))
+        store.record(f'{video_id}.bilingual.srt', inputs, params)
         
         click.echo(f"✅ 双语字幕生成完成: {merged_file}")
         
     except Exception as e:
         click.echo(f"❌ 合并字幕时出错: {e}")
-
-def download_vtt_subtitle(url, lang, original_dir):
-    """使用 youtube-transcript-api 下载 VTT 格式字幕"""
-    click.echo(f"📝 下载 VTT 字幕 ({lang}): {url}")
-    
-    # 获取视频ID
-    import re as _re
-    m = _re.search(r"[?&]v=([a-zA-Z0-9_-]{11})", url)
-    video_id = m.group(1) if m else 'video'
-    vtt_file = os.path.join(original_dir, f'{video_id}.{lang}.vtt')
-    
-    if os.path.exists(vtt_file):
-        click.echo(f"⚠️ VTT 字幕文件已存在，跳过下载: {vtt_file}")
-        return
-    
-    try:
-        # 语言代码映射
-        lang_map = {
-            'en': 'en',
-            'zh-Hans': 'zh-CN',
-            'zh': 'zh-CN'
-        }
-        transcript_lang = lang_map.get(lang, lang)
-        
-        # 获取字幕
-        transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
-        
-        # 尝试获取指定语言的字幕
-        transcript = None
-        try:
-            transcript = transcript_list.find_transcript([transcript_lang])
-        except:
-            # 如果找不到指定语言，尝试自动生成的字幕
-            try:
-                transcript = transcript_list.find_generated_transcript([transcript_lang])
-            except:
-                # 如果还是找不到，尝试其他变体
-                try:
-                    if lang == 'zh-Hans':
-                        transcript = transcript_list.find_transcript(['zh'])
-                    elif lang == 'en':
-                        transcript = transcript_list.find_transcript(['en-US', 'en-GB'])
-                except:
-                    pass
-        
-        if not transcript:
-            click.echo(f"❌ 没有找到 {lang} 的 VTT 字幕")
-            return
-        
-        # 获取字幕数据
-        subtitle_data = transcript.fetch()
-        
-        # 转换为 VTT 格式
-        formatter = WebVTTFormatter()
-        vtt_content = formatter.format_transcript(subtitle_data)
-        
-        # 保存 VTT 文件
-        with open(vtt_file, 'w', encoding='utf-8') as f:
-            f.write(vtt_content)
-        
-        click.echo(f"✅ VTT 字幕 ({lang}) 已保存为 {vtt_file}")
-        
-    except Exception as e:
-        click.echo(f"❌ 下载 VTT 字幕 ({lang}) 时出错: {e}")
+        return FAILED
 
 class DownloadCommand:
     """下载命令处理器"""
@@ -262,14 +379,47 @@ class DownloadCommand:
     @staticmethod
     @click.command()
     @click.option('--skip-mp4', is_flag=True, default=False, help='跳过mp4视频下载')
+    @click.option('-j', '--jobs', type=int, default=None, help='并发下载任务数 [默认: YTKIT_DOWNLOAD_CONCURRENCY 或 4]')
+    @click.option('--batch', 'batch_root', default=None, help='批量模式：处理该目录下所有包含 .youtube 的项目')
+    @click.option('--url-file', default=None, help='批量模式：从URL列表文件创建并下载项目')
+    @click.option('-w', '--workers', type=int, default=4, show_default=True, help='批量模式：同时处理的视频数')
+    @click.option('--limit-rate', default=None, help='单个视频的最大下载速度，如 50K、4.2M')
+    @click.option('--start-interval', type=float, default=0.0, show_default=True, help='批量模式：相邻两个视频开始下载的最小间隔（秒）')
+    @click.option('--report', default=None, help='批量模式：结果报告文件（JSON Lines，追加写入）')
+    @click.option('--refresh-cover', is_flag=True, default=False, help='已有封面时用条件请求检查更新')
     @click.pass_context
-    def download(ctx, skip_mp4):
+    def download(ctx, skip_mp4, jobs, batch_root, url_file, workers, limit_rate, start_interval, report,
+                 refresh_cover):
         """下载YouTube视频"""
         # 使用原始工作目录
         original_dir = ctx.obj.get('original_dir', '.')
         if original_dir is None:
             original_dir = '.'
         
+        rate_limit = None
+        if limit_rate:
+            from yt_dlp.utils import parse_bytes
+            rate_limit = parse_bytes(limit_rate)
+            if rate_limit is None:
+                click.echo(f"❌ 错误：无效的下载速度 '{limit_rate}'")
+                return
+        
+        if batch_root or url_file:
+            # 相对路径均相对于原始工作目录
+            root = os.path.normpath(os.path.join(original_dir, batch_root or '.'))
+            if url_file:
+                project_dirs = projects_from_url_file(os.path.join(original_dir, url_file), root)
+            else:
+                project_dirs = discover_projects(root)
+            run_batch(
+                project_dirs,
+                lambda d: DownloadCommand.run(d, skip_mp4, jobs, rate_limit, refresh_cover=refresh_cover),
+                workers=workers,
+                min_interval=start_interval,
+                report=os.path.join(original_dir, report) if report else None,
+            )
+            return
+        
         youtube_file = os.path.join(original_dir, '.youtube')
         
         # 检查当前目录是否有.youtube文件
@@ -278,31 +428,65 @@ class DownloadCommand:
             click.echo("💡 提示：请先运行 yt init 命令初始化项目")
             return
         
+        DownloadCommand.run(original_dir, skip_mp4, jobs, rate_limit, show_summary=True, refresh_cover=refresh_cover)
+
+    @staticmethod
+    def run(original_dir, skip_mp4=False, jobs=None, rate_limit=None, show_summary=False, refresh_cover=False):
+        """下载单个项目目录，返回结果字典（status、video_id、各任务状态）"""
+        result = {'dir': original_dir, 'video_id': None, 'status': FAILED, 'tasks': {}}
+        youtube_file = os.path.join(original_dir, '.youtube')
         # 读取URL
         try:
             with open(youtube_file, 'r', encoding='utf-8') as f:
                 url = f.read().strip()
             click.echo(f"📥 准备下载: {url}")
-            # 下载mp4
-            if not skip_mp4:
-                download_mp4(url, original_dir)
-            else:
-                click.echo("⏭️ 跳过mp4视频下载")
-            # 下载字幕（en，zh-Hans）
-            download_subtitle(url, 'en', original_dir)
-            download_subtitle(url, 'zh-Hans', original_dir)
-            
-            # 下载 VTT 字幕（只下载英文）
-            download_vtt_subtitle(url, 'en', original_dir)
-            
-            # 合并字幕
             import re as _re
             m = _re.search(r"[?&]v=([a-zA-Z0-9_-]{11})", url)
             video_id = m.group(1) if m else 'video'
-            merge_subtitles(original_dir, video_id)
+            result['video_id'] = video_id
+            # 获取元数据（只请求一次，后续步骤共享）
+            info = load_info(url, original_dir)
+            if not info:
+                result['error'] = '获取视频元数据失败'
+                return result
             
-            # 下载封面
-            download_cover(url, original_dir)
-            click.echo("✅ 下载流程框架已建立，具体功能待实现...")
+            graph = DownloadCommand.build_graph(url, video_id, original_dir, info, skip_mp4, jobs, rate_limit,
+                                                refresh_cover)
+            tasks = graph.run()
+            if show_summary:
+                graph.summary()
+            result['tasks'] = {task.name: task.status for task in tasks}
+            result['status'] = overall_status(result['tasks'].values())
+            errors = {task.name: task.error for task in tasks if task.error}
+            if errors:
+                result['errors'] = errors
         except Exception as e:
-            click.echo(f"❌ 读取 .youtube 文件时出错: {e}") 
\ No newline at end of file
+            click.echo(f"❌ 读取 .youtube 文件时出错: {e}")
+            result['error'] = str(e)
+        return result
+
+    @staticmethod
+    def build_graph(url, video_id, original_dir, info, skip_mp4=False, jobs=None, rate_limit=None,
+                    refresh_cover=False, only=None):
+        """构建下载任务图：视频、字幕、VTT、封面并发执行，两份字幕就绪后立即合并
+
+        only 为任务名集合时只构建其中的任务（队列 worker 按阶段分别执行）。
+        """
+        graph = TaskGraph(max_workers=jobs or Config.DOWNLOAD_CONCURRENCY)
+
+        def add(name, func, deps=()):
+            if only is None or name in only:
+                graph.add(name, func, deps)
+
+        if not skip_mp4:
+            add('mp4', lambda: download_mp4(url, original_dir, info, rate_limit))
+        else:
+            click.echo("⏭️ 跳过mp4视频下载")
+        # 字幕：每种语言请求一次，英文同时生成 SRT 和 VTT（用于 AI 分析）
+        add('captions:en', lambda: download_captions(url, 'en', original_dir, info, ('srt', 'vtt')))
+        add('captions:zh-Hans', lambda: download_captions(url, 'zh-Hans', original_dir, info))
+        # 合并字幕
+        add('bilingual', lambda: merge_subtitles(original_dir, video_id), deps=('captions:en', 'captions:zh-Hans'))
+        # 封面
+        add('cover', lambda: download_cover(url, original_dir, info, refresh_cover))
+        return graph
@@ -0,0 +1,90 @@
+"""
+YouTube工具集 - index/search命令（跨项目全文索引与检索）
+"""
+import click
+import os
+import time
+from ..utils import YouTubeURLParser
+from ..batch import discover_projects
+from ..corpus import CorpusIndex, INDEXED_FILES
+
+
+def read_video_id(project_dir):
+    """从项目的 .youtube 文件中读取视频ID"""
+    try:
+        with open(os.path.join(project_dir, '.youtube'), 'r', encoding='utf-8') as f:
+            return YouTubeURLParser.extract_video_id(f.read().strip())
+    except OSError:
+        return None
+
+
+class IndexCommand:
+    """语料索引命令处理器"""
+
+    @staticmethod
+    @click.command()
+    @click.argument('root', required=False)
+    @click.pass_context
+    def index(ctx, root):
+        """增量索引 ROOT 下所有项目的句子、词汇和短语（默认当前目录）"""
+        original_dir = ctx.obj.get('original_dir') or os.getcwd()
+        root = os.path.join(original_dir, os.path.expanduser(root)) if root else original_dir
+        if not os.path.isdir(root):
+            click.echo(f"❌ 错误：目录不存在: {root}")
+            ctx.exit(1)
+
+        start = time.perf_counter()
+        corpus = CorpusIndex()
+        counts = {'indexed': 0, 'unchanged': 0, 'missing': 0}
+        projects = 0
+        seen = set()
+        for project_dir in discover_projects(root):
+            video_id = read_video_id(project_dir)
+            if not video_id:
+                click.echo(f"⚠️ 跳过无法识别视频ID的项目: {project_dir}")
+                continue
+            projects += 1
+            result = corpus.index_project(project_dir, video_id)
+            for status in result.values():
+                counts[status] += 1
+            if 'indexed' in result.values():
+                click.echo(f"📇 {video_id}")
+            seen.update(os.path.abspath(os.path.join(project_dir, f'{video_id}{suffix}')) for suffix in INDEXED_FILES)
+        removed = corpus.prune(root, seen)
+        info = corpus.stats()
+        corpus.close()
+
+        elapsed = time.perf_counter() - start
+        click.echo(f"✅ 索引完成：{projects} 个项目，更新 {counts['indexed']} 个文件，未变化 {counts['unchanged']}，"
+                   f"移除 {removed}，用时 {elapsed:.2f}s")
+        click.echo(f"📊 索引中共 {info['videos']} 个视频、{info['sentences']} 个句子、{info['terms']} 个词汇/短语: "
+                   f"{info['path']}")
+
+    @staticmethod
+    @click.command()
+    @click.argument('query')
+    @click.option('-n', '--limit', type=int, default=20, show_default=True, help='最多返回的结果数')
+    @click.option('--vocab', is_flag=True, default=False, help='检索词汇和短语而不是句子')
+    @click.option('--fts', 'raw', is_flag=True, default=False, help='按 FTS5 查询语法解析（支持 AND/OR/NEAR/前缀*）')
+    def search(query, limit, vocab, raw):
+        """在已索引的项目中检索句子或词汇"""
+        import sqlite3
+
+        corpus = CorpusIndex()
+        start = time.perf_counter()
+        try:
+            hits, total = corpus.search(query, limit=limit, vocabulary=vocab, raw=raw)
+        except sqlite3.OperationalError as e:
+            click.echo(f"❌ 查询语法错误: {e}")
+            return
+        finally:
+            corpus.close()
+        elapsed = (time.perf_counter() - start) * 1000
+
+        for hit in hits:
+            timestamp = hit['timestamp'] or '--:--'
+            if vocab:
+                click.echo(f"{hit['video_id']} {timestamp} [{hit['sentence_id']}] {hit['term']}: {hit['meaning']}")
+            else:
+                click.echo(f"{hit['video_id']} {timestamp} [{hit['sentence_id']}] {hit['text']}")
+        click.echo(f"🔎 共匹配 {total} 条，显示 {len(hits)} 条，用时 {elapsed:.1f}ms")
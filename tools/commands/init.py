@@ -2,44 +2,153 @@
 YouTube工具集 - init命令
 """
 import click
+import os
 from ..utils import YouTubeURLParser, ProjectManager
 
 
+def iter_collection_video_ids(url, max_depth=3):
+    """展开播放列表/频道URL，边发现边产出视频ID（flat 提取，不下载、不解析单个视频）"""
+    import yt_dlp
+
+    ydl_opts = {
+        'quiet': True,
+        'skip_download': True,
+        'extract_flat': 'in_playlist',
+        'lazy_playlist': True,
+    }
+
+    def walk(result, depth):
+        # 顶层可能是跳转（如 /c/xxx），先解析到真正的列表
+        if result.get('_type') in ('url', 'url_transparent'):
+            if depth >= max_depth:
+                return
+            result = ydl.extract_info(result['url'], download=False, process=False)
+        # process=False 时 entries 是惰性生成器，不会一次性拉取整个列表
+        for entry in result.get('entries') or []:
+            if not entry:
+                continue
+            entry_url = entry.get('url') or ''
+            video_id = entry.get('id') if entry.get('ie_key') == 'Youtube' else None
+            video_id = video_id or YouTubeURLParser.extract_video_id(entry_url)
+            if video_id:
+                yield video_id
+            elif depth < max_depth and (entry.get('_type') == 'playlist' or entry_url):
+                # 频道首页会先返回 Videos/Shorts/Live 等子列表
+                yield from walk(entry, depth + 1)
+
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        yield from walk(ydl.extract_info(url, download=False, process=False), 0)
+
+
+def iter_source_urls(urls, url_file):
+    """依次产出命令行参数和URL列表文件中的URL（# 开头为注释）"""
+    yield from urls
+    if url_file:
+        with open(url_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    yield line
+
+
 class InitCommand:
     """初始化命令处理器"""
-    
+
     @staticmethod
     @click.command()
-    @click.argument('url', required=True)
+    @click.argument('urls', nargs=-1)
     @click.option('--prefix', default=None, show_default=True, help='指定创建目录的父路径')
+    @click.option('--file', 'url_file', default=None, help='从URL列表文件批量初始化（每行一个URL）')
+    @click.option('--playlist', is_flag=True, default=False, help='视频链接带 list 参数时展开整个播放列表')
     @click.pass_context
-    def init(ctx, url: str, prefix: str):
-        """初始化YouTube项目目录"""
-        # 如果没有指定prefix，使用原始工作目录
-        if prefix is None:
-            prefix = ctx.obj.get('original_dir', '.')
-        
-        # 确保prefix不为None
-        if prefix is None:
-            prefix = '.'
-        
+    def init(ctx, urls, prefix, url_file, playlist):
+        """初始化YouTube项目目录（支持多个URL、播放列表和频道）"""
+        # 相对路径均相对于原始工作目录（守护进程中执行时 os.getcwd() 是守护进程的目录）
+        original_dir = ctx.obj.get('original_dir') or '.'
+        prefix = os.path.join(original_dir, os.path.expanduser(prefix)) if prefix else original_dir
+
+        if not urls and not url_file:
+            click.echo("❌ 错误：请提供YouTube URL或使用 --file 指定URL列表文件")
+            return
+        if url_file:
+            url_file = os.path.join(original_dir, url_file)
+
+        # 单个视频URL保持原有的详细输出
+        if len(urls) == 1 and not url_file and not InitCommand._should_expand(urls[0], playlist):
+            InitCommand.init_one(ProjectManager(prefix), urls[0])
+            return
+
+        InitCommand.init_bulk(ProjectManager(prefix), iter_source_urls(urls, url_file), playlist)
+
+    @staticmethod
+    def _should_expand(url, playlist):
+        if YouTubeURLParser.is_collection_url(url):
+            return True
+        return playlist and YouTubeURLParser.extract_playlist_id(url) is not None
+
+    @staticmethod
+    def init_one(project_manager, url):
+        """初始化单个视频项目"""
         # 检查是否是有效的YouTube URL
         if not YouTubeURLParser.is_valid_youtube_url(url):
             click.echo(f"❌ 错误：'{url}' 不是有效的YouTube URL")
             return
-        
+
         # 提取视频ID
         video_id = YouTubeURLParser.extract_video_id(url)
         click.echo(f"📹 检测到YouTube视频ID: {video_id}")
-        
+
         # 创建项目
-        project_manager = ProjectManager(prefix)
         success, result = project_manager.create_project(video_id, url)
-        
+
         if not success:
             click.echo(f"⚠️  {result}")
             return
-        
+
         click.echo(f"📁 创建目录: {result}")
         click.echo(f"📝 创建配置文件: {result}/.youtube")
-        click.echo(f"✅ 初始化完成！") 
\ No newline at end of file
+        click.echo(f"✅ 初始化完成！")
+
+    @staticmethod
+    def init_bulk(project_manager, source_urls, playlist=False):
+        """批量初始化：展开播放列表/频道，按视频ID去重，跳过已存在的项目"""
+        seen = set()
+        counts = {'created': 0, 'existing': 0, 'invalid': 0, 'failed': 0}
+
+        def create(video_id, url):
+            if video_id in seen:
+                return
+            seen.add(video_id)
+            if project_manager.exists(video_id):
+                counts['existing'] += 1
+                return
+            success, result = project_manager.create_project(video_id, url)
+            if success:
+                counts['created'] += 1
+                click.echo(f"📁 {video_id}")
+            else:
+                counts['failed'] += 1
+                click.echo(f"❌ {video_id}: {result}")
+
+        for url in source_urls:
+            if InitCommand._should_expand(url, playlist):
+                if not YouTubeURLParser.is_collection_url(url):
+                    # watch?v=...&list=... 形式，直接展开对应的播放列表
+                    url = f'https://www.youtube.com/playlist?list={YouTubeURLParser.extract_playlist_id(url)}'
+                click.echo(f"📃 展开列表: {url}")
+                try:
+                    for video_id in iter_collection_video_ids(url):
+                        create(video_id, YouTubeURLParser.video_url(video_id))
+                except Exception as e:
+                    counts['failed'] += 1
+                    click.echo(f"❌ 展开列表时出错: {e}")
+                continue
+            video_id = YouTubeURLParser.extract_video_id(url)
+            if not video_id:
+                counts['invalid'] += 1
+                click.echo(f"⚠️ 跳过无效URL: {url}")
+                continue
+            create(video_id, url)
+
+        click.echo(f"✅ 初始化完成：新建 {counts['created']}，已存在 {counts['existing']}，"
+                   f"无效 {counts['invalid']}，失败 {counts['failed']}")
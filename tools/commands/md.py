@@ -4,12 +4,31 @@ YouTube工具集 - md命令（生成预处理字幕文件）
 import click
 import os
 import re
+from ..subtitles import iter_vtt, parse_timestamp
+from ..artifacts import ArtifactStore
+from ..tokens import estimate_tokens
+from .. import tracing
+
+# 预处理算法版本，修改合并/分段逻辑时递增，使已有的 preprocessed.md 重新生成
+PREPROCESS_VERSION = 4
+MAX_SEGMENTS = 200
+# 超过该停顿（秒）的位置视为段落边界，合并片段时不跨越
+SECTION_GAP = 5.0
+# 无标点自动字幕的断句条件：字幕间停顿（秒）和单句最长持续时间（秒）；出现过句末标点的字幕只按标点断句
+PAUSE_GAP = 1.5
+MAX_SEGMENT_DURATION = 30.0
+
+NOISE_RE = re.compile(r'\[[^\]]*\]')
+SPACE_RE = re.compile(r'\s+')
+SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+SENTENCE_END = ('.', '?', '!')
 
 class MdCommand:
     @staticmethod
     @click.command()
+    @click.option('--force', is_flag=True, default=False, help='忽略产物指纹，强制重新生成')
     @click.pass_context
-    def md(ctx):
+    def md(ctx, force):
         """生成预处理字幕文件"""
         # 获取工作目录
         original_dir = ctx.obj.get('original_dir') or os.getcwd()
@@ -19,7 +38,7 @@ class MdCommand:
             ctx.exit(1)
         video_id, vtt_file, _ = result
         try:
-            MdCommand.process_md(video_id, vtt_file, original_dir)
+            MdCommand.process_md(video_id, vtt_file, original_dir, force=force)
         except Exception as e:
             click.echo(f"❌ 命令执行失败: {e}")
             ctx.exit(1)
@@ -52,108 +71,148 @@ class MdCommand:
             return None
 
     @staticmethod
-    def parse_vtt_file(vtt_file):
-        """解析VTT文件，提取字幕数据"""
+    def iter_transcript(vtt_file):
+        """流式解析VTT文件，逐条产出字幕数据（start/end 秒和 text），解析完后输出统计信息"""
         click.echo(f"📝 解析VTT文件: {vtt_file}")
+        count = 0
+        first = last = None
         try:
-            with open(vtt_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-            content = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]', '', content)
-            lines = content.strip().split('\n')
-            transcript_data = []
-            i = 0
-            while i < len(lines):
-                line = lines[i].strip()
-                if not line or line == 'WEBVTT' or line.startswith('NOTE'):
-                    i += 1
-                    continue
-                if line.isdigit():
-                    i += 1
-                    continue
-                if '-->' in line:
-                    time_parts = line.split(' --> ')
-                    if len(time_parts) == 2:
-                        start_time = MdCommand.parse_vtt_time(time_parts[0])
-                        text_lines = []
-                        i += 1
-                        while i < len(lines) and lines[i].strip():
-                            clean_line = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]', '', lines[i].strip())
-                            if clean_line:
-                                text_lines.append(clean_line)
-                            i += 1
-                        if text_lines:
-                            transcript_data.append({'start': start_time, 'text': ' '.join(text_lines)})
-                    else:
-                        i += 1
-                else:
-                    i += 1
-            if transcript_data:
-                first_time = MdCommand.format_time(transcript_data[0]['start'])
-                last_time = MdCommand.format_time(transcript_data[-1]['start'])
-                click.echo(f"📊 解析完成，共 {len(transcript_data)} 条字幕")
-                click.echo(f"📊 时间范围: {first_time} - {last_time}")
-            else:
-                click.echo("⚠️ 警告：没有解析到任何字幕数据")
-            return transcript_data
+            for cue in iter_vtt(vtt_file):
+                item = {'start': cue.start / 1000, 'end': cue.end / 1000, 'text': cue.text.replace('\n', ' ')}
+                if first is None:
+                    first = item['start']
+                last = item['start']
+                count += 1
+                yield item
         except Exception as e:
             click.echo(f"❌ 解析VTT文件时出错: {e}")
             raise
+        tracing.count('md.cues', count)
+        if count:
+            click.echo(f"📊 解析完成，共 {count} 条字幕")
+            click.echo(f"📊 时间范围: {MdCommand.format_time(first)} - {MdCommand.format_time(last)}")
+        else:
+            click.echo("⚠️ 警告：没有解析到任何字幕数据")
+
+    @staticmethod
+    def parse_vtt_file(vtt_file):
+        """解析VTT文件，返回全部字幕数据的列表"""
+        with tracing.span('md.parse_vtt'):
+            return list(MdCommand.iter_transcript(vtt_file))
 
     @staticmethod
     def parse_vtt_time(time_str):
         """解析VTT时间格式为秒数"""
         # VTT格式: HH:MM:SS.mmm
-        parts = time_str.split(':')
-        if len(parts) == 3:
-            hours = int(parts[0])
-            minutes = int(parts[1])
-            seconds = float(parts[2])
-            return hours * 3600 + minutes * 60 + seconds
-        return 0.0
+        ms = parse_timestamp(time_str)
+        return ms / 1000 if ms is not None else 0.0
 
     @staticmethod
     def clean_text(text):
         """清理字幕文本，去除无效内容"""
-        text = re.sub(r'\[[^\]]*\]', '', text)  # 去除[Music]等
-        text = re.sub(r'\s+', ' ', text)
+        text = NOISE_RE.sub('', text)  # 去除[Music]等
+        text = SPACE_RE.sub(' ', text)
         return text.strip()
 
     @staticmethod
-    def merge_segments(transcript_data, min_len=8, min_words=2):
-        """合并字幕片段，尽量保证每句以标点结尾"""
-        if not transcript_data:
-            return []
-        result = []
-        buffer = ''
-        start_time = None
+    def iter_segments(transcript_data, pause_gap=PAUSE_GAP, max_duration=MAX_SEGMENT_DURATION):
+        """流式切分句子：遇到句末标点时断句；字幕中还没有出现过句末标点时，字幕间停顿超过 pause_gap 秒
+        或句子持续超过 max_duration 秒也断句
+
+        无标点的自动字幕依靠停顿和时长断句，带标点的人工字幕句中停顿不会把句子切开；
+        每个片段包含 start/end（秒）和 text。
+        """
+        parts = []
+        start_time = end_time = None
+        punctuated = False
         for item in transcript_data:
             text = MdCommand.clean_text(item['text'])
             if not text:
                 continue
-            sentences = re.split(r'(?<=[.!?])\s+', text)
-            for sentence in sentences:
-                s = sentence.strip()
-                if not s:
+            item_start = item['start']
+            if parts and not punctuated:
+                # 没有结束时间的数据不做停顿判断
+                paused = 'end' in item and item_start - end_time >= pause_gap
+                if paused or item_start - start_time >= max_duration:
+                    yield {'start': start_time, 'end': end_time, 'text': ' '.join(parts)}
+                    parts = []
+            item_end = item.get('end', item_start)
+            for sentence in SENTENCE_SPLIT_RE.split(text):
+                if not sentence:
                     continue
-                if buffer == '':
-                    buffer = s
-                    start_time = item['start']
-                else:
-                    buffer += ' ' + s
-                if buffer.endswith(('.', '?', '!')):
-                    result.append({'start': start_time, 'text': buffer})
-                    buffer = ''
-                    start_time = None
-        if buffer:
-            result.append({'start': start_time, 'text': buffer})
-        # 合并超短句
-        final = []
-        for seg in result:
-            if final and (len(seg['text']) < min_len or len(seg['text'].split()) < min_words):
-                final[-1]['text'] += ' ' + seg['text']
+                if not parts:
+                    start_time = item_start
+                parts.append(sentence)
+                end_time = item_end
+                if sentence.endswith(SENTENCE_END):
+                    punctuated = True
+                    yield {'start': start_time, 'end': end_time, 'text': ' '.join(parts)}
+                    parts = []
+        if parts:
+            yield {'start': start_time, 'end': end_time, 'text': ' '.join(parts)}
+
+    @staticmethod
+    def merge_segments(transcript_data, min_len=8, min_words=2, pause_gap=PAUSE_GAP,
+                       max_duration=MAX_SEGMENT_DURATION):
+        """合并字幕片段，尽量保证每句以标点结尾；超短句并入前一句"""
+        result = []
+        pending = None
+        pending_parts = []
+        for seg in MdCommand.iter_segments(transcript_data, pause_gap, max_duration):
+            text = seg['text']
+            if pending is not None and (len(text) < min_len or text.count(' ') + 1 < min_words):
+                pending_parts.append(text)
+                pending['end'] = seg['end']
+                continue
+            if pending is not None:
+                pending['text'] = ' '.join(pending_parts)
+                result.append(pending)
+            pending, pending_parts = seg, [text]
+        if pending is not None:
+            pending['text'] = ' '.join(pending_parts)
+            result.append(pending)
+        return result
+
+    @staticmethod
+    def partition_segments(segments, max_segments, section_gap=SECTION_GAP):
+        """把相邻片段合并为不超过 max_segments 段，并使最长一段的估算 token 数尽可能小
+
+        对单段上限做二分查找，每个候选上限用贪心划分检查所需段数；停顿超过 section_gap 秒的
+        位置总是断开（这类断点本身超过 max_segments 时忽略停顿）。返回 (合并后的片段, 单段上限)。
+        """
+        costs = [estimate_tokens(seg['text']) + 1 for seg in segments]
+        breaks = [False] + [
+            seg['start'] - prev.get('end', prev['start']) >= section_gap
+            for prev, seg in zip(segments, segments[1:])
+        ]
+        if sum(breaks) + 1 > max_segments:
+            breaks = [False] * len(segments)
+
+        def split(limit):
+            groups, current, total = [], [], 0
+            for seg, cost, forced in zip(segments, costs, breaks):
+                if current and (forced or total + cost > limit):
+                    groups.append(current)
+                    current, total = [], 0
+                current.append(seg)
+                total += cost
+            if current:
+                groups.append(current)
+            return groups
+
+        lo, hi = max(costs), sum(costs)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if len(split(mid)) <= max_segments:
+                hi = mid
             else:
-                final.append(seg)
-        return final
+                lo = mid + 1
+        merged = [{
+            'start': group[0]['start'],
+            'end': group[-1].get('end', group[-1]['start']),
+            'text': ' '.join(seg['text'] for seg in group),
+        } for group in split(lo)]
+        return merged, lo
 
     @staticmethod
     def format_time(seconds):
@@ -163,43 +222,21 @@ class MdCommand:
         return f"{minutes:02d}:{secs:02d}"
 
     @staticmethod
-    def generate_preprocessed_md(transcript_data, output_file, max_segments=200):
+    def generate_preprocessed_md(transcript_data, output_file, max_segments=MAX_SEGMENTS):
         """生成预处理后的Markdown文件，控制总句数不超过max_segments"""
         click.echo("🔄 生成预处理字幕文件...")
         
         # 合并字幕片段
-        merged_data = MdCommand.merge_segments(transcript_data)
+        with tracing.span('md.merge_segments'):
+            merged_data = MdCommand.merge_segments(transcript_data)
         click.echo(f"📝 初步合并后共 {len(merged_data)} 个片段")
 
-        # 如果片段数超过max_segments，按比例合并相邻句子
+        # 如果片段数超过max_segments，按长度均衡地合并相邻句子
         if len(merged_data) > max_segments:
-            import math
-            ratio = math.ceil(len(merged_data) / max_segments)
-            click.echo(f"⚠️ 片段数超过{max_segments}，将每{ratio}句合并为一句")
-            new_merged = []
-            buffer = ''
-            start_time = None
-            for idx, item in enumerate(merged_data):
-                if buffer == '':
-                    buffer = item['text']
-                    start_time = item['start']
-                else:
-                    buffer += ' ' + item['text']
-                # 每ratio句合并一次，或到最后一条
-                if (idx + 1) % ratio == 0 or idx == len(merged_data) - 1:
-                    new_merged.append({
-                        'start': start_time, 
-                        'text': buffer.strip()
-                    })
-                    buffer = ''
-                    start_time = None
-            merged_data = new_merged
+            with tracing.span('md.partition_segments'):
+                merged_data, limit = MdCommand.partition_segments(merged_data, max_segments)
+            click.echo(f"⚠️ 片段数超过{max_segments}，按长度均衡合并相邻句子（每段不超过约 {limit} tokens）")
             click.echo(f"✅ 合并后片段数: {len(merged_data)}")
-        else:
-            # 只保留开始时间和文本
-            merged_data = [
-                {'start': item['start'], 'text': item['text']} for item in merged_data
-            ]
 
         # 生成预处理文件
         lines = []
@@ -211,18 +248,28 @@ class MdCommand:
         # 写入文件
         with open(output_file, 'w', encoding='utf-8') as f:
             f.write('\n'.join(lines))
+        tracing.count('md.segments', len(merged_data))
         
         click.echo(f"✅ 预处理文件已生成: {output_file}")
         return len(merged_data)
 
     @staticmethod
-    def process_md(video_id, vtt_file, original_dir):
-        """处理字幕文件，生成预处理Markdown"""
+    def process_md(video_id, vtt_file, original_dir, force=False):
+        """处理字幕文件，生成预处理Markdown（VTT 和参数未变化时跳过）"""
+        output_name = f'{video_id}.preprocessed.md'
+        output_file = os.path.join(original_dir, output_name)
+        inputs = [os.path.relpath(vtt_file, original_dir)]
+        params = {'version': PREPROCESS_VERSION, 'max_segments': MAX_SEGMENTS}
+        store = ArtifactStore(original_dir)
+        if not force and store.is_fresh(output_name, inputs, params):
+            click.echo(f"⏭️ 字幕未变化，跳过预处理: {output_file}")
+            return
         click.echo(f"📝 处理字幕文件: {vtt_file}")
         try:
-            transcript_data = MdCommand.parse_vtt_file(vtt_file)
-            output_file = os.path.join(original_dir, f'{video_id}.preprocessed.md')
+            # 字幕条边解析边断句，不在内存中保留整个字幕列表
+            transcript_data = MdCommand.iter_transcript(vtt_file)
             segment_count = MdCommand.generate_preprocessed_md(transcript_data, output_file)
+            store.record(output_name, inputs, params)
             click.echo("✅ 字幕文件处理完成")
             click.echo(f"📄 生成的预处理文件: {output_file}")
             click.echo(f"📊 共处理 {segment_count} 个字幕片段")
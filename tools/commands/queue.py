@@ -0,0 +1,128 @@
+"""
+YouTube工具集 - queue命令（持久化任务队列管理）
+"""
+import click
+import os
+import time
+from ..batch import discover_projects, projects_from_url_file
+from ..jobqueue import JobQueue, STAGES, STATES, parse_stages
+from .index import read_video_id
+
+
+class QueueCommand:
+    """任务队列命令处理器"""
+
+    @staticmethod
+    @click.group()
+    def queue():
+        """管理持久化任务队列（由 ytkit worker 执行）"""
+
+    @staticmethod
+    @click.command()
+    @click.argument('root', required=False)
+    @click.option('--url-file', default=None, help='从URL列表文件创建项目（在 ROOT 下）并加入队列')
+    @click.option('--stages', default=','.join(STAGES), show_default=True, help='加入的阶段（逗号分隔）')
+    @click.option('-p', '--priority', type=int, default=0, show_default=True, help='优先级，越大越先执行')
+    @click.option('--max-attempts', type=int, default=None,
+                  help='每个阶段的最大尝试次数 [默认: YTKIT_QUEUE_MAX_ATTEMPTS 或 5]')
+    @click.pass_context
+    def add(ctx, root, url_file, stages, priority, max_attempts):
+        """把 ROOT（默认当前目录）下所有项目加入队列"""
+        original_dir = ctx.obj.get('original_dir') or os.getcwd()
+        root = os.path.abspath(os.path.join(original_dir, os.path.expanduser(root or '.')))
+        try:
+            stages = parse_stages(stages)
+        except ValueError as e:
+            click.echo(f"❌ 错误：{e}")
+            ctx.exit(1)
+        if url_file:
+            project_dirs = projects_from_url_file(os.path.join(original_dir, url_file), root)
+        else:
+            project_dirs = discover_projects(root)
+        store = JobQueue()
+        videos = added = 0
+        for project_dir in project_dirs:
+            project_dir = os.path.abspath(project_dir)
+            video_id = read_video_id(project_dir)
+            if not video_id:
+                click.echo(f"⚠️ 跳过无法识别视频ID的项目: {project_dir}")
+                continue
+            with open(os.path.join(project_dir, '.youtube'), 'r', encoding='utf-8') as f:
+                url = f.read().strip()
+            added += store.add(project_dir, video_id, url, stages, priority, max_attempts)
+            videos += 1
+        pending = store.pending()
+        store.close()
+        if not videos:
+            click.echo("⚠️ 没有找到需要处理的项目")
+            return
+        click.echo(f"📥 {videos} 个视频，新增 {added} 个任务（阶段: {', '.join(stages)}），队列中未完成 {pending} 个")
+
+    @staticmethod
+    @click.command()
+    def stats():
+        """查看各阶段的任务数和执行中的任务"""
+        store = JobQueue()
+        counts = store.counts()
+        leases = store.leases()
+        click.echo(f"📦 队列文件: {store.path}")
+        store.close()
+        click.echo(f"  {'stage':<10}" + ''.join(f"{state:>9}" for state in STATES))
+        for stage, row in counts.items():
+            click.echo(f"  {stage:<10}" + ''.join(f"{row[state]:>9}" for state in STATES))
+        now = time.time()
+        for video_id, stage, owner, expires, attempts in leases:
+            remaining = expires - now
+            lease = f"租约剩余 {remaining:.0f}s" if remaining > 0 else f"租约已过期 {-remaining:.0f}s"
+            click.echo(f"  🔒 {video_id} {stage}  {owner}  {lease}（第 {attempts} 次）")
+        if not leases:
+            click.echo("💤 没有执行中的任务")
+
+    @staticmethod
+    @click.command()
+    @click.option('--limit', type=int, default=50, show_default=True, help='最多显示的任务数')
+    def dead(limit):
+        """查看死信任务及最后的错误"""
+        store = JobQueue()
+        rows = store.dead(limit)
+        store.close()
+        if not rows:
+            click.echo("✅ 没有死信任务")
+            return
+        for video_id, project_dir, stage, attempts, error, updated in rows:
+            when = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(updated))
+            click.echo(f"💀 {video_id} {stage}（{attempts} 次，{when}）{project_dir}")
+            click.echo(f"   {error}")
+
+    @staticmethod
+    @click.command()
+    @click.argument('video_ids', nargs=-1)
+    @click.option('--stages', default=None, help='只重试这些阶段（逗号分隔）')
+    @click.pass_context
+    def retry(ctx, video_ids, stages):
+        """把死信任务重新加入队列（可指定视频ID）"""
+        try:
+            stages = parse_stages(stages) if stages else None
+        except ValueError as e:
+            click.echo(f"❌ 错误：{e}")
+            ctx.exit(1)
+        store = JobQueue()
+        count = store.retry(stages, list(video_ids) or None)
+        store.close()
+        click.echo(f"🔁 {count} 个死信任务已重新排队")
+
+    @staticmethod
+    @click.command()
+    def purge():
+        """删除所有阶段都已完成的视频"""
+        store = JobQueue()
+        count = store.purge()
+        store.close()
+        click.echo(f"🧹 已从队列删除 {count} 个已完成的视频")
+
+
+QueueCommand.queue.add_command(QueueCommand.add)
+QueueCommand.queue.add_command(QueueCommand.stats)
+QueueCommand.queue.add_command(QueueCommand.dead)
+QueueCommand.queue.add_command(QueueCommand.retry)
+QueueCommand.queue.add_command(QueueCommand.purge)
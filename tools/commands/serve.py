@@ -0,0 +1,43 @@
+"""
+YouTube工具集 - serve命令（常驻进程，保持依赖和连接预热）
+"""
+import click
+from .. import daemon
+
+
+class ServeCommand:
+    """守护进程命令处理器"""
+
+    @staticmethod
+    @click.command()
+    @click.option('--port', type=int, default=0, show_default=True, help='监听端口（只监听 127.0.0.1），0 为随机端口')
+    @click.option('-w', '--workers', type=int, default=4, show_default=True, help='同时执行的任务数')
+    @click.option('--no-preload', is_flag=True, default=False, help='启动时不预加载 yt-dlp、openai 等依赖')
+    @click.option('--status', is_flag=True, default=False, help='查看正在运行的守护进程')
+    @click.option('--stop', is_flag=True, default=False, help='停止正在运行的守护进程')
+    @click.pass_context
+    def serve(ctx, port, workers, no_preload, status, stop):
+        """启动常驻进程，init/download/md/x 自动转发给它执行"""
+        state = daemon.read_state()
+        if status or stop:
+            if state is None:
+                click.echo("💤 守护进程未运行")
+                return
+            try:
+                if stop:
+                    daemon.request_json(state, 'POST', '/shutdown')
+                    click.echo(f"🛑 已通知守护进程停止（pid {state['pid']}）")
+                    return
+                info = daemon.request_json(state, 'GET', '/health')
+            except (OSError, RuntimeError) as e:
+                click.echo(f"❌ 无法连接守护进程（pid {state['pid']}）: {e}")
+                ctx.exit(1)
+            click.echo(f"🚀 守护进程运行中: http://127.0.0.1:{state['port']}（pid {info['pid']}，"
+                       f"已运行 {info['uptime']:.0f}s）")
+            click.echo(f"📊 执行中 {info['running']} 个，排队 {info['queued']} 个，共 {info['jobs']} 个任务")
+            return
+        if state is not None:
+            click.echo(f"❌ 守护进程已在运行（pid {state['pid']}，端口 {state['port']}）")
+            click.echo("💡 使用 ytkit serve --stop 停止后再启动")
+            ctx.exit(1)
+        daemon.serve(ctx.find_root().command, port=port, workers=workers, warm=not no_preload)
@@ -0,0 +1,61 @@
+"""
+YouTube工具集 - vocab命令（学习词汇库管理）
+"""
+import click
+import os
+from ..batch import discover_projects
+from ..vocab import VocabStore
+from .index import read_video_id
+
+
+class VocabCommand:
+    """词汇库命令处理器"""
+
+    @staticmethod
+    @click.group()
+    def vocab():
+        """管理已学过的词汇和短语"""
+
+    @staticmethod
+    @click.command('import')
+    @click.argument('root', required=False)
+    @click.pass_context
+    def import_(ctx, root):
+        """从 ROOT（默认当前目录）下所有项目的 analyzed.json 导入词汇和短语"""
+        original_dir = ctx.obj.get('original_dir') or os.getcwd()
+        root = os.path.join(original_dir, os.path.expanduser(root)) if root else original_dir
+        if not os.path.isdir(root):
+            click.echo(f"❌ 错误：目录不存在: {root}")
+            ctx.exit(1)
+        store = VocabStore()
+        files = added = 0
+        for project_dir in discover_projects(root):
+            video_id = read_video_id(project_dir)
+            analyzed_file = os.path.join(project_dir, f'{video_id}.analyzed.json')
+            if not video_id or not os.path.exists(analyzed_file):
+                continue
+            try:
+                count = store.import_file(analyzed_file, video_id)
+            except (OSError, ValueError) as e:
+                click.echo(f"⚠️ 跳过 {analyzed_file}: {e}")
+                continue
+            files += 1
+            added += count
+        info = store.stats()
+        store.close()
+        click.echo(f"✅ 导入完成：{files} 个分析文件，新增 {added} 个词条")
+        click.echo(f"📚 词汇库共 {info['vocabulary']} 个词汇、{info['phrases']} 个短语")
+
+    @staticmethod
+    @click.command()
+    def stats():
+        """查看词汇库统计"""
+        store = VocabStore()
+        info = store.stats()
+        store.close()
+        click.echo(f"📦 词汇库文件: {info['path']}")
+        click.echo(f"📊 词汇: {info['vocabulary']}，短语: {info['phrases']}，来自 {info['videos']} 个视频")
+
+
+VocabCommand.vocab.add_command(VocabCommand.import_)
+VocabCommand.vocab.add_command(VocabCommand.stats)
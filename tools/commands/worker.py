@@ -0,0 +1,226 @@
+"""
+YouTube工具集 - worker命令（多个进程从持久化队列领取并执行处理阶段）
+"""
+import os
+import sys
+import time
+import signal
+import threading
+import contextlib
+import multiprocessing
+
+import click
+
+from config import Config
+from ..jobqueue import JobQueue, STAGES, DEAD, parse_stages, worker_id
+from ..pipeline import FAILED
+from ..utils import YouTubeURLParser
+
+# 各阶段的输出追加写入项目目录下的日志，终端只显示每个任务的开始和结果
+LOG_FILE = '.ytkit.queue.log'
+# 下载阶段 -> 下载任务图中的任务
+DOWNLOAD_TASKS = {
+    'video': ('mp4',),
+    'subtitles': ('captions:en', 'captions:zh-Hans', 'bilingual'),
+    'cover': ('cover',),
+}
+
+
+class StageError(Exception):
+    """阶段执行失败，消息记录为任务的最后错误"""
+
+
+def load_project(project_dir):
+    """读取项目的 URL、视频ID和元数据（元数据缓存未过期时不重新请求）"""
+    from .download import load_info
+    with open(os.path.join(project_dir, '.youtube'), 'r', encoding='utf-8') as f:
+        url = f.read().strip()
+    video_id = YouTubeURLParser.extract_video_id(url)
+    if not video_id:
+        raise StageError(f"无法从URL中提取视频ID: {url}")
+    info = load_info(url, project_dir)
+    if not info:
+        raise StageError("获取视频元数据失败")
+    return url, video_id, info
+
+
+def run_download(stage, project_dir):
+    from .download import DownloadCommand
+    url, video_id, info = load_project(project_dir)
+    graph = DownloadCommand.build_graph(url, video_id, project_dir, info, only=DOWNLOAD_TASKS[stage])
+    failed = [task.name for task in graph.run() if task.status == FAILED]
+    if failed:
+        raise StageError(f"任务失败: {', '.join(failed)}")
+
+
+def run_md(project_dir):
+    from .md import MdCommand
+    result = MdCommand.check_vtt_file(project_dir)
+    if not result:
+        raise StageError("没有找到英文VTT文件")
+    video_id, vtt_file, _ = result
+    MdCommand.process_md(video_id, vtt_file, project_dir)
+
+
+def run_x(project_dir):
+    from .md import MdCommand
+    from .x import XCommand
+    result = MdCommand.check_vtt_file(project_dir)
+    if not result:
+        raise StageError("没有找到英文VTT文件")
+    video_id, vtt_file, _ = result
+    XCommand.step1_preprocess(video_id, vtt_file, project_dir)
+    if XCommand.step2_analyze(video_id, project_dir) == FAILED:
+        raise StageError("LLM分析失败")
+
+
+STAGE_RUNNERS = {
+    'metadata': load_project,
+    'video': lambda project_dir: run_download('video', project_dir),
+    'subtitles': lambda project_dir: run_download('subtitles', project_dir),
+    'cover': lambda project_dir: run_download('cover', project_dir),
+    'md': run_md,
+    'x': run_x,
+}
+
+
+@contextlib.contextmanager
+def stage_output(job, owner, to_log):
+    """阶段输出重定向到项目日志（worker 进程一次只执行一个任务）"""
+    if not to_log:
+        yield None
+        return
+    log_path = os.path.join(job.project_dir, LOG_FILE)
+    with open(log_path, 'a', encoding='utf-8') as f:
+        f.write(f"\n==== {time.strftime('%Y-%m-%d %H:%M:%S')} {job.stage} 第 {job.attempts} 次 ({owner}) ====\n")
+        f.flush()
+        with contextlib.redirect_stdout(f), contextlib.redirect_stderr(f):
+            yield log_path
+
+
+def run_job(queue, job, owner, lease, to_log, prefix):
+    """执行一个任务，执行期间由心跳线程续租，结束后记录完成或失败"""
+    click.echo(f"{prefix} ▶️ {job.video_id} {job.stage}（第 {job.attempts}/{job.max_attempts} 次）")
+    finished = threading.Event()
+    lost = threading.Event()
+
+    def heartbeat():
+        # sqlite 连接不跨线程使用，心跳线程单独打开一个连接
+        beats = JobQueue(queue.path)
+        try:
+            while not finished.wait(lease / 3):
+                if not beats.heartbeat(job, owner, lease):
+                    lost.set()
+                    return
+        finally:
+            beats.close()
+
+    thread = threading.Thread(target=heartbeat, name='heartbeat', daemon=True)
+    thread.start()
+    start = time.perf_counter()
+    error = log_path = None
+    try:
+        with stage_output(job, owner, to_log) as log_path:
+            STAGE_RUNNERS[job.stage](job.project_dir)
+    except Exception as e:
+        error = str(e) or type(e).__name__
+    finally:
+        finished.set()
+        thread.join()
+    elapsed = time.perf_counter() - start
+    if lost.is_set():
+        # 各阶段按产物是否存在/最新跳过，重复执行是安全的
+        click.echo(f"{prefix} ⚠️ {job.video_id} {job.stage} 的租约已被其他 worker 接管，不记录本次结果")
+        return
+    if error is None:
+        if queue.complete(job, owner):
+            click.echo(f"{prefix} ✅ {job.video_id} {job.stage}（{elapsed:.1f}s）")
+        else:
+            click.echo(f"{prefix} ⚠️ {job.video_id} {job.stage} 已完成，但租约已失效")
+        return
+    state, delay = queue.fail(job, owner, error)
+    hint = f"，详见 {log_path}" if log_path else ''
+    if state == DEAD:
+        click.echo(f"{prefix} 💀 {job.video_id} {job.stage} 失败并转入死信: {error}{hint}")
+    elif state is not None:
+        click.echo(f"{prefix} ❌ {job.video_id} {job.stage} 失败，{delay:.0f}s 后重试: {error}{hint}")
+    else:
+        click.echo(f"{prefix} ⚠️ {job.video_id} {job.stage} 失败，但租约已失效: {error}")
+
+
+def work(index, stages, lease, poll, drain, to_log, stop):
+    """worker 进程：循环领取并执行任务，直到收到停止信号（drain 模式下队列中没有未完成任务时退出）"""
+    # Ctrl+C 由父进程统一处理；SIGTERM 时完成当前任务后退出
+    stopping = threading.Event()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopping.set())
+    owner = worker_id()
+    prefix = f"[w{index}]"
+    queue = JobQueue()
+    click.echo(f"{prefix} 🚀 worker {owner} 已启动")
+    try:
+        while not (stop.is_set() or stopping.is_set()):
+            job = queue.claim(owner, stages, lease)
+            if job is not None:
+                run_job(queue, job, owner, lease, to_log, prefix)
+                continue
+            if drain and queue.pending(stages) == 0:
+                click.echo(f"{prefix} 🏁 队列中没有未完成的任务")
+                break
+            stop.wait(poll)
+    finally:
+        queue.close()
+    sys.stdout.flush()
+
+
+class WorkerCommand:
+    """队列 worker 命令处理器"""
+
+    @staticmethod
+    @click.command()
+    @click.option('-n', '--processes', type=int, default=os.cpu_count() or 1, show_default=True,
+                  help='worker 进程数')
+    @click.option('--stages', default=','.join(STAGES), show_default=True,
+                  help='只领取这些阶段的任务（逗号分隔），可让不同机器分担不同阶段')
+    @click.option('--lease', type=float, default=None, help='租约时长（秒）[默认: YTKIT_QUEUE_LEASE 或 300]')
+    @click.option('--poll', type=float, default=5.0, show_default=True, help='没有可执行任务时的轮询间隔（秒）')
+    @click.option('--drain', is_flag=True, default=False, help='队列中没有未完成任务时退出')
+    @click.option('--no-log', is_flag=True, default=False, help='阶段输出直接显示在终端，不写入项目目录下的日志')
+    @click.pass_context
+    def worker(ctx, processes, stages, lease, poll, drain, no_log):
+        """启动 worker 进程，执行 ytkit queue add 加入的任务"""
+        try:
+            stages = parse_stages(stages)
+        except ValueError as e:
+            click.echo(f"❌ 错误：{e}")
+            ctx.exit(1)
+        lease = lease or Config.QUEUE_LEASE
+        queue = JobQueue()
+        click.echo(f"📦 队列文件: {queue.path}，未完成任务 {queue.pending(stages)} 个")
+        queue.close()
+        click.echo(f"🚀 启动 {processes} 个 worker 进程，阶段: {', '.join(stages)}")
+        # spawn：子进程不继承父进程的 sqlite 连接和线程
+        mp = multiprocessing.get_context('spawn')
+        stop = mp.Event()
+        workers = [
+            mp.Process(target=work, args=(i, stages, lease, poll, drain, not no_log, stop), name=f'ytkit-worker-{i}')
+            for i in range(1, max(1, processes) + 1)
+        ]
+
+        def handle_signal(signum, frame):
+            if stop.is_set():
+                click.echo("🛑 强制停止，未完成的任务将在租约过期后由其他 worker 重新执行")
+                for process in workers:
+                    process.terminate()
+                return
+            stop.set()
+            click.echo("⏳ 等待各 worker 完成当前任务后退出（再按一次 Ctrl+C 强制停止）")
+
+        signal.signal(signal.SIGINT, handle_signal)
+        signal.signal(signal.SIGTERM, handle_signal)
+        for process in workers:
+            process.start()
+        for process in workers:
+            process.join()
+        if any(process.exitcode for process in workers):
+            ctx.exit(1)
@@ -3,16 +3,29 @@ YouTube工具集 - x命令（两步处理：预处理+LLM分析）
 """
 import click
 import os
-import json
+from config import Config
 from .md import MdCommand
-from ..llm_analyzer import LLMAnalyzer, PreprocessedFileParser
+from ..artifacts import ArtifactStore
+from ..llm_analyzer import LLMAnalyzer, AnalysisJournal, PreprocessedFileParser, PROMPT_VERSION
+from ..pipeline import OK, SKIPPED, FAILED
+from ..vocab import VocabStore
+from .. import tracing
 
 
 class XCommand:
     @staticmethod
     @click.command()
+    @click.option('--batch-size', type=int, default=None, help='每次LLM请求的最大句子数 [默认: YTKIT_LLM_BATCH_SIZE 或 20]')
+    @click.option('--concurrency', type=int, default=None, help='同时进行的LLM请求数 [默认: YTKIT_LLM_CONCURRENCY 或 4]')
+    @click.option('--no-cache', is_flag=True, default=False, help='不使用LLM分析缓存')
+    @click.option('--stream/--no-stream', default=None, help='流式接收并逐个解析分析结果 [默认: YTKIT_LLM_STREAM 或开启]')
+    @click.option('--provider', type=click.Choice(['openai', 'deepseek', 'local']), default=None,
+                  help='LLM提供商 [默认: YTKIT_LLM_PROVIDER 或 openai]')
+    @click.option('--force', is_flag=True, default=False, help='忽略产物指纹，重新执行两个步骤')
+    @click.option('--vocab-filter/--no-vocab-filter', default=None,
+                  help='不再讲解词汇库中已学过的词汇和短语 [默认: YTKIT_VOCAB_FILTER 或开启]')
     @click.pass_context
-    def x(ctx):
+    def x(ctx, batch_size, concurrency, no_cache, stream, provider, force, vocab_filter):
         """两步处理：预处理字幕 + LLM分析"""
         original_dir = ctx.obj.get('original_dir') or os.getcwd()
         result = MdCommand.check_vtt_file(original_dir)
@@ -20,43 +33,81 @@ class XCommand:
             ctx.exit(1)
         video_id, vtt_file, url = result
         try:
-            XCommand.step1_preprocess(video_id, vtt_file, original_dir)
-            XCommand.step2_analyze(video_id, original_dir)
+            with tracing.span('x.preprocess'):
+                XCommand.step1_preprocess(video_id, vtt_file, original_dir, force)
+            with tracing.span('x.analyze'):
+                status = XCommand.step2_analyze(video_id, original_dir, batch_size, concurrency, not no_cache,
+                                                stream, provider, force, vocab_filter)
         except Exception as e:
             click.echo(f"❌ 命令执行失败: {e}")
             ctx.exit(1)
+        if status == FAILED:
+            ctx.exit(1)
 
     @staticmethod
-    def step1_preprocess(video_id, vtt_file, original_dir):
+    def step1_preprocess(video_id, vtt_file, original_dir, force=False):
         """第一步：生成preprocessed.md"""
         click.echo("🔄 第一步：生成预处理文件...")
-        MdCommand.process_md(video_id, vtt_file, original_dir)
+        MdCommand.process_md(video_id, vtt_file, original_dir, force=force)
 
     @staticmethod
-    def step2_analyze(video_id, original_dir):
-        """第二步：调用LLM生成分析字典"""
+    def step2_analyze(video_id, original_dir, batch_size=None, concurrency=None, use_cache=True, stream=None,
+                      provider=None, force=False, vocab_filter=None):
+        """第二步：调用LLM生成分析字典，返回 OK/SKIPPED/FAILED"""
         click.echo("🤖 第二步：调用LLM分析...")
         
         # 检查文件是否存在
-        preprocessed_file = os.path.join(original_dir, f'{video_id}.preprocessed.md')
+        preprocessed_name = f'{video_id}.preprocessed.md'
+        preprocessed_file = os.path.join(original_dir, preprocessed_name)
         if not os.path.exists(preprocessed_file):
             click.echo(f"❌ 预处理文件不存在: {preprocessed_file}")
             click.echo("💡 请先运行第一步生成预处理文件")
-            return
+            return FAILED
         
         # 解析预处理文件
         sentences = PreprocessedFileParser.parse_preprocessed_file(preprocessed_file)
+        
+        # 预处理文件、模型、prompt 版本和已学词条都未变化时，沿用已有的分析结果
+        output_name = f'{video_id}.analyzed.json'
+        output_file = os.path.join(original_dir, output_name)
+        if vocab_filter is None:
+            vocab_filter = Config.VOCAB_FILTER
+        params = {'model': Config.get_llm_config(provider)['model'], 'prompt_version': PROMPT_VERSION,
+                  'vocab_filter': vocab_filter}
+        if vocab_filter:
+            # 只取与本视频句子相关的已学词条，其他视频学到无关词汇时不必重新分析
+            vocab = VocabStore()
+            params['known_terms'] = vocab.known_digest((s['sentence'] for s in sentences), exclude_video=video_id)
+            vocab.close()
+        store = ArtifactStore(original_dir)
+        if not force and store.is_fresh(output_name, [preprocessed_name], params):
+            click.echo(f"⏭️ 预处理文件和已学词条未变化，跳过分析: {output_file}")
+            return SKIPPED
         click.echo(f"📝 解析到 {len(sentences)} 个句子")
         
-        # 创建LLM分析器并分析
-        analyzer = LLMAnalyzer()
-        results = analyzer.analyze_sentences(sentences)
+        # 创建LLM分析器并分析，每完成一批就写入日志，中断后可继续
+        journal = AnalysisJournal(os.path.join(original_dir, f'{video_id}.analyzed.jsonl'), sentences)
+        with LLMAnalyzer(batch_size=batch_size, max_in_flight=concurrency, use_cache=use_cache, stream=stream,
+                         provider=provider, vocab_filter=vocab_filter) as analyzer:
+            results = analyzer.analyze_sentences(sentences, journal=journal, video_id=video_id)
         
         if not results:
-            return
+            return FAILED
+        
+        if analyzer.failed_ids:
+            # 保留日志，重新运行时只分析失败的句子
+            click.echo(f"⚠️ 部分句子分析失败，已完成的结果保存在日志中: {journal.path}")
+            click.echo("💡 重新运行 ytkit x 将只分析剩余的句子")
+            return FAILED
         
-        # 保存结果
-        output_file = os.path.join(original_dir, f'{video_id}.analyzed.json')
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(results, f, ensure_ascii=False, indent=2)
-        click.echo(f"✅ 调试分析完成，结果保存至: {output_file}") 
\ No newline at end of file
+        # 合并日志，保存最终结果
+        journal.compact(output_file, results)
+        store.record(output_name, [preprocessed_name], params)
+        if analyzer.vocab_filter:
+            # 本视频新讲解的词条加入词汇库，之后的视频不再重复讲解
+            vocab = VocabStore()
+            added = vocab.add_results(results, video_id)
+            vocab.close()
+            click.echo(f"📚 词汇库新增 {added} 个词条")
+        click.echo(f"✅ 分析完成，共 {len(results)} 个句子，结果保存至: {output_file}")
+        return OK
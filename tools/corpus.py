@@ -0,0 +1,214 @@
+"""
+语料索引 - 把所有项目的预处理句子和分析结果（词汇、短语）写入 SQLite FTS5 全文索引
+"""
+import os
+import json
+import sqlite3
+
+from config import Config
+from .artifacts import file_digest
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    video_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sentences (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL,
+    video_id TEXT NOT NULL,
+    sentence_id TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sentences_file ON sentences (file_id);
+CREATE INDEX IF NOT EXISTS idx_sentences_video ON sentences (video_id, sentence_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS sentences_fts USING fts5(
+    text, content='sentences', content_rowid='id', tokenize='unicode61'
+);
+CREATE TABLE IF NOT EXISTS terms (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL,
+    video_id TEXT NOT NULL,
+    sentence_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    term TEXT NOT NULL,
+    meaning TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_terms_file ON terms (file_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS terms_fts USING fts5(
+    term, meaning, content='terms', content_rowid='id', tokenize='unicode61'
+);
+'''
+
+# 匹配数超过该值时不按相关度排序
+RANK_LIMIT = 20000
+
+# 每种被索引的文件：文件名后缀 -> kind
+INDEXED_FILES = {'.preprocessed.md': 'sentences', '.analyzed.json': 'terms'}
+
+
+def phrase_query(text):
+    """把用户输入转成 FTS5 短语查询，避免引号、连字符等被当成查询语法"""
+    return '"' + text.replace('"', '""') + '"'
+
+
+class CorpusIndex:
+    """跨项目的全文索引，按文件的 (大小, 修改时间, SHA-256) 增量更新"""
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(Config.CACHE_DIR, 'corpus.sqlite3')
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def index_project(self, project_dir, video_id):
+        """索引单个项目，返回 {kind: 'indexed' | 'unchanged' | 'missing'}"""
+        result = {}
+        for suffix, kind in INDEXED_FILES.items():
+            path = os.path.abspath(os.path.join(project_dir, f'{video_id}{suffix}'))
+            result[kind] = self._index_file(path, video_id, kind)
+        self._conn.commit()
+        return result
+
+    def _index_file(self, path, video_id, kind):
+        try:
+            st = os.stat(path)
+        except OSError:
+            self._remove_file(path)
+            return 'missing'
+        row = self._conn.execute('SELECT id, size, mtime_ns, sha256 FROM files WHERE path = ?', (path,)).fetchone()
+        if row and row[1] == st.st_size and row[2] == st.st_mtime_ns:
+            return 'unchanged'
+        sha = file_digest(path)
+        if row and row[3] == sha:
+            # 只是被 touch 过，内容没变
+            self._conn.execute('UPDATE files SET size = ?, mtime_ns = ? WHERE id = ?',
+                               (st.st_size, st.st_mtime_ns, row[0]))
+            return 'unchanged'
+        if row:
+            file_id = row[0]
+            self._delete_rows(file_id, kind)
+            self._conn.execute('UPDATE files SET video_id = ?, size = ?, mtime_ns = ?, sha256 = ? WHERE id = ?',
+                               (video_id, st.st_size, st.st_mtime_ns, sha, file_id))
+        else:
+            file_id = self._conn.execute(
+                'INSERT INTO files (path, video_id, kind, size, mtime_ns, sha256) VALUES (?, ?, ?, ?, ?, ?)',
+                (path, video_id, kind, st.st_size, st.st_mtime_ns, sha),
+            ).lastrowid
+        if kind == 'sentences':
+            self._insert_sentences(path, file_id, video_id)
+        else:
+            self._insert_terms(path, file_id, video_id)
+        return 'indexed'
+
+    def _insert_sentences(self, path, file_id, video_id):
+        from .llm_analyzer import PreprocessedFileParser
+
+        rows = [(file_id, video_id, s['id'], s['timestamp'], s['sentence'])
+                for s in PreprocessedFileParser.parse_preprocessed_file(path)]
+        self._conn.executemany(
+            'INSERT INTO sentences (file_id, video_id, sentence_id, timestamp, text) VALUES (?, ?, ?, ?, ?)', rows
+        )
+        self._conn.execute(
+            'INSERT INTO sentences_fts (rowid, text) SELECT id, text FROM sentences WHERE file_id = ?', (file_id,)
+        )
+
+    def _insert_terms(self, path, file_id, video_id):
+        with open(path, 'r', encoding='utf-8') as f:
+            try:
+                items = json.load(f)
+            except ValueError:
+                items = []
+        rows = []
+        for item in items if isinstance(items, list) else []:
+            for kind in ('vocabulary', 'phrases'):
+                entries = item.get(kind)
+                if isinstance(entries, dict):
+                    rows.extend((file_id, video_id, str(item.get('id', '')), kind, term, str(meaning))
+                                for term, meaning in entries.items())
+        self._conn.executemany(
+            'INSERT INTO terms (file_id, video_id, sentence_id, kind, term, meaning) VALUES (?, ?, ?, ?, ?, ?)', rows
+        )
+        self._conn.execute(
+            'INSERT INTO terms_fts (rowid, term, meaning) SELECT id, term, meaning FROM terms WHERE file_id = ?',
+            (file_id,),
+        )
+
+    def _delete_rows(self, file_id, kind):
+        """从外部内容 FTS 表中删除时需要提供原始内容"""
+        if kind == 'sentences':
+            self._conn.execute(
+                "INSERT INTO sentences_fts (sentences_fts, rowid, text) "
+                "SELECT 'delete', id, text FROM sentences WHERE file_id = ?", (file_id,)
+            )
+            self._conn.execute('DELETE FROM sentences WHERE file_id = ?', (file_id,))
+        else:
+            self._conn.execute(
+                "INSERT INTO terms_fts (terms_fts, rowid, term, meaning) "
+                "SELECT 'delete', id, term, meaning FROM terms WHERE file_id = ?", (file_id,)
+            )
+            self._conn.execute('DELETE FROM terms WHERE file_id = ?', (file_id,))
+
+    def _remove_file(self, path):
+        row = self._conn.execute('SELECT id, kind FROM files WHERE path = ?', (path,)).fetchone()
+        if row:
+            self._delete_rows(*row)
+            self._conn.execute('DELETE FROM files WHERE id = ?', (row[0],))
+
+    def prune(self, root, seen_paths):
+        """删除 root 下已不存在（未在本次遍历中出现）的文件的索引，返回删除的文件数"""
+        prefix = os.path.join(os.path.abspath(root), '')
+        stale = [path for (path,) in self._conn.execute('SELECT path FROM files')
+                 if path.startswith(prefix) and path not in seen_paths]
+        for path in stale:
+            self._remove_file(path)
+        self._conn.commit()
+        return len(stale)
+
+    def search(self, query, limit=20, vocabulary=False, raw=False):
+        """全文检索，返回 (结果列表, 匹配总数)
+
+        匹配数不超过 RANK_LIMIT 时按 bm25 相关度排序；常见词匹配到大半个语料时，
+        逐条计算相关度的开销远大于检索本身，此时按索引顺序返回。
+        """
+        match = query if raw else phrase_query(query)
+        table = 'terms_fts' if vocabulary else 'sentences_fts'
+        total, = self._conn.execute(f'SELECT COUNT(*) FROM {table} WHERE {table} MATCH ?', (match,)).fetchone()
+        order = 'ORDER BY rank' if total <= RANK_LIMIT else ''
+        if vocabulary:
+            sql = f'''
+                SELECT t.video_id, t.sentence_id,
+                       COALESCE((SELECT s.timestamp FROM sentences s
+                                 WHERE s.video_id = t.video_id AND s.sentence_id = t.sentence_id LIMIT 1), ''),
+                       t.kind, t.term, t.meaning
+                FROM terms_fts JOIN terms t ON t.id = terms_fts.rowid
+                WHERE terms_fts MATCH ? {order} LIMIT ?
+            '''
+            keys = ('video_id', 'sentence_id', 'timestamp', 'kind', 'term', 'meaning')
+        else:
+            sql = f'''
+                SELECT s.video_id, s.sentence_id, s.timestamp,
+                       snippet(sentences_fts, 0, '[', ']', '…', 16)
+                FROM sentences_fts JOIN sentences s ON s.id = sentences_fts.rowid
+                WHERE sentences_fts MATCH ? {order} LIMIT ?
+            '''
+            keys = ('video_id', 'sentence_id', 'timestamp', 'text')
+        hits = [dict(zip(keys, row)) for row in self._conn.execute(sql, (match, limit))]
+        return hits, total
+
+    def stats(self):
+        videos, = self._conn.execute('SELECT COUNT(DISTINCT video_id) FROM files').fetchone()
+        sentences, = self._conn.execute('SELECT COUNT(*) FROM sentences').fetchone()
+        terms, = self._conn.execute('SELECT COUNT(*) FROM terms').fetchone()
+        return {'path': self.path, 'videos': videos, 'sentences': sentences, 'terms': terms}
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,421 @@
+"""
+YouTube工具集 - 常驻进程（ytkit serve）和命令行的转发客户端
+
+守护进程在 127.0.0.1 上提供任务接口，在同一个进程里执行 init/download/md/x，
+yt_dlp、openai 等模块和 HTTP 连接池、LLM 客户端只加载一次。守护进程运行时，
+命令行把这些命令转发给它并实时输出结果；未运行或无法连接时在本进程执行。
+
+守护进程的配置来自它启动时的环境变量，命令行的 YTKIT_* 或 LLM 密钥等环境变量与之不同时不转发。
+
+本模块顶层只导入标准库中的轻量模块和 click（命令行本身已加载），命令行每次启动都会加载它。
+"""
+import os
+import sys
+import json
+import time
+import threading
+import contextvars
+
+import click
+
+from config import Config
+
+# 守护进程状态文件：pid、端口和访问令牌
+STATE_FILE = 'daemon.json'
+# 转发给守护进程执行的命令
+FORWARDED_COMMANDS = ('init', 'download', 'md', 'x')
+# 主命令组中带参数值的选项
+GLOBAL_VALUE_OPTIONS = ('--original-dir', '--profile', '--metrics')
+TOKEN_HEADER = 'X-Ytkit-Token'
+# Config 读取的不带 YTKIT_ 前缀的环境变量
+PROVIDER_ENV = ('OPENAI_API_KEY', 'OPENAI_BASE_URL', 'DEEPSEEK_API_KEY')
+# 只影响命令行本身（是否转发、性能记录）的环境变量
+CLIENT_ENV = ('YTKIT_DAEMON', 'YTKIT_METRICS_FILE')
+
+# 任务状态
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+# 保留的已结束任务数
+MAX_FINISHED_JOBS = 200
+
+
+def state_path():
+    return os.path.join(Config.CACHE_DIR, STATE_FILE)
+
+
+def read_state():
+    """读取守护进程状态，进程已不存在时返回 None"""
+    try:
+        with open(state_path(), 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        os.kill(state['pid'], 0)
+    except (OSError, ValueError, KeyError):
+        return None
+    return state
+
+
+def env_fingerprint():
+    """影响命令执行的环境变量（YTKIT_* 和 LLM 提供商的密钥、地址）的摘要"""
+    import hashlib
+
+    names = sorted(name for name in os.environ
+                   if name.startswith('YTKIT_') and name not in CLIENT_ENV or name in PROVIDER_ENV)
+    digest = hashlib.sha256()
+    for name in names:
+        digest.update(f'{name}={os.environ[name]}\0'.encode('utf-8'))
+    return digest.hexdigest()
+
+
+# ---- 客户端 ----
+
+def split_args(args):
+    """拆分命令行参数，返回 (original_dir, 命令名, 命令参数)；带有不应转发的选项时返回 None"""
+    original_dir = None
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        name, has_value, value = arg.partition('=')
+        if name in GLOBAL_VALUE_OPTIONS:
+            if not has_value:
+                i += 1
+                value = args[i] if i < len(args) else None
+            if name != '--original-dir':
+                # 性能记录是进程级的，带 --profile/--metrics 的命令在本进程执行
+                return None
+            original_dir = value
+        elif arg.startswith('-'):
+            return None
+        else:
+            return original_dir, arg, args[i + 1:]
+        i += 1
+    return None
+
+
+def request_json(state, method, path, body=None, timeout=10):
+    import http.client
+
+    conn = http.client.HTTPConnection('127.0.0.1', state['port'], timeout=timeout)
+    try:
+        payload = json.dumps(body).encode('utf-8') if body is not None else None
+        headers = {TOKEN_HEADER: state['token'], 'Content-Type': 'application/json'}
+        conn.request(method, path, body=payload, headers=headers)
+        response = conn.getresponse()
+        body = response.read()
+        try:
+            data = json.loads(body or b'{}')
+        except ValueError:
+            data = {}
+        if response.status >= 400:
+            raise RuntimeError(data.get('error') or f'HTTP {response.status}')
+        return data
+    finally:
+        conn.close()
+
+
+def forward(args):
+    """守护进程运行时把命令转发给它执行，实时输出结果并返回退出码；不转发时返回 None"""
+    if not Config.DAEMON_FORWARD or os.getenv('YTKIT_METRICS_FILE'):
+        return None
+    parsed = split_args(args)
+    if parsed is None:
+        return None
+    original_dir, command, command_args = parsed
+    if command not in FORWARDED_COMMANDS or '--help' in command_args:
+        return None
+    if not os.path.exists(state_path()):
+        return None
+    state = read_state()
+    if state is None:
+        return None
+    if state.get('env') != env_fingerprint():
+        # 守护进程的配置在启动时读取，无法按任务切换
+        click.echo("💡 环境变量（YTKIT_* 或 LLM 密钥）与守护进程启动时不同，在本进程执行")
+        return None
+    cwd = os.path.abspath(original_dir or os.getcwd())
+    try:
+        job = request_json(state, 'POST', '/jobs', {'argv': [command, *command_args], 'cwd': cwd})
+    except (OSError, RuntimeError):
+        # 守护进程无响应，在本进程执行
+        return None
+    offset = 0
+    try:
+        while True:
+            data = request_json(state, 'GET', f"/jobs/{job['id']}/output?offset={offset}&wait=30", timeout=60)
+            if data['output']:
+                click.echo(data['output'], nl=False)
+            offset = data['offset']
+            if data['status'] in (DONE, FAILED):
+                return data['exit_code']
+    except KeyboardInterrupt:
+        click.echo(f"\n⚠️ 已停止等待，任务 {job['id']} 仍在守护进程中运行")
+        return 130
+    except (OSError, RuntimeError) as e:
+        click.echo(f"❌ 与守护进程的连接中断: {e}")
+        return 1
+
+
+# ---- 守护进程 ----
+
+class Job:
+    """一次命令执行；输出按字符偏移量增量读取"""
+
+    def __init__(self, job_id, argv, cwd):
+        self.id = job_id
+        self.argv = argv
+        self.cwd = cwd
+        self.status = QUEUED
+        self.exit_code = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self._chunks = []
+        self._length = 0
+        self._cond = threading.Condition()
+
+    def write(self, text):
+        with self._cond:
+            self._chunks.append(text)
+            self._length += len(text)
+            self._cond.notify_all()
+
+    def finish(self, exit_code):
+        with self._cond:
+            self.exit_code = exit_code
+            self.status = DONE if exit_code == 0 else FAILED
+            self.finished = time.time()
+            self._cond.notify_all()
+
+    def read(self, offset, wait=0.0):
+        """返回 offset 之后的输出；没有新输出且任务未结束时最多等待 wait 秒"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._length > offset or self.status in (DONE, FAILED), timeout=wait)
+            if len(self._chunks) > 1:
+                self._chunks = [''.join(self._chunks)]
+            text = self._chunks[0][offset:] if self._chunks else ''
+            return text, self._length
+
+    def to_dict(self):
+        return {
+            'id': self.id, 'argv': self.argv, 'cwd': self.cwd, 'status': self.status,
+            'exit_code': self.exit_code, 'created': self.created, 'started': self.started,
+            'finished': self.finished, 'output_length': self._length,
+        }
+
+
+# 当前上下文所属的任务；命令内部提交给线程池的函数在提交时的上下文副本中执行，输出也归入该任务
+current_job = contextvars.ContextVar('ytkit_job', default=None)
+
+
+class OutputRouter:
+    """替换 sys.stdout/sys.stderr：属于某个任务的上下文中的输出写入该任务，其余写入原来的流"""
+
+    encoding = 'utf-8'
+    errors = 'strict'
+
+    def __init__(self, fallback):
+        self.fallback = fallback
+
+    def write(self, text):
+        if not isinstance(text, str):
+            # 与文本流一致；click 用写入 b'' 是否报错判断流的类型
+            raise TypeError(f'write() argument must be str, not {type(text).__name__}')
+        job = current_job.get()
+        if job is None:
+            return self.fallback.write(text)
+        job.write(text)
+        return len(text)
+
+    def flush(self):
+        self.fallback.flush()
+
+    def isatty(self):
+        return False
+
+    def writable(self):
+        return True
+
+
+def install_output_router():
+    """路由 stdout/stderr"""
+    if isinstance(sys.stdout, OutputRouter):
+        return
+    sys.stdout = OutputRouter(sys.stdout)
+    sys.stderr = OutputRouter(sys.stderr)
+
+
+class JobManager:
+    """在线程池中执行命令，每个任务使用独立的 click 上下文"""
+
+    def __init__(self, command, workers=4):
+        from concurrent.futures import ThreadPoolExecutor
+
+        self.command = command
+        self.jobs = {}
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='ytkit-job')
+
+    def submit(self, argv, cwd):
+        with self._lock:
+            job = Job(str(self._next_id), list(argv), cwd)
+            self._next_id += 1
+            self.jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            return list(self.jobs.values())
+
+    def _prune(self):
+        finished = [job for job in self.jobs.values() if job.status in (DONE, FAILED)]
+        for job in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job.id]
+
+    def _run(self, job):
+        import traceback
+
+        token = current_job.set(job)
+        job.status = RUNNING
+        job.started = time.time()
+        try:
+            result = self.command.main(['--original-dir', job.cwd, *job.argv], prog_name='ytkit',
+                                       standalone_mode=False)
+            exit_code = result if isinstance(result, int) else 0
+        except click.ClickException as e:
+            e.show()
+            exit_code = e.exit_code
+        except click.Abort:
+            exit_code = 1
+        except Exception:
+            job.write(traceback.format_exc())
+            exit_code = 1
+        finally:
+            current_job.reset(token)
+        job.finish(exit_code)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def preload():
+    """预先加载较慢的依赖和共享客户端，后续任务直接复用"""
+    import importlib
+
+    for module in ('yt_dlp', 'openai', 'requests',
+                   'tools.commands.init', 'tools.commands.download', 'tools.commands.md', 'tools.commands.x'):
+        try:
+            importlib.import_module(module)
+        except ImportError as e:
+            click.echo(f"⚠️ 无法预加载 {module}: {e}")
+    from .net import get_session
+    from .llm_provider import LLMProvider
+
+    get_session()
+    try:
+        LLMProvider.get()
+    except (ValueError, ImportError) as e:
+        click.echo(f"⚠️ LLM 客户端未预先创建: {e}")
+
+
+def create_app(manager, token, stop):
+    from flask import Flask, request, jsonify
+
+    app = Flask('ytkit')
+    started = time.time()
+
+    @app.before_request
+    def check_token():
+        if request.headers.get(TOKEN_HEADER) != token:
+            return jsonify(error='forbidden'), 403
+
+    @app.get('/health')
+    def health():
+        jobs = manager.list()
+        return jsonify(pid=os.getpid(), uptime=time.time() - started,
+                       running=sum(job.status == RUNNING for job in jobs),
+                       queued=sum(job.status == QUEUED for job in jobs), jobs=len(jobs))
+
+    @app.post('/jobs')
+    def submit():
+        body = request.get_json(silent=True) or {}
+        argv, cwd = body.get('argv'), body.get('cwd')
+        if not argv or argv[0] not in FORWARDED_COMMANDS or not cwd or not os.path.isdir(cwd):
+            return jsonify(error=f'不支持的任务: {argv} @ {cwd}'), 400
+        job = manager.submit(argv, cwd)
+        return jsonify(job.to_dict()), 202
+
+    @app.get('/jobs')
+    def jobs():
+        return jsonify([job.to_dict() for job in manager.list()])
+
+    @app.get('/jobs/<job_id>')
+    def job_detail(job_id):
+        job = manager.get(job_id)
+        if job is None:
+            return jsonify(error='任务不存在'), 404
+        return jsonify(job.to_dict())
+
+    @app.get('/jobs/<job_id>/output')
+    def job_output(job_id):
+        job = manager.get(job_id)
+        if job is None:
+            return jsonify(error='任务不存在'), 404
+        offset = request.args.get('offset', 0, type=int)
+        wait = min(request.args.get('wait', 0.0, type=float), 60.0)
+        text, length = job.read(offset, wait)
+        return jsonify(output=text, offset=length, status=job.status, exit_code=job.exit_code)
+
+    @app.post('/shutdown')
+    def shutdown():
+        stop()
+        return jsonify(ok=True)
+
+    return app
+
+
+def serve(command, port=0, workers=4, warm=True):
+    """前台运行守护进程，直到收到 /shutdown 或被中断"""
+    import secrets
+    import signal
+    from werkzeug.serving import make_server
+
+    install_output_router()
+    if warm:
+        started = time.perf_counter()
+        preload()
+        click.echo(f"🔥 依赖预加载完成，用时 {time.perf_counter() - started:.2f}s")
+    manager = JobManager(command, workers)
+    token = secrets.token_hex(16)
+    server = None
+
+    def stop():
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    server = make_server('127.0.0.1', port, create_app(manager, token, stop), threaded=True)
+    os.makedirs(Config.CACHE_DIR, exist_ok=True)
+    path = state_path()
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump({'pid': os.getpid(), 'port': server.server_port, 'token': token, 'started': time.time(),
+                   'env': env_fingerprint()}, f)
+    signal.signal(signal.SIGTERM, lambda *_: stop())
+    click.echo(f"🚀 ytkit 守护进程已启动: http://127.0.0.1:{server.server_port}（pid {os.getpid()}，{workers} 个任务并发）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        manager.shutdown()
+        state = read_state()
+        if state and state['pid'] == os.getpid():
+            os.remove(path)
+        click.echo("👋 守护进程已停止")
@@ -0,0 +1,306 @@
+"""
+YouTube工具集 - 持久化任务队列（SQLite WAL）
+
+每个视频拆成 metadata、video、subtitles、cover、md、x 六个阶段任务，worker 进程按优先级领取，
+领取时写入带过期时间的租约并定期续租；worker 崩溃或失联时租约过期，任务由其他 worker 重新领取。
+失败的任务按指数退避重试，超过最大尝试次数后转入死信，依赖它的阶段一并转入死信。
+"""
+import os
+import time
+import socket
+import sqlite3
+import contextlib
+from collections import namedtuple
+
+from config import Config
+
+# 处理阶段及其依赖
+STAGES = ('metadata', 'video', 'subtitles', 'cover', 'md', 'x')
+STAGE_DEPS = {
+    'metadata': (),
+    'video': ('metadata',),
+    'subtitles': ('metadata',),
+    'cover': ('metadata',),
+    'md': ('subtitles',),
+    'x': ('md',),
+}
+
+
+def _ancestors(stage):
+    result = []
+    for dep in STAGE_DEPS[stage]:
+        for item in (dep, *_ancestors(dep)):
+            if item not in result:
+                result.append(item)
+    return tuple(result)
+
+
+# 阶段 -> 所有直接和间接依赖；不在队列中的依赖视为已完成（如只加入 md、x 时从已有字幕开始）
+STAGE_ANCESTORS = {stage: _ancestors(stage) for stage in STAGES}
+
+# 任务状态
+BLOCKED = 'blocked'  # 等待依赖阶段完成
+READY = 'ready'
+LEASED = 'leased'
+DONE = 'done'
+DEAD = 'dead'  # 超过最大尝试次数或依赖阶段进入死信，需要 ytkit queue retry
+STATES = (BLOCKED, READY, LEASED, DONE, DEAD)
+UNFINISHED = (BLOCKED, READY, LEASED)
+
+# 重试间隔上限（秒）
+MAX_RETRY_DELAY = 3600
+
+Job = namedtuple('Job', 'id video_id project_dir stage priority attempts max_attempts')
+
+
+def parse_stages(text):
+    """解析逗号分隔的阶段列表，按处理顺序返回"""
+    names = {name.strip() for name in str(text).split(',') if name.strip()}
+    unknown = names - set(STAGES)
+    if unknown:
+        raise ValueError(f"未知阶段: {', '.join(sorted(unknown))}（可选: {', '.join(STAGES)}）")
+    return tuple(stage for stage in STAGES if stage in names)
+
+
+def worker_id():
+    """租约持有者标识：主机名 + 进程号"""
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def retry_delay(attempts):
+    """第 attempts 次失败后的重试间隔：YTKIT_QUEUE_RETRY_DELAY 起指数增长"""
+    return min(Config.QUEUE_RETRY_DELAY * 2 ** max(0, attempts - 1), MAX_RETRY_DELAY)
+
+
+class JobQueue:
+    """SQLite 任务队列，每个进程（线程）使用自己的连接"""
+
+    def __init__(self, path=None):
+        self.path = os.path.expanduser(path or Config.QUEUE_DB or os.path.join(Config.CACHE_DIR, 'queue.sqlite3'))
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        # 自行管理事务：写操作用 BEGIN IMMEDIATE 先拿到写锁，多个 worker 不会领取同一个任务
+        self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        # WAL 依赖共享内存，只适用于同一台机器上的进程；多台机器共享网络文件系统时设置 YTKIT_QUEUE_WAL=0
+        self._conn.execute(f"PRAGMA journal_mode={'WAL' if Config.QUEUE_WAL else 'DELETE'}")
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS videos (
+                id INTEGER PRIMARY KEY,
+                project_dir TEXT NOT NULL UNIQUE,
+                video_id TEXT,
+                url TEXT,
+                added REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY,
+                video INTEGER NOT NULL REFERENCES videos (id),
+                stage TEXT NOT NULL,
+                state TEXT NOT NULL,
+                priority INTEGER NOT NULL DEFAULT 0,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL,
+                available_at REAL NOT NULL,
+                lease_owner TEXT,
+                lease_expires REAL,
+                last_error TEXT,
+                updated REAL NOT NULL,
+                UNIQUE (video, stage)
+            );
+            CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs (state, priority DESC, id);
+        ''')
+
+    @contextlib.contextmanager
+    def _write(self):
+        self._conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield self._conn
+        except BaseException:
+            self._conn.execute('ROLLBACK')
+            raise
+        self._conn.execute('COMMIT')
+
+    def add(self, project_dir, video_id, url, stages=STAGES, priority=0, max_attempts=None):
+        """加入一个视频的处理阶段，已在队列中的阶段不重复加入（只更新未完成任务的优先级）；返回新增任务数"""
+        max_attempts = max_attempts or Config.QUEUE_MAX_ATTEMPTS
+        now = time.time()
+        with self._write() as conn:
+            conn.execute('''
+                INSERT INTO videos (project_dir, video_id, url, added) VALUES (?, ?, ?, ?)
+                ON CONFLICT (project_dir) DO UPDATE SET video_id = excluded.video_id, url = excluded.url
+            ''', (project_dir, video_id, url, now))
+            video = conn.execute('SELECT id FROM videos WHERE project_dir = ?', (project_dir,)).fetchone()[0]
+            added = 0
+            for stage in stages:
+                added += conn.execute('''
+                    INSERT OR IGNORE INTO jobs (video, stage, state, priority, max_attempts, available_at, updated)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (video, stage, BLOCKED, priority, max_attempts, now, now)).rowcount
+            conn.execute('UPDATE jobs SET priority = ? WHERE video = ? AND state IN (?, ?)',
+                         (priority, video, BLOCKED, READY))
+            self._release(conn, video, now)
+        return added
+
+    def _release(self, conn, video, now):
+        """依赖阶段都已完成的 blocked 任务转为 ready"""
+        states = dict(conn.execute('SELECT stage, state FROM jobs WHERE video = ?', (video,)).fetchall())
+        for stage, state in states.items():
+            if state != BLOCKED:
+                continue
+            if all(states[dep] == DONE for dep in STAGE_ANCESTORS[stage] if dep in states):
+                conn.execute('UPDATE jobs SET state = ?, available_at = ?, updated = ? WHERE video = ? AND stage = ?',
+                             (READY, now, now, video, stage))
+
+    def _bury(self, conn, job_id, video, stage, error, now):
+        """任务转入死信，依赖它的未完成阶段一并转入死信"""
+        conn.execute('''
+            UPDATE jobs SET state = ?, lease_owner = NULL, lease_expires = NULL, last_error = ?, updated = ?
+            WHERE id = ?
+        ''', (DEAD, error, now, job_id))
+        dependents = [s for s in STAGES if stage in STAGE_ANCESTORS[s]]
+        if dependents:
+            conn.execute(f'''
+                UPDATE jobs SET state = ?, last_error = ?, updated = ?
+                WHERE video = ? AND state = ? AND stage IN ({','.join('?' * len(dependents))})
+            ''', (DEAD, f'依赖阶段 {stage} 失败', now, video, BLOCKED, *dependents))
+
+    def claim(self, owner, stages=None, lease=None):
+        """领取优先级最高的可执行任务（包括租约已过期的任务），没有时返回 None"""
+        lease = lease or Config.QUEUE_LEASE
+        now = time.time()
+        stage_filter = ''
+        if stages:
+            stage_filter = f" AND jobs.stage IN ({','.join('?' * len(stages))})"
+        with self._write() as conn:
+            # 租约过期（worker 崩溃或失联）且尝试次数已用完的任务不再领取
+            expired = conn.execute('''
+                SELECT id, video, stage FROM jobs
+                WHERE state = ? AND lease_expires < ? AND attempts >= max_attempts
+            ''', (LEASED, now)).fetchall()
+            for job_id, video, stage in expired:
+                self._bury(conn, job_id, video, stage, '租约过期且已达到最大尝试次数', now)
+            row = conn.execute(f'''
+                SELECT jobs.id, videos.video_id, videos.project_dir, jobs.stage, jobs.priority,
+                       jobs.attempts, jobs.max_attempts
+                FROM jobs JOIN videos ON videos.id = jobs.video
+                WHERE ((jobs.state = ? AND jobs.available_at <= ?) OR (jobs.state = ? AND jobs.lease_expires < ?))
+                      {stage_filter}
+                ORDER BY jobs.priority DESC, jobs.id
+                LIMIT 1
+            ''', (READY, now, LEASED, now, *(stages or ()))).fetchone()
+            if row is None:
+                return None
+            conn.execute('''
+                UPDATE jobs SET state = ?, lease_owner = ?, lease_expires = ?, attempts = attempts + 1, updated = ?
+                WHERE id = ?
+            ''', (LEASED, owner, now + lease, now, row[0]))
+        job = Job(*row)
+        return job._replace(attempts=job.attempts + 1)
+
+    def heartbeat(self, job, owner, lease=None):
+        """续租；租约已被其他 worker 接管时返回 False"""
+        lease = lease or Config.QUEUE_LEASE
+        now = time.time()
+        cursor = self._conn.execute('''
+            UPDATE jobs SET lease_expires = ?, updated = ? WHERE id = ? AND state = ? AND lease_owner = ?
+        ''', (now + lease, now, job.id, LEASED, owner))
+        return cursor.rowcount == 1
+
+    def complete(self, job, owner):
+        """任务完成，释放依赖它的阶段；租约已失效时返回 False"""
+        now = time.time()
+        with self._write() as conn:
+            cursor = conn.execute('''
+                UPDATE jobs SET state = ?, lease_owner = NULL, lease_expires = NULL, last_error = NULL, updated = ?
+                WHERE id = ? AND state = ? AND lease_owner = ?
+            ''', (DONE, now, job.id, LEASED, owner))
+            if cursor.rowcount != 1:
+                return False
+            video = conn.execute('SELECT video FROM jobs WHERE id = ?', (job.id,)).fetchone()[0]
+            self._release(conn, video, now)
+        return True
+
+    def fail(self, job, owner, error):
+        """记录失败：未用完尝试次数时返回 (READY, 重试间隔)，否则转入死信返回 (DEAD, None)；租约已失效时返回 (None, None)"""
+        now = time.time()
+        with self._write() as conn:
+            row = conn.execute('''
+                SELECT video, attempts, max_attempts FROM jobs WHERE id = ? AND state = ? AND lease_owner = ?
+            ''', (job.id, LEASED, owner)).fetchone()
+            if row is None:
+                return None, None
+            video, attempts, max_attempts = row
+            if attempts >= max_attempts:
+                self._bury(conn, job.id, video, job.stage, error, now)
+                return DEAD, None
+            delay = retry_delay(attempts)
+            conn.execute('''
+                UPDATE jobs SET state = ?, available_at = ?, lease_owner = NULL, lease_expires = NULL,
+                                last_error = ?, updated = ?
+                WHERE id = ?
+            ''', (READY, now + delay, error, now, job.id))
+        return READY, delay
+
+    def retry(self, stages=None, video_ids=None):
+        """死信任务重新排队（尝试次数清零），返回重新排队的任务数"""
+        now = time.time()
+        conditions, args = ['jobs.state = ?'], [DEAD]
+        if stages:
+            conditions.append(f"jobs.stage IN ({','.join('?' * len(stages))})")
+            args += stages
+        if video_ids:
+            conditions.append(f"videos.video_id IN ({','.join('?' * len(video_ids))})")
+            args += video_ids
+        with self._write() as conn:
+            rows = conn.execute(f'''
+                SELECT jobs.id, jobs.video FROM jobs JOIN videos ON videos.id = jobs.video
+                WHERE {' AND '.join(conditions)}
+            ''', args).fetchall()
+            conn.executemany('UPDATE jobs SET state = ?, attempts = 0, available_at = ?, updated = ? WHERE id = ?',
+                             [(BLOCKED, now, now, job_id) for job_id, _ in rows])
+            for video in {video for _, video in rows}:
+                self._release(conn, video, now)
+        return len(rows)
+
+    def purge(self):
+        """删除所有阶段都已完成的视频，返回删除的视频数"""
+        with self._write() as conn:
+            videos = [row[0] for row in conn.execute('''
+                SELECT video FROM jobs GROUP BY video HAVING SUM(state != ?) = 0
+            ''', (DONE,))]
+            conn.executemany('DELETE FROM jobs WHERE video = ?', [(v,) for v in videos])
+            conn.executemany('DELETE FROM videos WHERE id = ?', [(v,) for v in videos])
+        return len(videos)
+
+    def counts(self):
+        """各阶段各状态的任务数：{stage: {state: n}}"""
+        result = {stage: dict.fromkeys(STATES, 0) for stage in STAGES}
+        for stage, state, count in self._conn.execute('SELECT stage, state, COUNT(*) FROM jobs GROUP BY stage, state'):
+            result.setdefault(stage, dict.fromkeys(STATES, 0))[state] = count
+        return result
+
+    def pending(self, stages=None):
+        """未完成（等待依赖、可执行或执行中）的任务数"""
+        query = f"SELECT COUNT(*) FROM jobs WHERE state IN ({','.join('?' * len(UNFINISHED))})"
+        args = list(UNFINISHED)
+        if stages:
+            query += f" AND stage IN ({','.join('?' * len(stages))})"
+            args += stages
+        return self._conn.execute(query, args).fetchone()[0]
+
+    def leases(self):
+        """执行中的任务：(视频ID, 阶段, 持有者, 租约到期时间, 尝试次数)"""
+        return self._conn.execute('''
+            SELECT videos.video_id, jobs.stage, jobs.lease_owner, jobs.lease_expires, jobs.attempts
+            FROM jobs JOIN videos ON videos.id = jobs.video
+            WHERE jobs.state = ? ORDER BY jobs.lease_expires
+        ''', (LEASED,)).fetchall()
+
+    def dead(self, limit=50):
+        """死信任务：(视频ID, 项目目录, 阶段, 尝试次数, 最后的错误, 时间)，最近的在前"""
+        return self._conn.execute('''
+            SELECT videos.video_id, videos.project_dir, jobs.stage, jobs.attempts, jobs.last_error, jobs.updated
+            FROM jobs JOIN videos ON videos.id = jobs.video
+            WHERE jobs.state = ? ORDER BY jobs.updated DESC LIMIT ?
+        ''', (DEAD, limit)).fetchall()
+
+    def close(self):
+        self._conn.close()
@@ -4,73 +4,390 @@ LLM分析器 - 负责调用大模型进行句子分析
 import os
 import re
 import json
-import openai
+import time
+import random
+import hashlib
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 import click
 
+from config import Config
+from .llm_cache import LLMCache
+from .utils import format_size
+from .tokens import estimate_tokens, pack_batches
+from .llm_provider import LLMProvider
+from .vocab import VocabStore, normalize_term, sentence_ngrams
+from . import tracing
+
+# prompt 模板版本，修改 _build_analysis_prompt 的内容时递增，使旧缓存失效
+PROMPT_VERSION = 1
+
 
 class LLMAnalyzer:
     """LLM分析器，负责调用大模型进行句子分析"""
     
-    def __init__(self):
-        self.model = 'gpt-4o-mini'
-        self.api_key = os.getenv('OPENAI_API_KEY')
+    def __init__(self, batch_size=None, max_in_flight=None, max_retries=None, use_cache=True,
+                 input_budget=None, output_budget=None, stream=None, provider=None, vocab_filter=None):
+        self.batch_size = max(1, batch_size or Config.LLM_BATCH_SIZE)
+        self.input_budget = input_budget or Config.LLM_INPUT_BUDGET
+        self.output_budget = output_budget or Config.LLM_OUTPUT_BUDGET
+        self.stream = Config.LLM_STREAM if stream is None else stream
+        self.repair_rounds = Config.LLM_REPAIR_ROUNDS
+        self.max_in_flight = max(1, max_in_flight or Config.LLM_CONCURRENCY)
+        self.max_retries = Config.LLM_MAX_RETRIES if max_retries is None else max_retries
+        self.cache = LLMCache() if use_cache else None
+        self.vocab_filter = Config.VOCAB_FILTER if vocab_filter is None else vocab_filter
+        # 句子编号 -> 该句中已学过的词条 {term: meaning}，用于提示模型不再讲解
+        self.known_terms = {}
+        # 提供商和模型由 Config（YTKIT_LLM_PROVIDER）决定，客户端在进程内复用
+        llm_config = Config.get_llm_config(provider)
+        self.provider_name = llm_config['provider']
+        self.model = llm_config['model']
+        self.api_key_env = llm_config['api_key_env']
         self.client = None
-        if self.api_key:
-            self.client = openai.OpenAI(api_key=self.api_key)
-    
-    def analyze_sentences(self, sentences):
-        """分析句子列表，返回结构化结果"""
-        if not self.client:
-            click.echo("❌ 未找到OpenAI API密钥")
-            click.echo("💡 请设置环境变量 OPENAI_API_KEY")
+        if llm_config['api_key']:
+            self.client = LLMProvider.get(provider).client
+    
+    def analyze_sentences(self, sentences, journal=None, video_id=None):
+        """分析全部句子：跳过日志中已完成的，再查缓存，未命中的分批并发请求，结果按 id 顺序返回
+
+        启用词汇过滤时，video_id 用于排除本视频自身引入的词条（重新分析同一视频时不受影响）。
+        """
+        vocab = VocabStore() if self.vocab_filter else None
+        try:
+            return self._analyze(sentences, journal, video_id, vocab)
+        finally:
+            if vocab:
+                vocab.close()
+    
+    def close(self):
+        """关闭缓存连接（daemon 和 worker 在同一进程中执行多个任务）"""
+        if self.cache:
+            self.cache.close()
+            self.cache = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def _analyze(self, sentences, journal, video_id, vocab):
+        self.failed_ids = []
+        self.known_terms = {}
+        done_results = self._load_journal(journal) if journal else {}
+        if done_results:
+            click.echo(f"♻️ 从分析日志恢复 {len(done_results)} 个句子")
+        remaining = [s for s in sentences if s['id'] not in done_results]
+        with tracing.span('llm.cache_lookup'):
+            results, pending = self._lookup_cache(remaining)
+        results.extend(done_results.values())
+        tracing.count('llm.cache_hits', len(remaining) - len(pending))
+        
+        if pending and not self.client:
+            click.echo(f"❌ 未找到 {self.provider_name} 的 API 密钥")
+            click.echo(f"💡 请设置环境变量 {self.api_key_env}")
             return None
         
-        # 调试时只处理第一批
-        batch_size = 5
-        batch = sentences[0:batch_size] 
-        click.echo(f"🔄 处理第一批 {batch_size} 个句子进行调试")
+        # 缓存按句子文本共享，已学词条只提示给需要请求的句子；命中的结果最后由 _filter_known 去掉已学词条
+        self.known_terms = self._lookup_known(vocab, pending, video_id) if vocab else {}
+        
+        # 按 token 预算打包：短句共享请求，长句单独成批；已学词条提示按所在句子计入输入
+        overhead = estimate_tokens(self._build_analysis_prompt([]))
+        if any(s['id'] in self.known_terms for s in pending):
+            overhead += estimate_tokens(self.KNOWN_HINT.format(terms=''))
+        batches = pack_batches(pending, self.input_budget, self.output_budget, overhead, self.batch_size,
+                               extra_tokens=self._hint_tokens)
+        tracing.count('llm.batches', len(batches))
+        if batches:
+            click.echo(f"🔄 共 {len(pending)} 个句子待分析，分 {len(batches)} 批处理"
+                       f"（每批最多 {self.batch_size} 句，输入/输出预算 {self.input_budget}/{self.output_budget} tokens，"
+                       f"并发 {self.max_in_flight}）")
         
-        results = self._call_llm_analyze(batch)
+        def on_item(item, sentence):
+            # 每个句子解析完成后立即写入日志；提示过已学词条的结果缺少这些词条，不写入各视频共享的缓存
+            known = sorted(self.known_terms.get(sentence['id'], ()))
+            if not known:
+                self._store_cache([sentence], [item])
+            if journal:
+                journal.append([dict(item, _known=known) if known else item])
+        
+        failed = []
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            futures = {executor.submit(contextvars.copy_context().run, self._call_llm_analyze, batch, on_item): batch
+                       for batch in batches}
+            for done, future in enumerate(as_completed(futures), 1):
+                batch = futures[future]
+                batch_results = future.result()
+                if batch_results is None:
+                    failed.extend(s['id'] for s in batch)
+                    click.echo(f"❌ 第 {done}/{len(batches)} 批失败（{batch[0]['id']}-{batch[-1]['id']}）")
+                    continue
+                results.extend(batch_results)
+                # 多次重新请求后仍缺失的句子按失败处理，下次运行时重新请求
+                returned = {item['id'] for item in batch_results}
+                failed.extend(s['id'] for s in batch if s['id'] not in returned)
+                click.echo(f"✅ 第 {done}/{len(batches)} 批完成（{batch[0]['id']}-{batch[-1]['id']}）")
+        
+        self._finish_cache(len(remaining) - len(pending), len(remaining))
+        
+        self.failed_ids = failed
         if not results:
             click.echo("❌ LLM分析失败，停止处理")
             return None
-            
+        if failed:
+            click.echo(f"⚠️ {len(failed)} 个句子分析失败: {', '.join(failed)}")
+        
+        if vocab:
+            self._filter_known(vocab, results, video_id, batches)
+        
+        results.sort(key=self._sort_key)
         return results
     
-    def _call_llm_analyze(self, sentences):
-        """调用LLM分析句子"""
-        try:
-            prompt = self._build_analysis_prompt(sentences)
-            
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "你是一个专业的英语语法和词汇分析助手。请严格按照JSON格式输出。"},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3
-            )
-            
-            content = response.choices[0].message.content.strip()
-            return self._parse_response(content)
-                
-        except Exception as e:
-            click.echo(f"❌ LLM调用失败: {e}")
-            return None
+    def _load_journal(self, journal):
+        """读取分析日志；关闭词汇过滤时丢弃提示过已学词条（缺少这些词条）的结果"""
+        done = {}
+        for sentence_id, item in journal.load().items():
+            if not item.pop('_known', None) or self.vocab_filter:
+                done[sentence_id] = item
+        return done
     
-    def _parse_response(self, content):
-        """解析LLM响应"""
-        try:
-            results = json.loads(content)
-            if isinstance(results, list):
-                return results
+    @staticmethod
+    def _lookup_known(vocab, sentences, video_id):
+        """找出每个待分析句子中已学过的词条"""
+        grams = {s['id']: sentence_ngrams(s['sentence']) for s in sentences}
+        known = vocab.lookup(set().union(*grams.values()), exclude_video=video_id) if grams else {}
+        return {
+            sentence_id: {term: known[term] for term in sorted(terms & known.keys())}
+            for sentence_id, terms in grams.items() if terms & known.keys()
+        }
+    
+    def _filter_known(self, vocab, results, video_id, batches):
+        """去掉结果中已学过的词条（包括缓存和日志中的旧结果），并输出节省的 token 估算"""
+        terms = {normalize_term(term) for item in results for kind in ('vocabulary', 'phrases')
+                 for term in item.get(kind) or {}}
+        known = vocab.lookup(terms, exclude_video=video_id) if terms else {}
+        removed = 0
+        for item in results:
+            for kind in ('vocabulary', 'phrases'):
+                entries = item.get(kind) or {}
+                stale = [term for term in entries if normalize_term(term) in known]
+                for term in stale:
+                    del entries[term]
+                removed += len(stale)
+        # 只统计本次实际请求的句子（日志和缓存中的结果没有产生新的请求）
+        requested = [self.known_terms[s['id']] for batch in batches for s in batch if s['id'] in self.known_terms]
+        if not requested and not removed:
+            return
+        # 提示模型不必输出的词条按其释义长度估算节省的输出 token，减去提示本身增加的输入 token
+        hinted = sum(len(terms) for terms in requested)
+        saved_output = sum(estimate_tokens(f'"{term}": "{meaning}", ')
+                           for terms in requested for term, meaning in terms.items())
+        hint_cost = sum(estimate_tokens(self._known_hint(batch)) for batch in batches)
+        click.echo(f"📚 词汇库过滤：{len(requested)} 个句子含 {hinted} 个已学词条，"
+                   f"结果中移除 {removed} 个重复词条；预计节省输出约 {saved_output} tokens，"
+                   f"提示增加输入约 {hint_cost} tokens")
+    
+    KNOWN_HINT = "以下词汇和短语我已经学过，请不要在 vocabulary 和 phrases 中列出：{terms}\n\n"
+    
+    def _known_hint(self, sentences):
+        """一批句子中已学过的词条提示"""
+        terms = sorted({term for s in sentences for term in self.known_terms.get(s['id'], ())})
+        if not terms:
+            return ''
+        return self.KNOWN_HINT.format(terms='; '.join(terms))
+    
+    def _hint_tokens(self, sentence):
+        """该句的已学词条在提示中占用的 token（同批句子的重复词条只出现一次，这里按上限计）"""
+        return sum(estimate_tokens(f'{term}; ') for term in self.known_terms.get(sentence['id'], ()))
+    
+    def _cache_key(self, sentence):
+        return LLMCache.make_key(self.model, PROMPT_VERSION, sentence['sentence'])
+    
+    def _lookup_cache(self, sentences):
+        """按句子查缓存，返回 (命中的结果, 未命中的句子)"""
+        if not self.cache:
+            return [], list(sentences)
+        cached = self.cache.get_many(self._cache_key(s) for s in sentences)
+        hits, pending = [], []
+        for sentence in sentences:
+            value = cached.get(self._cache_key(sentence))
+            if value is None:
+                pending.append(sentence)
             else:
-                click.echo("⚠️ LLM返回格式异常，不是数组格式")
+                # 缓存内容与句子编号无关，命中后换成当前编号
+                hits.append(dict(value, id=sentence['id']))
+        return hits, pending
+    
+    def _store_cache(self, batch, batch_results):
+        """把一批分析结果按输入句子文本写入缓存"""
+        if not self.cache:
+            return
+        by_id = {s['id']: s for s in batch}
+        items = {}
+        for item in batch_results:
+            sentence = by_id.get(str(item.get('id')))
+            if sentence:
+                items[self._cache_key(sentence)] = {k: v for k, v in item.items() if k != 'id'}
+        self.cache.put_many(items)
+    
+    def _finish_cache(self, hits, total):
+        """输出命中率，超出容量时淘汰旧条目"""
+        if not self.cache:
+            return
+        rate = hits / total * 100 if total else 0.0
+        click.echo(f"📦 缓存命中 {hits}/{total} ({rate:.1f}%)")
+        removed, freed = self.cache.prune()
+        if removed:
+            click.echo(f"🧹 缓存超出容量，淘汰 {removed} 条（{format_size(freed)}）")
+    
+    @staticmethod
+    def _sort_key(item):
+        sentence_id = str(item.get('id', ''))
+        return (0, int(sentence_id)) if sentence_id.isdigit() else (1, sentence_id)
+    
+    @staticmethod
+    def _is_retryable(error):
+        """限流、5xx 和网络错误可以重试"""
+        import openai
+        if isinstance(error, (openai.RateLimitError, openai.APIConnectionError)):
+            return True
+        return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+    
+    @staticmethod
+    def _retry_delay(error, attempt):
+        """指数退避（带抖动），服务端给出 Retry-After 时优先使用"""
+        response = getattr(error, 'response', None)
+        retry_after = response.headers.get('retry-after') if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), 60.0)
+            except ValueError:
+                pass
+        return min(2 ** attempt, 30) * (0.5 + random.random())
+    
+    def _call_llm_analyze(self, sentences, on_item=None):
+        """调用LLM分析一批句子；缺失或格式错误的句子单独重新请求"""
+        results = {}
+        pending = list(sentences)
+        for round_ in range(self.repair_rounds + 1):
+            if round_:
+                click.echo(f"🔁 重新请求 {len(pending)} 个缺失或格式错误的句子: {', '.join(s['id'] for s in pending)}")
+            items = self._request(pending, on_item)
+            if items is None:
+                break
+            results.update((item['id'], item) for item in items)
+            pending = [s for s in pending if s['id'] not in results]
+            if not pending:
+                break
+        return list(results.values()) if results else None
+    
+    def _request(self, sentences, on_item=None):
+        """发送一次请求，边接收边解析数组元素，返回通过校验的结果；请求失败返回 None"""
+        prompt = self._build_analysis_prompt(sentences)
+        by_id = {s['id']: s for s in sentences}
+        # 只在记录性能数据时请求流式响应附带 usage，避免不支持该参数的服务出错
+        extra = {'stream_options': {'include_usage': True}} if self.stream and tracing.enabled() else {}
+        for attempt in range(self.max_retries + 1):
+            valid = {}
+            parser = StreamingArrayParser()
+            
+            def accept(raw):
+                item = self._validate(raw, by_id)
+                if item is None or item['id'] in valid:
+                    return
+                valid[item['id']] = item
+                if on_item:
+                    on_item(item, by_id[item['id']])
+            
+            try:
+                with tracing.span('llm.request', sentences=len(sentences), attempt=attempt) as span:
+                    response = self.client.chat.completions.create(
+                        model=self.model,
+                        messages=[
+                            {"role": "system", "content": "你是一个专业的英语语法和词汇分析助手。请严格按照JSON格式输出。"},
+                            {"role": "user", "content": prompt}
+                        ],
+                        temperature=0.3,
+                        max_tokens=self.output_budget,
+                        stream=self.stream,
+                        **extra
+                    )
+                    
+                    usage = None
+                    if self.stream:
+                        for chunk in response:
+                            # include_usage 时最后一个分块不含 choices，只带 usage
+                            usage = getattr(chunk, 'usage', None) or usage
+                            if chunk.choices and chunk.choices[0].delta.content:
+                                for raw in parser.feed(chunk.choices[0].delta.content):
+                                    accept(raw)
+                    else:
+                        usage = response.usage
+                        for raw in self._parse_response(response.choices[0].message.content or '', parser):
+                            accept(raw)
+                    self._record_usage(span, usage, len(valid))
+                if parser.errors:
+                    click.echo(f"⚠️ LLM返回了 {parser.errors} 个格式错误的元素")
+                return list(valid.values())
+            
+            except Exception as e:
+                if valid:
+                    # 流式传输中断，已解析的结果保留，其余句子由调用方重新请求
+                    click.echo(f"⚠️ LLM响应中断（{e.__class__.__name__}），已接收 {len(valid)} 个句子")
+                    return list(valid.values())
+                if attempt < self.max_retries and self._is_retryable(e):
+                    delay = self._retry_delay(e, attempt)
+                    click.echo(f"⚠️ LLM调用失败（{e.__class__.__name__}），{delay:.1f}s 后重试 ({attempt + 1}/{self.max_retries})")
+                    tracing.count('llm.retries')
+                    time.sleep(delay)
+                    continue
+                click.echo(f"❌ LLM调用失败: {e}")
                 return None
-        except json.JSONDecodeError as e:
-            click.echo(f"⚠️ LLM返回非JSON格式: {e}")
+    
+    @staticmethod
+    def _record_usage(span, usage, items):
+        """记录一次请求的 token 用量（服务返回了 usage 时）"""
+        tracing.count('llm.requests')
+        tracing.count('llm.items', items)
+        if usage is None:
+            return
+        span.set(prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens)
+        tracing.count('llm.prompt_tokens', usage.prompt_tokens or 0)
+        tracing.count('llm.completion_tokens', usage.completion_tokens or 0)
+    
+    def _parse_response(self, content, parser=None):
+        """解析LLM响应，逐个返回数组元素；截断或个别元素格式错误时保留其余元素"""
+        parser = parser or StreamingArrayParser()
+        items = list(parser.feed(content))
+        if not parser.started:
+            click.echo("⚠️ LLM返回格式异常，不是数组格式")
             click.echo(f"返回内容: {content[:200]}...")
+        return items
+    
+    @staticmethod
+    def _validate(item, by_id):
+        """校验单个分析结果，返回规范化后的结果；不合格返回 None"""
+        if not isinstance(item, dict):
             return None
+        sentence_id = str(item.get('id', '')).strip()
+        if sentence_id not in by_id and sentence_id.isdigit():
+            # 模型可能把 "007" 写成 7
+            width = len(next(iter(by_id)))
+            sentence_id = sentence_id.zfill(width)
+        if sentence_id not in by_id:
+            return None
+        for key in ('explanation', 'syntax'):
+            if not isinstance(item.get(key), str):
+                return None
+        for key in ('vocabulary', 'phrases'):
+            if not isinstance(item.setdefault(key, {}), dict):
+                return None
+        item['id'] = sentence_id
+        item.setdefault('sentence', by_id[sentence_id]['sentence'])
+        return item
     
     def _build_analysis_prompt(self, sentences):
         """构建LLM分析prompt"""
@@ -119,14 +436,137 @@ class LLMAnalyzer:
   }
 ]
 
-句子列表：
 """
+        prompt += self._known_hint(sentences)
+        prompt += "句子列表：\n"
         for sentence in sentences:
             prompt += f"{sentence['id']} {sentence['sentence']}\n"
         prompt += "\n请直接输出JSON数组，不要包含任何其他内容。"
         return prompt
 
 
+class StreamingArrayParser:
+    """增量 JSON 数组解析器：逐块输入文本，每个顶层元素闭合时立即解析并产出"""
+    
+    def __init__(self):
+        self.started = False
+        self.errors = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._buf = []
+    
+    def feed(self, text):
+        """输入一段文本，产出其中已闭合的数组元素（格式错误的元素计入 errors 并跳过）"""
+        buf = self._buf
+        for ch in text:
+            if not self.started:
+                # 跳过数组前的任何内容（如 ```json）
+                if ch == '[':
+                    self.started = True
+                    self._depth = 1
+                continue
+            if self._depth == 0:
+                continue
+            if self._in_string:
+                buf.append(ch)
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+                buf.append(ch)
+            elif ch in '{[':
+                self._depth += 1
+                buf.append(ch)
+            elif ch in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    yield from self._flush()
+                    continue
+                buf.append(ch)
+                if self._depth == 1:
+                    yield from self._flush()
+            elif ch == ',' and self._depth == 1:
+                yield from self._flush()
+            else:
+                buf.append(ch)
+    
+    def _flush(self):
+        text = ''.join(self._buf).strip()
+        self._buf.clear()
+        if not text:
+            return
+        try:
+            yield json.loads(text)
+        except ValueError:
+            self.errors += 1
+
+
+class AnalysisJournal:
+    """分析日志（JSON Lines）：每完成一批即追加写入，中断后重新运行可从日志继续"""
+    
+    VERSION = 2
+    
+    def __init__(self, path, sentences):
+        self.path = path
+        # 句子列表变化（如重新预处理）时旧日志作废
+        digest = hashlib.sha256()
+        for sentence in sentences:
+            digest.update(f"{sentence['id']}\t{sentence['sentence']}\n".encode('utf-8'))
+        self.header = {'journal': self.VERSION, 'sentences': digest.hexdigest()}
+        self._ids = {s['id'] for s in sentences}
+        self._lock = threading.Lock()
+    
+    def load(self):
+        """读取已完成的结果 {id: result}；日志不匹配当前句子时丢弃"""
+        done = {}
+        if not os.path.exists(self.path):
+            return done
+        with open(self.path, 'r', encoding='utf-8') as f:
+            header = f.readline()
+            try:
+                if json.loads(header) != self.header:
+                    raise ValueError
+            except ValueError:
+                click.echo("⚠️ 分析日志与当前预处理文件不匹配，重新开始")
+                os.remove(self.path)
+                return done
+            for line in f:
+                try:
+                    item = json.loads(line)
+                except ValueError:
+                    # 写入中断导致的残缺行
+                    continue
+                if isinstance(item, dict) and str(item.get('id')) in self._ids:
+                    done[str(item['id'])] = item
+        return done
+    
+    def append(self, results):
+        """追加一批结果并立即落盘"""
+        with self._lock:
+            new_file = not os.path.exists(self.path)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                if new_file:
+                    f.write(json.dumps(self.header) + '\n')
+                for item in results:
+                    f.write(json.dumps(item, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+    
+    def compact(self, output_file, results):
+        """把完整结果写入最终的 analyzed.json 并删除日志"""
+        tmp_file = output_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, output_file)
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
 class PreprocessedFileParser:
     """预处理文件解析器"""
     
@@ -139,7 +579,7 @@ class PreprocessedFileParser:
                 line = line.strip()
                 if not line:
                     continue
-                match = re.match(r'(\d{2}:\d{2})\s+\[(\d+)\]\s+(.+)', line)
+                match = re.match(r'(\d{2,}:\d{2})\s+\[(\d+)\]\s+(.+)', line)
                 if match:
                     timestamp, sentence_id, text = match.groups()
                     sentences.append({
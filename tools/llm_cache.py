@@ -0,0 +1,126 @@
+"""
+LLM分析缓存 - 按 (模型, prompt 版本, 句子文本) 内容寻址的持久化缓存
+"""
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+from config import Config
+
+SIZE_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+
+
+def parse_size(text):
+    """解析 100M、1.5G 这类大小字符串为字节数"""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMG]?)i?B?\s*', str(text), re.IGNORECASE)
+    if not match:
+        raise ValueError(f"无效的大小: {text}")
+    number, unit = match.groups()
+    return int(float(number) * SIZE_UNITS[unit.upper()])
+
+
+class LLMCache:
+    """SQLite 持久化缓存，超出容量时按最近访问时间（LRU）淘汰"""
+
+    def __init__(self, path=None, max_bytes=None):
+        self.path = path or os.path.join(Config.CACHE_DIR, 'llm_cache.sqlite3')
+        self.max_bytes = Config.LLM_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        # 分析结果由工作线程写入，连接在线程间共享并用锁串行化
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed)')
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model, prompt_version, text):
+        """缓存键：模型、prompt 版本和句子文本的 SHA-256"""
+        raw = '\0'.join((model, str(prompt_version), text.strip()))
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get_many(self, keys):
+        """批量查询，返回 {key: value}，命中的条目更新访问时间"""
+        found = {}
+        keys = list(dict.fromkeys(keys))
+        with self._lock:
+            # SQLite 默认最多 999 个绑定参数
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f'SELECT key, value FROM entries WHERE key IN ({placeholders})', chunk
+                ).fetchall()
+                for key, value in rows:
+                    found[key] = json.loads(value)
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    'UPDATE entries SET accessed = ?, hits = hits + 1 WHERE key = ?',
+                    [(now, key) for key in found],
+                )
+                self._conn.commit()
+        return found
+
+    def put_many(self, items):
+        """批量写入 {key: value}"""
+        now = time.time()
+        rows = []
+        for key, value in items.items():
+            data = json.dumps(value, ensure_ascii=False)
+            rows.append((key, data, len(data.encode('utf-8')), now, now))
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO entries (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)',
+                rows,
+            )
+            self._conn.commit()
+
+    def stats(self):
+        """缓存统计：条目数、总大小、累计命中数"""
+        with self._lock:
+            count, size, hits = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(hits), 0) FROM entries'
+            ).fetchone()
+        return {'path': self.path, 'entries': count, 'bytes': size, 'hits': hits, 'max_bytes': self.max_bytes}
+
+    def prune(self, max_bytes=None):
+        """按最近访问时间淘汰条目，直到总大小不超过 max_bytes，返回 (删除条数, 释放字节数)"""
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        removed = freed = 0
+        with self._lock:
+            total = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+            if total <= max_bytes:
+                return 0, 0
+            victims = []
+            for key, size in self._conn.execute('SELECT key, size FROM entries ORDER BY accessed'):
+                if total - freed <= max_bytes:
+                    break
+                victims.append((key,))
+                freed += size
+            self._conn.executemany('DELETE FROM entries WHERE key = ?', victims)
+            self._conn.commit()
+            removed = len(victims)
+            if max_bytes == 0:
+                self._conn.execute('VACUUM')
+        return removed, freed
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,61 @@
+"""
+LLM提供商 - 按 Config 构建带连接池的 OpenAI 兼容客户端，每个提供商进程内只建一个
+"""
+import threading
+
+from config import Config
+
+
+class LLMProvider:
+    """LLM提供商：模型名 + 复用 keep-alive 连接的客户端"""
+
+    _instances = {}
+    _lock = threading.Lock()
+
+    def __init__(self, config):
+        self.name = config['provider']
+        self.model = config['model']
+        self.base_url = config['base_url']
+        self.config = config
+        self.client = self._build_client(config)
+
+    @classmethod
+    def get(cls, provider=None):
+        """获取（必要时创建）提供商实例；同一提供商和配置共享一个客户端和连接池"""
+        config = Config.get_llm_config(provider)
+        if not config['api_key']:
+            raise ValueError(f"未找到 {config['provider']} 的 API 密钥，请设置环境变量 {config['api_key_env']}")
+        key = (config['provider'], config['base_url'], config['api_key'], config['model'])
+        with cls._lock:
+            if key not in cls._instances:
+                cls._instances[key] = cls(config)
+            return cls._instances[key]
+
+    @staticmethod
+    def _build_client(config):
+        # openai 和 httpx 导入较慢，只在真正需要调用时加载
+        import httpx
+        import openai
+
+        timeout = httpx.Timeout(config['timeout'], connect=config['connect_timeout'])
+        limits = httpx.Limits(
+            max_connections=config['max_connections'],
+            max_keepalive_connections=config['max_connections'],
+            keepalive_expiry=60,
+        )
+        # 重试由 LLMAnalyzer 统一处理
+        return openai.OpenAI(
+            api_key=config['api_key'],
+            base_url=config['base_url'],
+            max_retries=0,
+            timeout=timeout,
+            http_client=httpx.Client(timeout=timeout, limits=limits, follow_redirects=True),
+        )
+
+    @classmethod
+    def close_all(cls):
+        """关闭所有客户端的连接池"""
+        with cls._lock:
+            for provider in cls._instances.values():
+                provider.client.close()
+            cls._instances.clear()
@@ -0,0 +1,64 @@
+"""
+YouTube工具集 - 共享 HTTP 连接池（封面、字幕等小文件请求）
+"""
+import os
+import threading
+
+from config import Config
+from . import tracing
+
+MODIFIED = 'modified'
+NOT_MODIFIED = 'not_modified'
+
+_session = None
+_lock = threading.Lock()
+
+
+def get_session():
+    """进程内共享的 requests.Session，批量处理多个项目时复用连接"""
+    global _session
+    with _lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+
+            retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                          allowed_methods=('GET', 'HEAD'))
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=Config.HTTP_POOL_SIZE, max_retries=retry)
+            session = requests.Session()
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+    return _session
+
+
+def fetch_to_file(url, path, validators=None, chunk_size=64 * 1024):
+    """流式下载 url 到 path（先写临时文件再替换）
+
+    validators 为上次响应的 {'etag', 'last_modified'}，用于条件请求。
+    返回 (MODIFIED | NOT_MODIFIED, 新的 validators)；HTTP 错误抛出 requests.HTTPError。
+    """
+    headers = {}
+    if validators:
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+    with get_session().get(url, headers=headers, stream=True, timeout=Config.HTTP_TIMEOUT) as resp:
+        if resp.status_code == 304:
+            return NOT_MODIFIED, validators
+        resp.raise_for_status()
+        tmp_path = f'{path}.tmp'
+        size = 0
+        with open(tmp_path, 'wb') as f:
+            for chunk in resp.iter_content(chunk_size):
+                f.write(chunk)
+                size += len(chunk)
+        tracing.count('http.bytes', size)
+        os.replace(tmp_path, path)
+        return MODIFIED, {
+            'url': url,
+            'etag': resp.headers.get('ETag'),
+            'last_modified': resp.headers.get('Last-Modified'),
+        }
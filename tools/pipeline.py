@@ -0,0 +1,97 @@
+"""
+YouTube工具集 - 任务图（按依赖关系并发执行任务）
+"""
+import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import click
+
+from . import tracing
+
+# 任务状态
+OK = 'ok'
+SKIPPED = 'skipped'
+FAILED = 'failed'
+
+STATUS_ICONS = {OK: '✅', SKIPPED: '⏭️', FAILED: '❌'}
+
+
+class Task:
+    """单个任务及其执行结果"""
+
+    def __init__(self, name, func, deps=()):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.status = None
+        self.elapsed = 0.0
+        self.error = None
+
+
+class TaskGraph:
+    """依赖感知的任务图，无依赖关系的任务在线程池中并发执行"""
+
+    def __init__(self, max_workers=4):
+        self.max_workers = max(1, int(max_workers))
+        self.tasks = {}
+
+    def add(self, name, func, deps=()):
+        """添加任务，func 返回 OK/SKIPPED/FAILED（返回 None 视为 OK）"""
+        if name in self.tasks:
+            raise ValueError(f"任务重复: {name}")
+        for dep in deps:
+            if dep not in self.tasks:
+                raise ValueError(f"任务 {name} 依赖未知任务: {dep}")
+        self.tasks[name] = Task(name, func, deps)
+        return self.tasks[name]
+
+    def _execute(self, task):
+        start = time.perf_counter()
+        with tracing.span(f'task.{task.name}') as span:
+            try:
+                status = task.func()
+                task.status = status if status in STATUS_ICONS else OK
+            except Exception as e:
+                task.status = FAILED
+                task.error = str(e)
+            span.set(status=task.status)
+        task.elapsed = time.perf_counter() - start
+        return task
+
+    def run(self):
+        """执行所有任务，依赖失败的任务会被跳过；返回按添加顺序排列的任务列表"""
+        pending = dict(self.tasks)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                for name, task in list(pending.items()):
+                    dep_tasks = [self.tasks[d] for d in task.deps]
+                    if any(d.status is None for d in dep_tasks):
+                        continue
+                    del pending[name]
+                    failed = [d.name for d in dep_tasks if d.status == FAILED]
+                    if failed:
+                        task.status = SKIPPED
+                        task.error = f"依赖任务失败: {', '.join(failed)}"
+                        continue
+                    # 任务在提交时的上下文中执行（守护进程按上下文把输出归入对应任务）
+                    running[executor.submit(contextvars.copy_context().run, self._execute, task)] = task
+                if not running:
+                    # 剩余任务因依赖被跳过而状态刚刚确定，继续下一轮调度
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    del running[future]
+        return list(self.tasks.values())
+
+    def summary(self):
+        """输出每个任务的状态和耗时"""
+        width = max((len(name) for name in self.tasks), default=0)
+        click.echo("📊 任务统计:")
+        for task in self.tasks.values():
+            icon = STATUS_ICONS.get(task.status, '❔')
+            line = f"  {icon} {task.name.ljust(width)}  {task.elapsed:7.2f}s"
+            if task.error:
+                line += f"  ({task.error})"
+            click.echo(line)
@@ -0,0 +1,278 @@
+"""
+YouTube工具集 - 字幕处理（统一的字幕条模型、SRT/VTT 流式解析与写出、按时间轴对齐双语字幕）
+"""
+import re
+import json
+from html import unescape
+
+TIMESTAMP_RE = re.compile(r'(?:(\d+):)?(\d{1,2}):(\d{2})[,.](\d{1,3})')
+# 常见的完整时间行（HH:MM:SS.mmm --> HH:MM:SS.mmm），一次匹配取出两个时间；其他写法回退到 parse_time_range
+TIME_LINE_RE = re.compile(r'(\d+:\d{2}:\d{2}[,.]\d{3})\s*-->\s*(\d+:\d{2}:\d{2}[,.]\d{3})')
+# <c.colorE5E5E5>、<00:00:01.000>、<b> 等 VTT/SRT 样式标签，SRT 中的 {\an8} 等 ASS 标签，以及控制字符
+CLEAN_RE = re.compile(r'<[^>]*>|\{\\[^}]*\}|[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]')
+# 只有样式标签时（自动字幕的逐词时间标签）用更简单的表达式，比 CLEAN_RE 快近一倍
+TAG_RE = re.compile(r'<[^>]*>')
+# VTT 中不属于字幕条的块
+VTT_META_PREFIXES = ('WEBVTT', 'NOTE', 'STYLE', 'REGION')
+# 字幕接口可解析的原始格式，按优先顺序（json3 时间精确且自动字幕没有滚动重复）
+CAPTION_FORMATS = ('json3', 'vtt', 'srt')
+
+
+class Cue:
+    """一条字幕：开始/结束时间（毫秒）和文本（多行用换行分隔）"""
+
+    __slots__ = ('start', 'end', 'text')
+
+    def __init__(self, start, end, text):
+        self.start = start
+        self.end = end
+        self.text = text
+
+    def __repr__(self):
+        return f'Cue({self.start}, {self.end}, {self.text!r})'
+
+    def __eq__(self, other):
+        if not isinstance(other, Cue):
+            return NotImplemented
+        return (self.start, self.end, self.text) == (other.start, other.end, other.text)
+
+
+def parse_timestamp(value):
+    """解析 SRT/VTT 时间（HH:MM:SS,mmm / MM:SS.mmm）为毫秒，无法解析时返回 None"""
+    match = TIMESTAMP_RE.search(value)
+    if not match:
+        return None
+    hours, minutes, seconds, millis = match.groups()
+    return ((int(hours or 0) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + int(millis.ljust(3, '0'))
+
+
+def parse_time_range(line):
+    """解析 'start --> end [cue settings]' 时间行为 (start_ms, end_ms)，无法解析时返回 None"""
+    start, sep, end = line.partition('-->')
+    if not sep:
+        return None
+    start_ms, end_ms = parse_timestamp(start), parse_timestamp(end)
+    if start_ms is None or end_ms is None:
+        return None
+    return start_ms, max(start_ms, end_ms)
+
+
+def format_timestamp(ms, separator=','):
+    """格式化毫秒为 HH:MM:SS,mmm（VTT 使用 '.' 分隔毫秒）"""
+    seconds, millis = divmod(int(ms), 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f'{hours:02d}:{minutes:02d}:{seconds:02d}{separator}{millis:03d}'
+
+
+def clean_line(line):
+    """去除控制字符、样式标签和 HTML 实体"""
+    if '{' in line or not line.isprintable():
+        line = CLEAN_RE.sub('', line)
+    elif '<' in line:
+        line = TAG_RE.sub('', line)
+    if '&' in line:
+        line = unescape(line)
+    return line.strip()
+
+
+def _stamp_ms(stamp):
+    """TIME_LINE_RE 匹配到的 HH:MM:SS.mmm 转为毫秒"""
+    hours, minutes, rest = stamp.split(':')
+    return (int(hours) * 60 + int(minutes)) * 60000 + int(rest[:2] + rest[3:])
+
+
+def _iter_lines(source):
+    """source 可以是文件路径或行的可迭代对象；文件按 utf-8-sig 读取以去掉 BOM"""
+    if isinstance(source, str):
+        return _iter_file(source)
+    return _strip_bom(source)
+
+
+def _iter_file(path):
+    with open(path, 'r', encoding='utf-8-sig', errors='replace') as f:
+        yield from f
+
+
+def _strip_bom(lines):
+    first = True
+    for line in lines:
+        if first:
+            line = line.lstrip('\ufeff')
+            first = False
+        yield line
+
+
+def _iter_cues(source, vtt):
+    """逐行解析字幕块，边读边产出 Cue；序号/标识行被忽略，没有文本的字幕条被丢弃"""
+    time_range = None
+    texts = []
+    skip_block = False
+    # 上一个时间行的结束时间；自动字幕每条的开始时间就是上一条的结束时间，不再重复解析
+    last_stamp = last_ms = None
+    match_time_line, tag_sub = TIME_LINE_RE.match, TAG_RE.sub
+    for raw in _iter_lines(source):
+        line = raw.strip()
+        if not line:
+            if time_range and texts:
+                yield Cue(time_range[0], time_range[1], '\n'.join(texts))
+            time_range, texts, skip_block = None, [], False
+            continue
+        if skip_block:
+            continue
+        if '-->' in line:
+            match = match_time_line(line)
+            if match is None:
+                parsed = parse_time_range(line)
+            else:
+                start_stamp, end_stamp = match.groups()
+                start = last_ms if start_stamp == last_stamp else _stamp_ms(start_stamp)
+                last_stamp, last_ms = end_stamp, _stamp_ms(end_stamp)
+                parsed = start, max(start, last_ms)
+            if parsed is not None:
+                # 缺少空行分隔的下一条字幕，上一行是它的序号
+                if texts and texts[-1].isdigit():
+                    texts.pop()
+                if time_range and texts:
+                    yield Cue(time_range[0], time_range[1], '\n'.join(texts))
+                time_range, texts = parsed, []
+                continue
+        if time_range is None:
+            if vtt and line.startswith(VTT_META_PREFIXES):
+                skip_block = True
+            continue
+        # 大多数文本行没有控制字符、ASS 标签和实体，直接保留或只去掉样式标签，不再调用 clean_line
+        if '{' in line or '&' in line or not line.isprintable():
+            line = clean_line(line)
+        elif '<' in line:
+            line = tag_sub('', line).strip()
+        if line:
+            texts.append(line)
+    if time_range and texts:
+        yield Cue(time_range[0], time_range[1], '\n'.join(texts))
+
+
+def iter_srt(source):
+    """流式解析 SRT 字幕，产出 Cue"""
+    return _iter_cues(source, vtt=False)
+
+
+def iter_vtt(source):
+    """流式解析 WebVTT 字幕（跳过 WEBVTT 头、NOTE/STYLE/REGION 块，忽略 cue settings），产出 Cue"""
+    return _iter_cues(source, vtt=True)
+
+
+def iter_subtitle_file(path):
+    """按扩展名选择解析器"""
+    return iter_vtt(path) if path.lower().endswith('.vtt') else iter_srt(path)
+
+
+def iter_json3(data):
+    """解析 YouTube json3 字幕（json.loads 后的对象），产出 Cue
+
+    自动字幕的事件显示时间相互重叠（上一行一直显示到下一行结束），结束时间截断到下一条的开始时间。
+    """
+    pending = None
+    for event in data.get('events') or ():
+        segs = event.get('segs')
+        if not segs:
+            continue
+        raw = ''.join(seg.get('utf8', '') for seg in segs)
+        text = '\n'.join(filter(None, (clean_line(line) for line in raw.split('\n'))))
+        if not text:
+            continue
+        start = int(event.get('tStartMs', 0))
+        end = start + int(event.get('dDurationMs', 0))
+        if pending is not None:
+            if start > pending.start:
+                pending.end = min(pending.end, start)
+            yield pending
+        pending = Cue(start, end, text)
+    if pending is not None:
+        yield pending
+
+
+def collapse_rolling(cues):
+    """合并自动字幕 VTT 的滚动显示：去掉与上一条末行重复的首行，丢弃只剩重复内容的过渡字幕条"""
+    previous = None
+    for cue in cues:
+        lines = cue.text.split('\n')
+        if lines[0] == previous:
+            lines = lines[1:]
+        if not lines:
+            continue
+        previous = lines[-1]
+        yield Cue(cue.start, cue.end, '\n'.join(lines))
+
+
+def parse_captions(text, ext, automatic=False):
+    """把字幕接口返回的 json3/vtt/srt 文本解析为按开始时间排序的 Cue 列表"""
+    if ext == 'json3':
+        cues = iter_json3(json.loads(text))
+    elif ext == 'vtt':
+        cues = iter_vtt(text.splitlines())
+        if automatic:
+            cues = collapse_rolling(cues)
+    elif ext == 'srt':
+        cues = iter_srt(text.splitlines())
+    else:
+        raise ValueError(f"不支持的字幕格式: {ext}")
+    return sorted(cues, key=lambda cue: cue.start)
+
+
+def write_srt(cues, path):
+    """写出 SRT 字幕，返回写出的条数"""
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for count, cue in enumerate(cues, 1):
+            f.write(f'{count}\n{format_timestamp(cue.start)} --> {format_timestamp(cue.end)}\n{cue.text}\n\n')
+    return count
+
+
+def write_vtt(cues, path):
+    """写出 WebVTT 字幕，返回写出的条数"""
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('WEBVTT\n\n')
+        for count, cue in enumerate(cues, 1):
+            text = cue.text.replace('&', '&amp;').replace('<', '&lt;')
+            f.write(f"{format_timestamp(cue.start, '.')} --> {format_timestamp(cue.end, '.')}\n{text}\n\n")
+    return count
+
+
+def align_cues(primary, secondary):
+    """按时间重叠把 secondary 的字幕条分配给 primary 的字幕条
+
+    primary/secondary 为按开始时间排序的 Cue 序列。每条 secondary 归入与其重叠时长最大的
+    primary（一条 primary 可以对应多条 secondary）；完全不重叠时归入时间上最近的 primary。
+    两个指针单向推进，对不自相重叠的字幕轨为 O(n+m)。
+    返回长度为 len(primary) 的列表，每项是分配到该条的 secondary 下标列表。
+    """
+    assigned = [[] for _ in primary]
+    if not primary:
+        return assigned
+    n = len(primary)
+    lo = 0
+    for j, cue in enumerate(secondary):
+        s_start, s_end = cue.start, cue.end
+        # 结束时间不晚于当前开始时间的 primary 不可能再与后续条目重叠
+        while lo < n and primary[lo].end <= s_start:
+            lo += 1
+        best, best_overlap = None, 0
+        k = lo
+        while k < n and primary[k].start < s_end:
+            overlap = min(primary[k].end, s_end) - max(primary[k].start, s_start)
+            if overlap > best_overlap:
+                best, best_overlap = k, overlap
+            k += 1
+        if best is None:
+            # 没有重叠：在前后两条 primary 中取间隔更小的一条
+            before, after = lo - 1, min(lo, n - 1)
+            if before < 0:
+                best = after
+            else:
+                gap_before = s_start - primary[before].end
+                gap_after = primary[after].start - s_end
+                best = before if gap_before <= gap_after else after
+        assigned[best].append(j)
+    return assigned
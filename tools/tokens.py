@@ -0,0 +1,70 @@
+"""
+Token 估算与批次打包 - 按输入/输出 token 预算把句子装入 LLM 请求
+"""
+import re
+from functools import lru_cache
+
+# 中日韩字符大约各占 1 个 token，其余文本约 4 个字符 1 个 token
+CJK_RE = re.compile(r'[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]')
+
+# 每个句子的输出估算：固定字段（explanation/syntax 等）开销 + 与句子长度成正比的部分
+OUTPUT_BASE_TOKENS = 120
+OUTPUT_PER_INPUT_TOKEN = 3.0
+
+
+@lru_cache(maxsize=1)
+def _encoder():
+    """安装了 tiktoken 时使用真实分词器，否则返回 None 使用启发式估算"""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.get_encoding('o200k_base')
+    except Exception:
+        return None
+
+
+def estimate_tokens(text):
+    """估算文本的 token 数"""
+    if not text:
+        return 0
+    encoder = _encoder()
+    if encoder is not None:
+        return len(encoder.encode(text))
+    cjk = len(CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def estimate_output_tokens(input_tokens):
+    """估算一个句子的分析结果所需的输出 token 数"""
+    return int(OUTPUT_BASE_TOKENS + OUTPUT_PER_INPUT_TOKEN * input_tokens)
+
+
+def pack_batches(sentences, input_budget, output_budget, overhead_tokens=0, max_items=None, extra_tokens=None):
+    """按顺序贪心打包句子，使每批的输入（含固定 prompt 开销）和预计输出都不超过预算
+
+    短句共享一次请求，超出预算的长句单独成批；返回批次列表。
+    extra_tokens(sentence) 返回该句在 prompt 中额外占用的输入 token（如已学词条提示）。
+    """
+    batches = []
+    batch, batch_in, batch_out = [], overhead_tokens, 0
+    for sentence in sentences:
+        tokens_in = estimate_tokens(sentence['sentence']) + 4  # 编号和换行
+        tokens_out = estimate_output_tokens(tokens_in)
+        if extra_tokens:
+            tokens_in += extra_tokens(sentence)
+        full = batch and (
+            batch_in + tokens_in > input_budget
+            or batch_out + tokens_out > output_budget
+            or (max_items and len(batch) >= max_items)
+        )
+        if full:
+            batches.append(batch)
+            batch, batch_in, batch_out = [], overhead_tokens, 0
+        batch.append(sentence)
+        batch_in += tokens_in
+        batch_out += tokens_out
+    if batch:
+        batches.append(batch)
+    return batches
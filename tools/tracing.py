@@ -0,0 +1,182 @@
+"""
+YouTube工具集 - 阶段耗时和计数器记录（--profile 输出 Chrome trace，--metrics 输出 Prometheus textfile）
+
+未启用时 span() 返回共享的空对象、count() 直接返回，埋点本身几乎没有开销。
+"""
+import os
+import re
+import json
+import time
+import threading
+
+_tracer = None
+
+METRIC_NAME_RE = re.compile(r'[^a-zA-Z0-9_]')
+
+
+class _NullSpan:
+    """未启用记录时使用的空 span"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """一段计时区间，退出时记录为 Chrome trace 的完整事件（ph=X）"""
+    __slots__ = ('tracer', 'name', 'args', 'start')
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        self.tracer.add_span(self.name, self.start, time.perf_counter_ns(), self.args)
+        return False
+
+    def set(self, **args):
+        """补充记录在该 span 上的数据（如字幕条数、字节数）"""
+        self.args.update(args)
+
+
+class Tracer:
+    """收集 span 和计数器，多线程安全"""
+
+    def __init__(self):
+        self.origin = time.perf_counter_ns()
+        self.wall_start = time.time()
+        self.pid = os.getpid()
+        self.events = []
+        self.counters = {}
+        # span 名 -> [调用次数, 累计纳秒]
+        self.totals = {}
+        self.threads = {}
+        self._lock = threading.Lock()
+
+    def _thread_id(self):
+        thread = threading.current_thread()
+        tid = thread.ident
+        if tid not in self.threads:
+            self.threads[tid] = thread.name
+        return tid
+
+    def add_span(self, name, start, end, args):
+        with self._lock:
+            self.events.append({
+                'name': name, 'ph': 'X', 'pid': self.pid, 'tid': self._thread_id(),
+                'ts': (start - self.origin) / 1000, 'dur': (end - start) / 1000, 'args': args,
+            })
+            total = self.totals.setdefault(name, [0, 0])
+            total[0] += 1
+            total[1] += end - start
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+            self.events.append({
+                'name': name, 'ph': 'C', 'pid': self.pid, 'tid': self._thread_id(),
+                'ts': (time.perf_counter_ns() - self.origin) / 1000, 'args': {'value': self.counters[name]},
+            })
+
+    def write_chrome_trace(self, path):
+        """写出 Chrome trace JSON，可用 chrome://tracing 或 https://ui.perfetto.dev 打开"""
+        with self._lock:
+            events = [
+                {'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': tid, 'args': {'name': name}}
+                for tid, name in self.threads.items()
+            ] + list(self.events)
+            payload = {
+                'traceEvents': events,
+                'displayTimeUnit': 'ms',
+                'otherData': {'start_time': self.wall_start, 'counters': dict(self.counters)},
+            }
+        _atomic_write(path, json.dumps(payload, ensure_ascii=False))
+
+    def write_prometheus(self, path, labels=None):
+        """写出 Prometheus textfile（node_exporter textfile collector 格式），每次运行覆盖上一次的值"""
+        base = ','.join(f'{k}="{_escape_label(v)}"' for k, v in sorted((labels or {}).items()))
+
+        def series(name, value, extra=None):
+            label_text = ','.join(filter(None, [base, extra]))
+            value = repr(round(value, 6)) if isinstance(value, float) else str(value)
+            return f'{name}{{{label_text}}} {value}' if label_text else f'{name} {value}'
+
+        with self._lock:
+            totals = sorted(self.totals.items())
+            counters = sorted(self.counters.items())
+        lines = [
+            '# HELP ytkit_run_timestamp_seconds Start time of the last ytkit run.',
+            '# TYPE ytkit_run_timestamp_seconds gauge',
+            series('ytkit_run_timestamp_seconds', round(self.wall_start, 3)),
+            '# HELP ytkit_run_duration_seconds Wall time of the last ytkit run.',
+            '# TYPE ytkit_run_duration_seconds gauge',
+            series('ytkit_run_duration_seconds', (time.perf_counter_ns() - self.origin) / 1e9),
+            '# HELP ytkit_stage_seconds Wall time spent in each stage during the last run.',
+            '# TYPE ytkit_stage_seconds gauge',
+        ]
+        lines += [series('ytkit_stage_seconds', ns / 1e9, f'stage="{_escape_label(name)}"') for name, (_, ns) in totals]
+        lines += [
+            '# HELP ytkit_stage_calls Number of times each stage ran during the last run.',
+            '# TYPE ytkit_stage_calls gauge',
+        ]
+        lines += [series('ytkit_stage_calls', calls, f'stage="{_escape_label(name)}"') for name, (calls, _) in totals]
+        for name, value in counters:
+            metric = 'ytkit_' + METRIC_NAME_RE.sub('_', name)
+            lines += [f'# TYPE {metric} gauge', series(metric, value)]
+        _atomic_write(path, '\n'.join(lines) + '\n')
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _atomic_write(path, text):
+    # textfile collector 可能随时读取，先写临时文件再替换
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def enable():
+    """启用记录，返回全局 Tracer"""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+    return _tracer
+
+
+def enabled():
+    return _tracer is not None
+
+
+def span(name, **args):
+    """计时区间：with span('md.parse_vtt') as s: ...; s.set(cues=n)"""
+    tracer = _tracer
+    if tracer is None:
+        return NULL_SPAN
+    return Span(tracer, name, args)
+
+
+def count(name, value=1):
+    """累加计数器（字节数、token 数等）"""
+    tracer = _tracer
+    if tracer is not None:
+        tracer.count(name, value)
@@ -30,6 +30,25 @@ class YouTubeURLParser:
     def is_valid_youtube_url(url: str) -> bool:
         """检查是否是有效的YouTube URL"""
         return YouTubeURLParser.extract_video_id(url) is not None
+    
+    @staticmethod
+    def is_collection_url(url: str) -> bool:
+        """检查是否是播放列表或频道URL（不指向单个视频）"""
+        if re.search(r'youtube\.com/(?:playlist\?|@[^/?#]+|channel/|c/|user/)', url):
+            return True
+        # 只有 list 参数而没有 v 参数时视为播放列表
+        return bool(re.search(r'[?&]list=', url)) and YouTubeURLParser.extract_video_id(url) is None
+    
+    @staticmethod
+    def extract_playlist_id(url: str) -> str:
+        """从URL中提取播放列表ID"""
+        match = re.search(r'[?&]list=([a-zA-Z0-9_-]+)', url)
+        return match.group(1) if match else None
+    
+    @staticmethod
+    def video_url(video_id: str) -> str:
+        """由视频ID生成标准观看URL"""
+        return f'https://www.youtube.com/watch?v={video_id}'
 
 
 class ProjectManager:
@@ -38,9 +57,17 @@ class ProjectManager:
     def __init__(self, prefix: str = '.'):
         self.prefix = prefix
     
+    def project_dir(self, video_id: str) -> str:
+        """项目目录路径"""
+        return os.path.join(os.path.expanduser(self.prefix), video_id)
+    
+    def exists(self, video_id: str) -> bool:
+        """项目配置文件是否已存在"""
+        return os.path.exists(os.path.join(self.project_dir(video_id), '.youtube'))
+    
     def create_project(self, video_id: str, url: str) -> bool:
         """创建项目目录和配置文件"""
-        target_dir = os.path.join(os.path.expanduser(self.prefix), video_id)
+        target_dir = self.project_dir(video_id)
         youtube_file_path = os.path.join(target_dir, '.youtube')
         
         # 检查.youtube文件是否已存在
@@ -58,4 +85,12 @@ class ProjectManager:
             return True, target_dir
             
         except Exception as e:
-            return False, f"创建目录时出错: {e}" 
\ No newline at end of file
+            return False, f"创建目录时出错: {e}" 
+
+
+def format_size(size):
+    """格式化字节数"""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.1f}{unit}" if unit != 'B' else f"{size}B"
+        size /= 1024
@@ -0,0 +1,111 @@
+"""
+学习词汇库 - 记录已经在分析结果中讲解过的词汇和短语，后续分析时不再重复讲解
+"""
+import os
+import re
+import json
+import time
+import hashlib
+import sqlite3
+
+from config import Config
+
+WORD_RE = re.compile(r"[a-z0-9]+(?:['’-][a-z0-9]+)*")
+# 句子中按连续单词匹配已知短语的最大长度
+MAX_TERM_WORDS = 5
+
+
+def normalize_term(term):
+    """统一大小写和标点，'Take  it for granted!' -> 'take it for granted'"""
+    return ' '.join(WORD_RE.findall(term.lower().replace('’', "'")))
+
+
+def sentence_ngrams(text, max_words=MAX_TERM_WORDS):
+    """句子中所有长度不超过 max_words 的连续单词组合"""
+    words = WORD_RE.findall(text.lower().replace('’', "'"))
+    grams = set()
+    for i in range(len(words)):
+        for n in range(1, min(max_words, len(words) - i) + 1):
+            grams.add(' '.join(words[i:i + n]))
+    return grams
+
+
+class VocabStore:
+    """SQLite 词汇库：term -> (类型, 释义, 首次出现的视频)"""
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(Config.CACHE_DIR, 'vocab.sqlite3')
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS terms (
+                term TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                meaning TEXT NOT NULL,
+                video_id TEXT NOT NULL,
+                seen INTEGER NOT NULL DEFAULT 1,
+                added REAL NOT NULL
+            )
+        ''')
+        self._conn.commit()
+
+    def add_results(self, results, video_id):
+        """把分析结果中的词汇和短语加入词汇库，返回新增条数"""
+        now = time.time()
+        rows = []
+        for item in results:
+            for kind in ('vocabulary', 'phrases'):
+                entries = item.get(kind)
+                if not isinstance(entries, dict):
+                    continue
+                for term, meaning in entries.items():
+                    key = normalize_term(term)
+                    if key:
+                        rows.append((key, kind, str(meaning), video_id, now))
+        before = self._count()
+        self._conn.executemany(
+            'INSERT INTO terms (term, kind, meaning, video_id, added) VALUES (?, ?, ?, ?, ?) '
+            'ON CONFLICT (term) DO UPDATE SET seen = seen + 1 WHERE terms.video_id != excluded.video_id',
+            rows,
+        )
+        self._conn.commit()
+        return self._count() - before
+
+    def _count(self):
+        return self._conn.execute('SELECT COUNT(*) FROM terms').fetchone()[0]
+
+    def import_file(self, analyzed_file, video_id):
+        """导入一个 analyzed.json，返回新增条数"""
+        with open(analyzed_file, 'r', encoding='utf-8') as f:
+            results = json.load(f)
+        return self.add_results(results if isinstance(results, list) else [], video_id)
+
+    def lookup(self, terms, exclude_video=None):
+        """查询已知词条，返回 {term: meaning}；exclude_video 首次出现的词条不算已知（重新分析同一视频时）"""
+        found = {}
+        terms = list(terms)
+        for i in range(0, len(terms), 500):
+            chunk = terms[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            for term, meaning, video_id in self._conn.execute(
+                f'SELECT term, meaning, video_id FROM terms WHERE term IN ({placeholders})', chunk
+            ):
+                if video_id != exclude_video:
+                    found[term] = meaning
+        return found
+
+    def known_digest(self, texts, exclude_video=None):
+        """这些句子中已学过的词条集合的摘要；词汇库新增与这些句子相关的词条时摘要随之变化"""
+        grams = set().union(*(sentence_ngrams(text) for text in texts))
+        known = sorted(self.lookup(grams, exclude_video=exclude_video)) if grams else []
+        return hashlib.sha256('\n'.join(known).encode('utf-8')).hexdigest()
+
+    def stats(self):
+        rows = dict(self._conn.execute('SELECT kind, COUNT(*) FROM terms GROUP BY kind').fetchall())
+        videos, = self._conn.execute('SELECT COUNT(DISTINCT video_id) FROM terms').fetchone()
+        return {'path': self.path, 'vocabulary': rows.get('vocabulary', 0), 'phrases': rows.get('phrases', 0),
+                'videos': videos}
+
+    def close(self):
+        self._conn.close()